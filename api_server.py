@@ -0,0 +1,755 @@
+import argparse
+import gc
+import shutil
+import tempfile
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from data_processor import DataProcessor
+from rag_system import RAGSystem
+from claim_analyzer import ClaimAnalyzer
+from claim_dedup import ClaimDeduplicator
+from llm_cache import open_cache
+from index_store import DEFAULT_INDEX_PATH, index_version, load_or_build_index
+from embedding_engine import EmbeddingEngine
+from metadata_store import PassageFilter
+from metrics import REGISTRY, export_prometheus, inc, load_snapshots, merge_snapshots, span, worker_dump_path
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH_CLAIMS = 256
+MAX_K = 50
+FILTER_FIELDS = ('domains', 'date_from', 'date_to', 'sources', 'exclude_sources')
+METRICS_DUMP_INTERVAL = 1.0
+KEEPALIVE_TIMEOUT = 5.0
+
+class BadRequest(Exception):
+    """Raised when a request body is missing or malformed."""
+
+def evidence_summary(passage, include_text=True):
+    """
+    Reduce a retrieved passage to the fields returned by the API.
+
+    Args:
+        passage (dict): Passage with similarity from EmbeddingEngine.search
+        include_text (bool): Include the passage text
+
+    Returns:
+        dict: JSON-serializable evidence entry
+    """
+    summary = {
+        'passage_id': passage['passage_id'],
+        'source': passage['source'],
+        'domain': passage['domain'],
+        'publication_date': passage['publication_date'],
+        'similarity': round(passage['similarity'], 4)
+    }
+    if include_text:
+        summary['text'] = passage['text']
+    return summary
+
+class ClaimCheckService:
+    def __init__(self, embedding_engine, analyzer_options=None, timeout=None, max_workers=8,
+                 dedup_threshold=None, llm_cache_path=None):
+        """
+        Initialize the request-independent claim checking pipeline.
+
+        Args:
+            embedding_engine (EmbeddingEngine): Loaded, read-only search index
+            analyzer_options (dict, optional): Keyword arguments for ClaimAnalyzer
+            timeout (float, optional): Default seconds allowed per claim explanation
+            max_workers (int): Concurrent explanations for batch requests
+            dedup_threshold (float, optional): Reuse the result of an earlier claim at least this
+                similar (see ClaimDeduplicator); None analyzes every claim
+            llm_cache_path (str, optional): LLM response cache file, defaults to LLM_CACHE_PATH
+        """
+        self.embedding_engine = embedding_engine
+        self.data_processor = DataProcessor()
+        self.rag_system = RAGSystem(embedding_engine)
+        analyzer_options = dict(analyzer_options or {})
+        # Opened here, in the worker, since SQLite connections must not cross a fork
+        cache = open_cache(llm_cache_path) if analyzer_options.get('use_llm', True) else None
+        if cache is not None:
+            analyzer_options['llm_config'] = {**analyzer_options.get('llm_config', {}), 'cache': cache}
+        self.claim_analyzer = ClaimAnalyzer(**analyzer_options)
+        self.claim_analyzer.index_passages(embedding_engine.passages, embedding_engine.snapshot.annotations)
+        self.timeout = timeout
+        self.max_workers = max_workers
+        # Each worker process keeps its own index: a claim is learned separately by every worker
+        # that receives it, so a repeat costs at most one extra miss per worker. Sharing one index
+        # across processes would put IPC on every lookup, which takes microseconds in-process.
+        self.deduplicator = None if dedup_threshold is None else ClaimDeduplicator(threshold=dedup_threshold)
+
+    def _parse_query(self, body):
+        """
+        Validate the fields shared by all endpoints.
+
+        Args:
+            body (dict): Decoded request body
+
+        Returns:
+            tuple: (claim_text, k, domain_filter)
+        """
+        claim_text = body.get('claim_text')
+        if not isinstance(claim_text, str) or not claim_text.strip():
+            raise BadRequest("'claim_text' must be a non-empty string")
+        k = body.get('k', 5)
+        if not isinstance(k, int) or not 1 <= k <= MAX_K:
+            raise BadRequest(f"'k' must be an integer between 1 and {MAX_K}")
+        domain = body.get('domain')
+        if domain is not None and not isinstance(domain, str):
+            raise BadRequest("'domain' must be a string")
+        return claim_text, k, domain or None
+
+    def _parse_filter(self, body):
+        """
+        Validate the optional metadata filters applied before scoring.
+
+        Args:
+            body (dict): Decoded request body, with 'filters' holding any of 'domains', 'sources' and
+                'exclude_sources' (lists of names) and 'date_from', 'date_to' (ISO dates, inclusive)
+
+        Returns:
+            PassageFilter: The filter, or None when no filter is given
+        """
+        filters = body.get('filters')
+        if filters is None:
+            return None
+        if not isinstance(filters, dict):
+            raise BadRequest("'filters' must be an object")
+        for name in filters:
+            if name not in FILTER_FIELDS:
+                raise BadRequest(f"Unknown filter {name!r}, expected one of {', '.join(FILTER_FIELDS)}")
+        for name in ('domains', 'sources', 'exclude_sources'):
+            values = filters.get(name)
+            if values is not None and (not isinstance(values, list) or not all(isinstance(v, str) for v in values)):
+                raise BadRequest(f"'{name}' must be a list of strings")
+        for name in ('date_from', 'date_to'):
+            if filters.get(name) is not None and not isinstance(filters[name], str):
+                raise BadRequest(f"'{name}' must be an ISO date string")
+        try:
+            passage_filter = PassageFilter(**filters)
+        except ValueError as e:
+            raise BadRequest(str(e))
+        return None if passage_filter.is_empty() else passage_filter
+
+    def _parse_timeout(self, body):
+        """
+        Validate the optional per-request explanation timeout.
+
+        Args:
+            body (dict): Decoded request body
+
+        Returns:
+            float: Seconds allowed, or the service default
+        """
+        timeout = body.get('timeout', self.timeout)
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise BadRequest("'timeout' must be a positive number of seconds")
+        return timeout
+
+    def _parse_reuse(self, body):
+        """
+        Validate the optional flag allowing a near-duplicate claim's result to be reused.
+
+        Args:
+            body (dict): Decoded request body
+
+        Returns:
+            bool: Whether a result may be reused
+        """
+        reuse = body.get('reuse', True)
+        if not isinstance(reuse, bool):
+            raise BadRequest("'reuse' must be a boolean")
+        return reuse and self.deduplicator is not None
+
+    def _reused(self, claim_text, match, include_text=True):
+        """
+        Build the response for a claim answered from a near-duplicate.
+
+        Args:
+            claim_text (str): The claim as submitted
+            match (dict): Output of ClaimDeduplicator.lookup
+            include_text (bool): Include the evidence passage texts
+
+        Returns:
+            dict: The earlier result for this claim, flagged as reused
+        """
+        evidence = match['result']['evidence']
+        if not include_text:
+            evidence = [{key: value for key, value in passage.items() if key != 'text'} for passage in evidence]
+        return {
+            **match['result'],
+            'claim_text': claim_text,
+            'evidence': evidence,
+            'reused': True,
+            'claim_similarity': round(match['similarity'], 4)
+        }
+
+    def retrieve(self, body):
+        """
+        Retrieve evidence for a claim without analyzing it.
+
+        Args:
+            body (dict): {'claim_text', optional 'k', 'domain', 'filters'}
+
+        Returns:
+            dict: {'claim_text', 'evidence'}
+        """
+        claim_text, k, domain = self._parse_query(body)
+        passage_filter = self._parse_filter(body)
+        processed_claim = self.data_processor.process_claim_text(claim_text)
+        evidence = self.rag_system.retrieve_evidence(processed_claim, k=k, domain_filter=domain,
+                                                     passage_filter=passage_filter)
+        return {
+            'claim_text': claim_text,
+            'evidence': [evidence_summary(passage) for passage in evidence]
+        }
+
+    def analyze(self, body):
+        """
+        Retrieve evidence for a claim and return its verdict.
+
+        When near-duplicate reuse is enabled and an earlier claim analyzed
+        with the same index, domain, filters and k is similar enough, its result is
+        returned without retrieval or explanation, with 'reused' set.
+
+        Args:
+            body (dict): {'claim_text', optional 'k', 'domain', 'filters', 'timeout', 'reuse'}
+
+        Returns:
+            dict: {'claim_text', 'verdict', 'confidence', 'explanation', 'evidence', 'reused'},
+                plus 'claim_similarity' for a reused result
+        """
+        claim_text, k, domain = self._parse_query(body)
+        passage_filter = self._parse_filter(body)
+        timeout = self._parse_timeout(body)
+        reuse = self._parse_reuse(body)
+        processed_claim = self.data_processor.process_claim_text(claim_text)
+        scope = (self.embedding_engine.version, domain, passage_filter, k)
+        if reuse:
+            match = self.deduplicator.lookup(processed_claim, scope)
+            if match is not None:
+                return self._reused(claim_text, match)
+
+        evidence = self.rag_system.retrieve_evidence(processed_claim, k=k, domain_filter=domain,
+                                                     passage_filter=passage_filter)
+        verdict, explanation, confidence = self.claim_analyzer.analyze_claim(processed_claim, evidence,
+                                                                             timeout=timeout)
+        result = {
+            'verdict': verdict,
+            'confidence': round(confidence, 4),
+            'explanation': explanation,
+            'evidence': [evidence_summary(passage) for passage in evidence]
+        }
+        if self.deduplicator is not None:
+            # Stored without the claim text, which may belong to another client
+            self.deduplicator.add(processed_claim, result, scope)
+        return {'claim_text': claim_text, **result, 'reused': False}
+
+    def analyze_batch(self, body):
+        """
+        Analyze several claims, generating explanations concurrently.
+
+        Claims with a reusable near-duplicate are answered from it, as in
+        analyze; only the rest are retrieved and explained.
+
+        Args:
+            body (dict): {'claims': [{'claim_text', optional 'claim_id', 'domain', 'filters'}], optional 'k',
+                'filters', 'timeout', 'reuse'}
+
+        Returns:
+            dict: {'results': [...]} in request order
+        """
+        claims = body.get('claims')
+        if not isinstance(claims, list) or not claims:
+            raise BadRequest("'claims' must be a non-empty list")
+        if len(claims) > MAX_BATCH_CLAIMS:
+            raise BadRequest(f"At most {MAX_BATCH_CLAIMS} claims per batch")
+        timeout = self._parse_timeout(body)
+        reuse = self._parse_reuse(body)
+
+        results = [None] * len(claims)
+        queries = []
+        claims_with_evidence = []
+        for i, claim in enumerate(claims):
+            if not isinstance(claim, dict):
+                raise BadRequest("Each claim must be an object")
+            claim_text, k, domain = self._parse_query({'k': body.get('k', 5), **claim})
+            passage_filter = self._parse_filter({'filters': body.get('filters'), **claim})
+            processed_claim = self.data_processor.process_claim_text(claim_text)
+            scope = (self.embedding_engine.version, domain, passage_filter, k)
+            match = self.deduplicator.lookup(processed_claim, scope) if reuse else None
+            if match is not None:
+                results[i] = {'claim_id': claim.get('claim_id'), **self._reused(claim_text, match, include_text=False),
+                              'error': None}
+                continue
+            evidence = self.rag_system.retrieve_evidence(processed_claim, k=k, domain_filter=domain,
+                                                         passage_filter=passage_filter)
+            queries.append((i, claim.get('claim_id'), claim_text, processed_claim, scope, evidence))
+            claims_with_evidence.append((processed_claim, evidence))
+
+        analyses = self.claim_analyzer.analyze_claims(
+            claims_with_evidence, max_workers=self.max_workers, timeout=timeout
+        ) if claims_with_evidence else []
+
+        for (i, claim_id, claim_text, processed_claim, scope, evidence), analysis in zip(queries, analyses):
+            result = {
+                'verdict': analysis['verdict'],
+                'confidence': None if analysis['confidence'] is None else round(analysis['confidence'], 4),
+                'explanation': analysis['explanation'],
+                'evidence': [evidence_summary(passage, include_text=False) for passage in evidence]
+            }
+            results[i] = {'claim_id': claim_id, 'claim_text': claim_text, **result, 'error': analysis['error'],
+                          'reused': False}
+            if self.deduplicator is not None and analysis['error'] is None:
+                # Stored with passage texts, as /analyze returns them, and without the claim text
+                result['evidence'] = [evidence_summary(passage) for passage in evidence]
+                self.deduplicator.add(processed_claim, result, scope)
+        return {'results': results}
+
+    def health(self):
+        """
+        Report worker and index status.
+
+        Returns:
+            dict: Status, index version, passage count and process id
+        """
+        return {
+            'status': 'ok',
+            'index_version': self.embedding_engine.version,
+            'passages': len(self.embedding_engine.passages),
+            'pid': os.getpid(),
+            'circuit_breaker': self.claim_analyzer.circuit_breaker.state,
+            'dedup': None if self.deduplicator is None else self.deduplicator.stats()
+        }
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Close idle keep-alive connections so a draining worker is not held open by them
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body are written separately; without TCP_NODELAY keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+    # Endpoint label for request metrics, set by the handlers
+    _endpoint = "other"
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def _send_json(self, status, body):
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): HTTP status code
+            body (object): JSON-serializable body
+        """
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        inc('claimcheck_http_requests_total', endpoint=self._endpoint, status=str(status))
+
+    def _send_text(self, status, text, content_type="text/plain; version=0.0.4; charset=utf-8"):
+        """
+        Send a plain text response.
+
+        Args:
+            status (int): HTTP status code
+            text (str): Body
+            content_type (str): Content-Type header
+        """
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        inc('claimcheck_http_requests_total', endpoint=self._endpoint, status=str(status))
+
+    def _metrics_text(self):
+        """
+        Render the metrics of every worker in the Prometheus text format.
+
+        Returns:
+            str: Exposition text
+        """
+        metrics_dir = self.server.metrics_dir
+        if metrics_dir is None:
+            return export_prometheus(REGISTRY.snapshot())
+        # Refresh this worker's dump so the answer includes the latest requests it served
+        REGISTRY.dump(worker_dump_path(metrics_dir))
+        return export_prometheus(merge_snapshots(load_snapshots(metrics_dir)))
+
+    def do_GET(self):
+        """Handle the health check and metrics."""
+        if self.path == "/health":
+            self._endpoint = "/health"
+            self._send_json(200, self.server.service.health())
+        elif self.path == "/metrics":
+            self._endpoint = "/metrics"
+            self._send_text(200, self._metrics_text())
+        else:
+            self._endpoint = "other"
+            self._send_json(404, {'error': f"Unknown endpoint {self.path}"})
+
+    def _content_length(self):
+        """
+        Validate the Content-Length header, answering the request if it is unusable.
+
+        The body of a rejected request is not read, so the connection is closed.
+
+        Returns:
+            int: Body length in bytes, or None if an error response was sent
+        """
+        header = self.headers.get("Content-Length")
+        if header is None:
+            status, message = 411, "Content-Length header is required"
+        else:
+            try:
+                length = int(header)
+            except ValueError:
+                length = -1
+            if length < 0:
+                status, message = 400, "Content-Length must be a non-negative integer"
+            elif length > MAX_BODY_BYTES:
+                status, message = 413, f"Request body too large (limit {MAX_BODY_BYTES} bytes)"
+            else:
+                return length
+        self.close_connection = True
+        self._send_json(status, {'error': message})
+        return None
+
+    def do_POST(self):
+        """Handle /analyze, /analyze/batch and /retrieve."""
+        routes = {
+            "/analyze": self.server.service.analyze,
+            "/analyze/batch": self.server.service.analyze_batch,
+            "/retrieve": self.server.service.retrieve
+        }
+        route = routes.get(self.path)
+        self._endpoint = self.path if route is not None else "other"
+
+        length = self._content_length()
+        if length is None:
+            return
+        raw = self.rfile.read(length)
+
+        if route is None:
+            self._send_json(404, {'error': f"Unknown endpoint {self.path}"})
+            return
+
+        try:
+            body = json.loads(raw or b"{}")
+            if not isinstance(body, dict):
+                raise BadRequest("Request body must be a JSON object")
+            with span(f"http {self.path}"):
+                response = route(body)
+            self._send_json(200, response)
+        except (BadRequest, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            print(f"Warning: Request to {self.path} failed: {e}")
+            self._send_json(500, {'error': "Internal server error"})
+
+def _make_server(sock, service, metrics_dir=None):
+    """
+    Create an HTTP server on an already listening socket.
+
+    Args:
+        sock (socket.socket): Listening socket, shared between workers
+        service (ClaimCheckService): Pipeline answering requests
+        metrics_dir (str, optional): Directory of per-worker metrics dumps merged by /metrics
+
+    Returns:
+        ThreadingHTTPServer: Server ready for serve_forever
+    """
+    server = ThreadingHTTPServer(sock.getsockname()[:2], APIRequestHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.daemon_threads = False
+    server.service = service
+    server.metrics_dir = metrics_dir
+    return server
+
+def _dump_metrics_periodically(path, stop_event):
+    """
+    Write this process's metrics to a file until stop_event is set.
+
+    Args:
+        path (str): Dump file for this worker
+        stop_event (threading.Event): Set when the worker shuts down
+    """
+    while not stop_event.wait(METRICS_DUMP_INTERVAL):
+        try:
+            REGISTRY.dump(path)
+        except OSError as e:
+            print(f"Warning: Could not write metrics to {path}: {e}")
+
+def _run_worker(sock, engine, service_options, metrics_dir=None):
+    """
+    Serve requests in a forked worker until told to stop.
+
+    SIGTERM stops accepting new connections and lets in-flight requests
+    finish before the worker exits.
+
+    Args:
+        sock (socket.socket): Listening socket inherited from the master
+        engine (EmbeddingEngine): Index inherited from the master
+        service_options (dict): Keyword arguments for ClaimCheckService
+        metrics_dir (str, optional): Directory to dump this worker's metrics into
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    # Counts inherited from the master belong to the master, not this worker
+    REGISTRY.reset()
+    service = ClaimCheckService(engine, **service_options)
+    server = _make_server(sock, service, metrics_dir)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+
+    dump_path = None
+    stop_dumping = threading.Event()
+    if metrics_dir is not None and REGISTRY.enabled:
+        dump_path = worker_dump_path(metrics_dir)
+        threading.Thread(target=_dump_metrics_periodically, args=(dump_path, stop_dumping), daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        # Waits for request threads to finish
+        server.server_close()
+        service.claim_analyzer.close()
+        stop_dumping.set()
+        if dump_path is not None:
+            REGISTRY.dump(dump_path)
+
+class APIServer:
+    def __init__(self, host="127.0.0.1", port=8000, workers=4, index_path=DEFAULT_INDEX_PATH,
+                 poll_interval=2.0, metrics_dir=None, **service_options):
+        """
+        Initialize a pre-forked claim checking server.
+
+        The master process loads the index once and forks workers that
+        share it copy-on-write and accept connections on one listening
+        socket. When the index file is replaced (see EmbeddingEngine.save),
+        the master loads the new version, starts a fresh set of workers and
+        drains the old ones, so no request is dropped.
+
+        Each worker periodically dumps its metrics into metrics_dir, and
+        /metrics on any worker answers with the sum over all dumps, so
+        counts survive worker restarts and reloads.
+
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind, 0 for any free port
+            workers (int): Worker processes; 0 serves from the master process without forking
+            index_path (str): Index file to serve and watch for new versions
+            poll_interval (float): Seconds between checks for a new index version
+            metrics_dir (str, optional): Directory for per-worker metrics dumps, a temporary one if None
+            **service_options: Keyword arguments for ClaimCheckService
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.index_path = index_path
+        self.poll_interval = poll_interval
+        self.service_options = service_options
+        self.metrics_dir = metrics_dir
+
+        self.socket = None
+        self.engine = None
+        self.loaded_version = None
+        self.worker_pids = set()
+        self._stopping = False
+        self._reload_requested = False
+        self._owns_metrics_dir = False
+
+    def _load_index(self):
+        """Load the index in the master so workers inherit it."""
+        self.engine = load_or_build_index(self.index_path)
+        self.loaded_version = index_version(self.index_path)
+        # Keep the index out of the collector's bookkeeping so forked pages stay shared
+        gc.collect()
+        gc.freeze()
+
+    def _spawn_worker(self):
+        """
+        Fork one worker process.
+
+        Returns:
+            int: Worker process id
+        """
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.socket, self.engine, self.service_options, self.metrics_dir)
+            except BaseException as e:
+                print(f"Warning: Worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    def _spawn_workers(self):
+        """Start a full set of workers on the current index."""
+        for _ in range(self.workers):
+            self.worker_pids.add(self._spawn_worker())
+
+    def _stop_workers(self, pids):
+        """
+        Ask workers to finish in-flight requests and exit.
+
+        Args:
+            pids (iterable): Worker process ids
+        """
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap_workers(self):
+        """Collect exited workers, replacing any that died unexpectedly."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.worker_pids:
+                self.worker_pids.discard(pid)
+                if not self._stopping:
+                    print(f"Warning: Worker {pid} exited unexpectedly, restarting it")
+                    self.worker_pids.add(self._spawn_worker())
+
+    def reload(self):
+        """
+        Load the current index file and replace the workers with ones serving it.
+
+        If the new index cannot be loaded, the old workers keep serving.
+        """
+        version = index_version(self.index_path)
+        try:
+            gc.unfreeze()
+            engine = EmbeddingEngine.load(self.index_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not load new index version from {self.index_path}: {e}")
+            gc.freeze()
+            self.loaded_version = version
+            return
+
+        old_pids = set(self.worker_pids)
+        self.engine = engine
+        self.loaded_version = version
+        gc.collect()
+        gc.freeze()
+
+        self.worker_pids = set()
+        self._spawn_workers()
+        self._stop_workers(old_pids)
+        print(f"Reloaded index version {engine.version}")
+
+    def start(self):
+        """
+        Bind the listening socket and load the index.
+
+        Returns:
+            tuple: (host, port) actually bound
+        """
+        self.socket = socket.create_server((self.host, self.port), backlog=512)
+        # Workers race to accept; a loser must not block in accept()
+        self.socket.setblocking(False)
+        if self.workers > 0 and self.metrics_dir is None:
+            self.metrics_dir = tempfile.mkdtemp(prefix="claimcheck-metrics-")
+            self._owns_metrics_dir = True
+        self._load_index()
+        return self.socket.getsockname()[:2]
+
+    def serve_forever(self):
+        """Run the master loop: supervise workers and watch for new index versions."""
+        if self.socket is None:
+            self.start()
+
+        if self.workers <= 0 or not hasattr(os, "fork"):
+            service = ClaimCheckService(self.engine, **self.service_options)
+            server = _make_server(self.socket, service)
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
+                service.claim_analyzer.close()
+            return
+
+        def request_stop(signum, frame):
+            self._stopping = True
+
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_reload)
+
+        self._spawn_workers()
+        try:
+            while not self._stopping:
+                time.sleep(self.poll_interval)
+                self._reap_workers()
+                if self._stopping:
+                    break
+                if self._reload_requested or index_version(self.index_path) != self.loaded_version:
+                    self._reload_requested = False
+                    self.reload()
+        finally:
+            self._stopping = True
+            self._stop_workers(self.worker_pids)
+            for pid in list(self.worker_pids):
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            self.worker_pids.clear()
+            self.socket.close()
+            if self._owns_metrics_dir:
+                shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+def main():
+    """Run the claim checking API server from the command line."""
+    parser = argparse.ArgumentParser(description="HTTP API for Pakhand Bhedi claim analysis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, 0 to serve from a single process")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file, built from sample data if missing")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between index version checks")
+    parser.add_argument("--use-llm", action="store_true", help="Generate explanations with the LLM backend")
+    parser.add_argument("--tiered", action="store_true", help="Skip the LLM for confident verdicts")
+    parser.add_argument("--timeout", type=float, default=None, help="Default seconds allowed per explanation")
+    parser.add_argument("--llm-cache", default=None, help="SQLite file caching LLM responses (default: LLM_CACHE_PATH)")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="Reuse the result of an earlier claim with at least this keyword similarity (0-1)")
+    args = parser.parse_args()
+
+    server = APIServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        index_path=args.index,
+        poll_interval=args.poll_interval,
+        analyzer_options={'use_llm': args.use_llm, 'tiered': args.tiered},
+        timeout=args.timeout,
+        dedup_threshold=args.dedup_threshold,
+        llm_cache_path=args.llm_cache
+    )
+    host, port = server.start()
+    print(f"Claim API listening on http://{host}:{port}/ with {args.workers} workers")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
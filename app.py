@@ -2,12 +2,19 @@ import streamlit as st
 import os
 import time
 import io
+from datetime import timedelta
 
 from data_processor import DataProcessor
-from embedding_engine import EmbeddingEngine
 from rag_system import RAGSystem
 from claim_analyzer import ClaimAnalyzer
-from sample_data_generator import generate_sample_data
+from claim_dedup import ClaimDeduplicator
+from index_store import DEFAULT_INDEX_PATH, BackgroundIndexBuilder, load_or_build_index
+from history_store import ClaimHistoryStore
+from llm_cache import open_cache
+from metadata_store import EPOCH, PassageFilter
+from metrics import REGISTRY, stage_summary
+
+HISTORY_PAGE_SIZE = 10
 
 # Set page config
 st.set_page_config(
@@ -18,15 +25,17 @@ st.set_page_config(
 
 # Initialize session state for persistence across reruns
 if 'initialized' not in st.session_state:
-    st.session_state.initialized = False
-    st.session_state.data_loaded = False
-    st.session_state.embeddings_created = False
-    st.session_state.claim_history = []
+    st.session_state.initialized = True
+    # Set CLAIM_HISTORY_DB to keep older history entries in SQLite instead of dropping them.
+    # The store deletes its rows when Streamlit drops the ended session's state.
+    st.session_state.claim_history = ClaimHistoryStore(max_entries=50, spill_path=os.getenv("CLAIM_HISTORY_DB"))
+    st.session_state.history_page = 0
     st.session_state.current_verdict = None
     st.session_state.current_evidence = None
     st.session_state.current_claim = None
     st.session_state.current_explanation = None
     st.session_state.current_confidence = None
+    st.session_state.current_reused_similarity = None
     st.session_state.domain_filter = "All"
     # LLM settings
     st.session_state.use_llm = True
@@ -34,134 +43,209 @@ if 'initialized' not in st.session_state:
     st.session_state.selected_model = "google/flan-t5-large"  # Smaller model that works with free tier
     st.session_state.temperature = 0.7
     st.session_state.max_length = 500
+    st.session_state.reuse_similar = True
+    st.session_state.dedup_threshold = 0.8
 
-# Initialize our system components
+# Shared by every session in this server process; does not depend on session settings
 @st.cache_resource
-def initialize_system():
-    # Generate sample data first
-    claims_data, myths_data = generate_sample_data()
+def load_index():
+    """
+    Load the search index from disk, or build and save it, once per server process.
     
-    # Initialize all components
-    data_processor = DataProcessor()
-    embedding_engine = EmbeddingEngine()
-    rag_system = RAGSystem(embedding_engine)
+    Returns:
+        dict: Shared data processor, embedding engine and RAG system
+    """
+    embedding_engine = load_or_build_index(DEFAULT_INDEX_PATH)
+    return {
+        'data_processor': DataProcessor(),
+        'embedding_engine': embedding_engine,
+        'rag_system': RAGSystem(embedding_engine)
+    }
+
+# Set LLM_CACHE_PATH to keep LLM responses in SQLite across sessions and restarts
+@st.cache_resource
+def get_llm_cache():
+    """
+    Open the process-wide LLM response cache.
     
-    # Initialize claim analyzer with LLM settings
-    claim_analyzer = ClaimAnalyzer(use_llm=st.session_state.use_llm)
+    Returns:
+        LLMResponseCache: The cache, or None when LLM_CACHE_PATH is not set
+    """
+    return open_cache()
+
+# One analyzer per distinct LLM configuration, shared by sessions that use it
+@st.cache_resource(max_entries=16)
+def get_claim_analyzer(use_llm, model_id, api_key):
+    """
+    Create a claim analyzer for the given LLM settings, annotated against the shared index.
     
-    # If using LLM, update the settings
-    if st.session_state.use_llm and hasattr(claim_analyzer, 'llm_service'):
-        # Update the model and settings if LLM service is available
-        claim_analyzer.llm_service.model_id = st.session_state.selected_model
-        # The API URL needs to be updated with the new model_id
-        claim_analyzer.llm_service.api_url = f"https://api-inference.huggingface.co/models/{st.session_state.selected_model}"
-        # Update API key in the headers
-        claim_analyzer.llm_service.headers = {
-            "Authorization": f"Bearer {st.session_state.hf_api_key}",
-            "Content-Type": "application/json"
+    Args:
+        use_llm (bool): Whether to use the LLM for explanations
+        model_id (str): LLM model identifier
+        api_key (str): Hugging Face API key
+        
+    Returns:
+        ClaimAnalyzer: Analyzer ready for claims
+    """
+    claim_analyzer = ClaimAnalyzer(
+        use_llm=use_llm,
+        llm_config={
+            'model_id': model_id,
+            'api_key': api_key,
+            'cache': get_llm_cache()
         }
+    )
+    embedding_engine = load_index()['embedding_engine']
+    claim_analyzer.index_passages(embedding_engine.passages, embedding_engine.snapshot.annotations)
+    # Re-annotate in the builder thread before a rebuilt index goes live
+    embedding_engine.add_swap_listener(claim_analyzer.index_passages)
+    return claim_analyzer
+
+# Shared by every session, so one user's analysis answers another's repeat of the claim.
+# A reused answer shows only the similarity, never the text another user typed.
+@st.cache_resource(max_entries=4)
+def get_claim_deduplicator(threshold):
+    """
+    Create the process-wide index of analyzed claims for a similarity threshold.
     
-    return {
-        'data_processor': data_processor,
-        'embedding_engine': embedding_engine,
-        'rag_system': rag_system,
-        'claim_analyzer': claim_analyzer,
-        'claims_data': claims_data,
-        'myths_data': myths_data
-    }
+    Args:
+        threshold (float): Lowest keyword similarity at which a result is reused
+        
+    Returns:
+        ClaimDeduplicator: Near-duplicate index
+    """
+    return ClaimDeduplicator(threshold=threshold)
+
+@st.cache_resource
+def get_index_builder():
+    """
+    Create the process-wide background index builder.
+    
+    Returns:
+        BackgroundIndexBuilder: Builder that swaps rebuilt indexes into the shared engine
+    """
+    return BackgroundIndexBuilder(load_index()['embedding_engine'], save_path=DEFAULT_INDEX_PATH)
+
+def index_status(embedding_engine, index_builder, refreshing):
+    """
+    Show the index status, rebuild progress and the rebuild button.
+    
+    Args:
+        embedding_engine (EmbeddingEngine): The shared engine
+        index_builder (BackgroundIndexBuilder): The shared builder
+        refreshing (bool): Whether this fragment was started to follow a running build
+    """
+    progress = index_builder.progress
+    if index_builder.is_running():
+        fraction = progress['done'] / progress['total'] if progress['total'] else 0.0
+        st.progress(fraction, text=f"Rebuilding index: {progress['state']} ({progress['done']}/{progress['total']})")
+        return
+    
+    if refreshing:
+        # The build finished; rerun the whole app so it stops polling and uses the new index
+        st.rerun()
+    
+    st.success(f"✅ Evidence index ready ({len(embedding_engine.passages)} passages)")
+    if progress['state'] == 'failed':
+        st.error(f"Index rebuild failed: {progress['error']}")
+    if st.button("Rebuild Index", help="Rebuild the evidence index in the background; claims keep working meanwhile"):
+        index_builder.start()
+        st.rerun()
 
 # Main application function
 def main():
     st.title("Pakhand Bhedi - Paranormal Debunking AI 🔍")
     st.subheader("Using evidence-based reasoning to analyze paranormal claims")
     
-    # Initialize the system if not already done
-    if not st.session_state.initialized:
-        with st.spinner("Initializing the system..."):
-            system = initialize_system()
-            st.session_state.system = system
-            st.session_state.initialized = True
-    
-    # Get system components
-    system = st.session_state.system
+    # Get the shared system components; only the first session in a process waits for them
+    with st.spinner("Loading the evidence index..."):
+        system = load_index()
+        claim_analyzer = get_claim_analyzer(
+            st.session_state.use_llm, st.session_state.selected_model, st.session_state.hf_api_key
+        )
     data_processor = system['data_processor']
     embedding_engine = system['embedding_engine']
     rag_system = system['rag_system']
-    claim_analyzer = system['claim_analyzer']
-    claims_data = system['claims_data']
-    myths_data = system['myths_data']
     
-    # Data processing and embedding section
+    # System status, filters and history
     with st.sidebar:
         st.header("System Status")
         
-        # Process data if not already done
-        if not st.session_state.data_loaded:
-            if st.button("Load & Process Data"):
-                with st.spinner("Processing data..."):
-                    processed_claims = data_processor.process_claims(claims_data)
-                    processed_myths = data_processor.process_texts(myths_data)
-                    st.session_state.processed_data = {
-                        'claims': processed_claims,
-                        'myths': processed_myths
-                    }
-                    st.session_state.data_loaded = True
-                    st.success("Data processed successfully!")
-        else:
-            st.success("✅ Data loaded and processed")
+        index_builder = get_index_builder()
+        refreshing = index_builder.is_running()
+        st.fragment(index_status, run_every=1.0 if refreshing else None)(embedding_engine, index_builder, refreshing)
         
-        # Create embeddings if data is loaded but embeddings aren't created
-        if st.session_state.data_loaded and not st.session_state.embeddings_created:
-            if st.button("Create Embeddings"):
-                with st.spinner("Creating embeddings and indexing..."):
-                    processed_data = st.session_state.processed_data
-                    embedding_engine.create_embeddings(processed_data['myths'])
-                    st.session_state.embeddings_created = True
-                    st.success("Embeddings created and indexed successfully!")
-        elif st.session_state.embeddings_created:
-            st.success("✅ Embeddings created and indexed")
-            
         # Domain filter
         st.header("Filters")
         domain_options = ["All", "Ghost Myths", "UFO Encounters", "Astrology", "Supernatural Powers"]
         st.session_state.domain_filter = st.selectbox("Domain Filter", domain_options)
         
+        # Source and date filters are applied to the index metadata before scoring
+        metadata = embedding_engine.snapshot.metadata
+        sources = st.multiselect("Sources", sorted(metadata.sources), help="Only use evidence from these sources; leave empty for all")
+        date_range = ()
+        if metadata.first_day is not None:
+            date_range = st.date_input(
+                "Published Between",
+                value=(),
+                min_value=EPOCH + timedelta(days=metadata.first_day),
+                max_value=EPOCH + timedelta(days=metadata.last_day),
+                help="Only use evidence published in this period; leave empty for any date"
+            )
+        passage_filter = PassageFilter(
+            sources=sources or None,
+            date_from=date_range[0] if len(date_range) > 0 else None,
+            date_to=date_range[1] if len(date_range) > 1 else None
+        )
+        st.session_state.passage_filter = None if passage_filter.is_empty() else passage_filter
+        
         # History of claims
         st.header("Claim History")
-        if st.session_state.claim_history:
-            for idx, claim_info in enumerate(st.session_state.claim_history):
-                if st.button(f"{claim_info['claim'][:30]}... ({claim_info['verdict']})", key=f"history_{idx}"):
+        claim_history = st.session_state.claim_history
+        if len(claim_history):
+            page_count = claim_history.page_count(HISTORY_PAGE_SIZE)
+            st.session_state.history_page = min(st.session_state.history_page, page_count - 1)
+            for claim_info in claim_history.page(st.session_state.history_page, HISTORY_PAGE_SIZE):
+                if st.button(f"{claim_info['claim'][:30]}... ({claim_info['verdict']})", key=f"history_{claim_info['id']}"):
                     st.session_state.current_claim = claim_info['claim']
                     st.session_state.current_verdict = claim_info['verdict']
-                    st.session_state.current_evidence = claim_info['evidence']
+                    st.session_state.current_evidence = claim_history.resolve_evidence(claim_info, embedding_engine)
                     st.session_state.current_explanation = claim_info['explanation']
                     st.session_state.current_confidence = claim_info['confidence']
+                    st.session_state.current_reused_similarity = None
                     st.rerun()
+            
+            if page_count > 1:
+                newer_col, older_col = st.columns(2)
+                with newer_col:
+                    if st.button("Newer", disabled=st.session_state.history_page == 0):
+                        st.session_state.history_page -= 1
+                        st.rerun()
+                with older_col:
+                    if st.button("Older", disabled=st.session_state.history_page >= page_count - 1):
+                        st.session_state.history_page += 1
+                        st.rerun()
+                st.caption(f"Page {st.session_state.history_page + 1} of {page_count}")
         else:
             st.write("No claims analyzed yet.")
     
     # Main content area
-    main_tabs = st.tabs(["Submit Claim", "About Pakhand Bhedi", "Settings"])
+    main_tabs = st.tabs(["Submit Claim", "About Pakhand Bhedi", "Settings", "Diagnostics"])
     
     with main_tabs[0]:
         st.header("Submit a Paranormal Claim for Analysis")
         
-        # Check if system is ready for claim analysis
-        system_ready = st.session_state.data_loaded and st.session_state.embeddings_created
-        
-        if not system_ready:
-            st.warning("Please load data and create embeddings before submitting claims.")
-        
         claim_input = st.text_area("Enter your paranormal claim:", 
-                                   placeholder="Example: I saw a ghost that walked through walls last night at the old mansion.",
-                                   disabled=not system_ready)
+                                   placeholder="Example: I saw a ghost that walked through walls last night at the old mansion.")
         
         col1, col2 = st.columns([1, 5])
         with col1:
-            analyze_button = st.button("Analyze Claim", disabled=not system_ready or not claim_input)
+            analyze_button = st.button("Analyze Claim", disabled=not claim_input)
         
         # Analyze button functionality
-        if analyze_button and claim_input and system_ready:
+        explanation_stream = None
+        reused = False
+        if analyze_button and claim_input:
             with st.spinner("Analyzing your claim..."):
                 # Process the claim
                 processed_claim = data_processor.process_claim_text(claim_input)
@@ -169,28 +253,44 @@ def main():
                 # Filter by domain if needed
                 domain_filter = None if st.session_state.domain_filter == "All" else st.session_state.domain_filter
                 
-                # Get evidence through RAG
-                evidence_passages = rag_system.retrieve_evidence(processed_claim, k=5, domain_filter=domain_filter)
-                
-                # Analyze the claim against evidence
-                verdict, explanation, confidence = claim_analyzer.analyze_claim(processed_claim, evidence_passages)
+                # A result is only reused for the same index, filter and explanation settings
+                deduplicator = get_claim_deduplicator(st.session_state.dedup_threshold)
+                dedup_scope = (embedding_engine.version, domain_filter, st.session_state.passage_filter,
+                               st.session_state.use_llm, st.session_state.selected_model)
+                match = deduplicator.lookup(processed_claim, dedup_scope) if st.session_state.reuse_similar else None
                 
-                # Store results in session state
-                st.session_state.current_claim = claim_input
-                st.session_state.current_verdict = verdict
-                st.session_state.current_evidence = evidence_passages
-                st.session_state.current_explanation = explanation
-                st.session_state.current_confidence = confidence
-                
-                # Add to history
-                claim_info = {
-                    'claim': claim_input,
-                    'verdict': verdict,
-                    'evidence': evidence_passages,
-                    'explanation': explanation,
-                    'confidence': confidence
-                }
-                st.session_state.claim_history.append(claim_info)
+                if match is not None:
+                    # Answer from the earlier analysis, skipping retrieval and the LLM
+                    reused = True
+                    st.session_state.current_claim = claim_input
+                    st.session_state.current_verdict = match['result']['verdict']
+                    st.session_state.current_evidence = match['result']['evidence']
+                    st.session_state.current_explanation = match['result']['explanation']
+                    st.session_state.current_confidence = match['result']['confidence']
+                    st.session_state.current_reused_similarity = match['similarity']
+                else:
+                    # Get evidence through RAG
+                    evidence_passages = rag_system.retrieve_evidence(processed_claim, k=5, domain_filter=domain_filter,
+                                                                     passage_filter=st.session_state.passage_filter)
+                    
+                    # Analyze the claim against evidence
+                    if evidence_passages:
+                        # Compute the verdict now and stream the explanation while rendering
+                        verdict, confidence, facts = claim_analyzer.assess_claim(evidence_passages)
+                        explanation = None
+                        explanation_stream = claim_analyzer.stream_explanation(
+                            processed_claim, verdict, facts, evidence_passages, confidence
+                        )
+                    else:
+                        verdict, explanation, confidence = claim_analyzer.analyze_claim(processed_claim, evidence_passages)
+                    
+                    # Store results in session state
+                    st.session_state.current_claim = claim_input
+                    st.session_state.current_verdict = verdict
+                    st.session_state.current_evidence = evidence_passages
+                    st.session_state.current_explanation = explanation
+                    st.session_state.current_confidence = confidence
+                    st.session_state.current_reused_similarity = None
         
         # Display results if available
         if st.session_state.current_verdict:
@@ -200,6 +300,9 @@ def main():
             # Display claim
             st.subheader("Claim:")
             st.write(st.session_state.current_claim)
+            if st.session_state.current_reused_similarity:
+                similarity = st.session_state.current_reused_similarity
+                st.info(f"♻️ Reused the analysis of an earlier, similar claim ({similarity:.0%} keyword overlap)")
             
             # Display verdict with appropriate color
             verdict = st.session_state.current_verdict
@@ -210,9 +313,30 @@ def main():
             else:  # "Requires Further Research"
                 st.markdown(f"<h3 style='color: blue;'>Verdict: {verdict}</h3>", unsafe_allow_html=True)
             
-            # Display explanation
+            # Display explanation, streaming it in if it is still being generated
             st.subheader("Explanation:")
-            st.write(st.session_state.current_explanation)
+            if explanation_stream is not None:
+                st.session_state.current_explanation = st.write_stream(explanation_stream)
+            else:
+                st.write(st.session_state.current_explanation)
+            
+            # Add to history once the explanation is complete
+            if analyze_button and claim_input:
+                st.session_state.claim_history.add(
+                    claim_input,
+                    st.session_state.current_verdict,
+                    st.session_state.current_confidence,
+                    st.session_state.current_explanation,
+                    st.session_state.current_evidence
+                )
+                st.session_state.history_page = 0
+                if not reused:
+                    deduplicator.add(processed_claim, {
+                        'verdict': st.session_state.current_verdict,
+                        'confidence': st.session_state.current_confidence,
+                        'explanation': st.session_state.current_explanation,
+                        'evidence': st.session_state.current_evidence
+                    }, dedup_scope)
             
             # Display confidence
             st.subheader("Confidence Level:")
@@ -271,8 +395,7 @@ def main():
         use_llm = st.checkbox("Use LLM for Explanations", value=st.session_state.use_llm)
         if use_llm != st.session_state.use_llm:
             st.session_state.use_llm = use_llm
-            # Reset the system to apply the change
-            st.session_state.initialized = False
+            # Rerun so the analyzer for the new settings is picked up
             st.rerun()
         
         # API Key input
@@ -287,8 +410,7 @@ def main():
             st.session_state.hf_api_key = api_key
             # Set environment variable
             os.environ["HUGGINGFACE_API_KEY"] = api_key
-            # Reset the system to apply the change
-            st.session_state.initialized = False
+            # Rerun so the analyzer for the new settings is picked up
             st.rerun()
             
         # Model selection
@@ -307,10 +429,31 @@ def main():
         
         if selected_model != st.session_state.selected_model:
             st.session_state.selected_model = selected_model
-            # Reset the system to apply the change
-            st.session_state.initialized = False
+            # Rerun so the analyzer for the new settings is picked up
             st.rerun()
         
+        # Near-duplicate reuse
+        st.subheader("Repeated Claims")
+        reuse_similar = st.checkbox(
+            "Reuse results for near-duplicate claims",
+            value=st.session_state.reuse_similar,
+            help="Answer a claim with the verdict, evidence and explanation of an earlier claim with nearly the same keywords, skipping retrieval and the LLM."
+        )
+        if reuse_similar != st.session_state.reuse_similar:
+            st.session_state.reuse_similar = reuse_similar
+        
+        dedup_threshold = st.slider(
+            "Similarity Threshold",
+            min_value=0.5,
+            max_value=1.0,
+            value=st.session_state.dedup_threshold,
+            step=0.05,
+            disabled=not st.session_state.reuse_similar,
+            help="Share of keywords two claims must have in common for a result to be reused. Lower values reuse more but risk answering a different claim."
+        )
+        if dedup_threshold != st.session_state.dedup_threshold:
+            st.session_state.dedup_threshold = dedup_threshold
+        
         # Other settings
         st.subheader("Advanced Settings")
         
@@ -345,7 +488,32 @@ def main():
                 # No need to reset system here as this can be applied dynamically
             
         st.markdown("---")
-        st.info("Changes to settings will take effect after the system resets. If you've entered an API key, you may need to reload data and recreate embeddings in the sidebar.")
+        st.info("Changes to settings take effect immediately. The evidence index is shared and never needs rebuilding.")
+
+    with main_tabs[3]:
+        st.header("Diagnostics")
+
+        if not REGISTRY.enabled:
+            st.write("Metrics are disabled (CLAIMCHECK_METRICS=0).")
+        else:
+            st.markdown("Latency of each pipeline stage in this server process, across all sessions.")
+            snapshot = REGISTRY.snapshot()
+
+            rows = stage_summary(snapshot)
+            if rows:
+                st.table(rows)
+            else:
+                st.write("No claims analyzed yet.")
+
+            if snapshot['counters']:
+                st.subheader("Counters")
+                for name, labels, value in sorted(snapshot['counters']):
+                    label_text = ", ".join(f"{key}={val}" for key, val in labels)
+                    st.write(f"{name}{' (' + label_text + ')' if label_text else ''}: {value:g}")
+
+            if st.button("Reset Metrics"):
+                REGISTRY.reset()
+                st.rerun()
 
 if __name__ == "__main__":
     main()
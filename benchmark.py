@@ -0,0 +1,274 @@
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from corpus_generator import CorpusGenerator
+from data_processor import DataProcessor
+from embedding_engine import EmbeddingEngine, build_snapshot
+from claim_analyzer import ClaimAnalyzer
+
+DEFAULT_SIZES = (1000, 10000)
+
+def latency_summary(samples, elapsed=None):
+    """
+    Summarize latency samples.
+
+    Args:
+        samples (list): Latencies in seconds
+        elapsed (float, optional): Wall time for all samples, defaults to their sum
+
+    Returns:
+        dict: count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms and qps
+    """
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    elapsed = sum(ordered) if elapsed is None else elapsed
+
+    def percentile(q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 3)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'qps': round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+def _git_commit():
+    """
+    Current commit of the working tree, for labelling results.
+
+    Returns:
+        str: Short commit hash, or None outside a git checkout
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def _timed(fn, *args, **kwargs):
+    """
+    Call a function and time it.
+
+    Args:
+        fn (callable): Function to call
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        tuple: (result, seconds)
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def benchmark_size(num_documents, num_queries=200, seed=0, k=5, measure_memory=True):
+    """
+    Benchmark indexing and querying a synthetic corpus of one size.
+
+    Queries run through each pipeline stage in turn: claim cleaning and
+    keyword extraction, search, key fact extraction and the full rule-based
+    analysis, and every stage is timed separately. Search is also timed
+    restricted to the claim's domain, which filters before scoring.
+
+    Args:
+        num_documents (int): Articles in the corpus, one passage each
+        num_queries (int): Claims to run
+        seed (int): Corpus seed
+        k (int): Passages retrieved per claim
+        measure_memory (bool): Rebuild the index under tracemalloc to measure its size
+
+    Returns:
+        dict: Timings, memory and per-stage latency summaries for this size
+    """
+    generator = CorpusGenerator(seed=seed)
+    documents, generate_seconds = _timed(generator.generate_documents, num_documents)
+    claims = generator.generate_queries(documents, num_queries)
+
+    data_processor = DataProcessor()
+    passages, process_seconds = _timed(data_processor.process_texts, documents)
+    del documents
+
+    snapshot, build_seconds = _timed(build_snapshot, passages)
+    engine = EmbeddingEngine()
+    engine.swap(snapshot)
+
+    analyzer = ClaimAnalyzer(use_llm=False)
+    _, annotate_seconds = _timed(analyzer.index_passages, engine.passages)
+
+    result = {
+        'documents': num_documents,
+        'passages': len(passages),
+        'distinct_keywords': len({word for keywords in snapshot.keywords.values() for word in keywords}),
+        'generate_seconds': round(generate_seconds, 3),
+        'process_seconds': round(process_seconds, 3),
+        'build_seconds': round(build_seconds, 3),
+        'annotate_seconds': round(annotate_seconds, 3)
+    }
+
+    if measure_memory:
+        # Tracing slows allocation down, so measure on a separate build
+        tracemalloc.start()
+        traced = build_snapshot(passages)
+        result['index_bytes'], result['build_peak_bytes'] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del traced
+
+    stages = {'process_claim': [], 'search': [], 'search_domain': [], 'extract_key_facts': [], 'analyze_claim': [],
+              'end_to_end': []}
+    start = time.perf_counter()
+    for claim in claims:
+        t0 = time.perf_counter()
+        query = engine.get_embedding(data_processor.process_claim_text(claim['claim_text']))
+        t1 = time.perf_counter()
+        evidence = engine.search(query, k=k)
+        t2 = time.perf_counter()
+        analyzer.extract_key_facts(evidence)
+        t3 = time.perf_counter()
+        analyzer.analyze_claim(claim['claim_text'], evidence)
+        t4 = time.perf_counter()
+        stages['process_claim'].append(t1 - t0)
+        stages['search'].append(t2 - t1)
+        stages['extract_key_facts'].append(t3 - t2)
+        stages['analyze_claim'].append(t4 - t3)
+        # extract_key_facts also runs inside analyze_claim, so count it once
+        stages['end_to_end'].append(t2 - t0 + t4 - t3)
+        _, seconds = _timed(engine.search, query, k=k, domain_filter=claim['domain'])
+        stages['search_domain'].append(seconds)
+    elapsed = time.perf_counter() - start
+
+    result['stages'] = {name: latency_summary(samples) for name, samples in stages.items()}
+    result['query_seconds'] = round(elapsed, 3)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+    return result
+
+def run_benchmark(sizes=DEFAULT_SIZES, num_queries=200, seed=0, k=5, measure_memory=True):
+    """
+    Benchmark each corpus size and collect the results with run metadata.
+
+    Args:
+        sizes (iterable): Corpus sizes in articles
+        num_queries (int): Claims per size
+        seed (int): Corpus seed
+        k (int): Passages retrieved per claim
+        measure_memory (bool): Measure index memory with tracemalloc
+
+    Returns:
+        dict: {'meta': {...}, 'results': [...]} ready to save as JSON
+    """
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size} articles...", flush=True)
+        results.append(benchmark_size(size, num_queries=num_queries, seed=seed, k=k, measure_memory=measure_memory))
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'queries': num_queries,
+            'k': k
+        },
+        'results': results
+    }
+
+def compare_results(baseline, current, tolerance=0.2):
+    """
+    Find measurements that got worse than a baseline run.
+
+    Build times, index memory and stage p50/p99 latencies are compared for
+    every corpus size present in both runs.
+
+    Args:
+        baseline (dict): Earlier output of run_benchmark
+        current (dict): New output of run_benchmark
+        tolerance (float): Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        list: Human-readable descriptions of each regression
+    """
+    regressions = []
+    baseline_by_size = {result['documents']: result for result in baseline['results']}
+
+    def check(label, old, new):
+        if old and new is not None and new > old * (1 + tolerance):
+            regressions.append(f"{label}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+
+    for result in current['results']:
+        old = baseline_by_size.get(result['documents'])
+        if old is None:
+            continue
+        size = result['documents']
+        for key in ('process_seconds', 'build_seconds', 'annotate_seconds', 'index_bytes'):
+            check(f"{size} {key}", old.get(key), result.get(key))
+        for stage, summary in result['stages'].items():
+            old_summary = old['stages'].get(stage, {})
+            for key in ('p50_ms', 'p99_ms'):
+                check(f"{size} {stage} {key}", old_summary.get(key), summary.get(key))
+    return regressions
+
+def _print_results(report):
+    """
+    Print a benchmark report as a table.
+
+    Args:
+        report (dict): Output of run_benchmark
+    """
+    for result in report['results']:
+        memory = f", index {result['index_bytes'] / 2**20:.1f} MiB" if 'index_bytes' in result else ""
+        print(f"{result['passages']} passages: build {result['build_seconds']:.2f}s, "
+              f"process {result['process_seconds']:.2f}s, annotate {result['annotate_seconds']:.2f}s{memory}")
+        for stage, summary in result['stages'].items():
+            print(f"  {stage:<18} p50 {summary['p50_ms']:>9.3f} ms  p99 {summary['p99_ms']:>9.3f} ms  "
+                  f"{summary['qps']:>10.1f} qps")
+
+def main(argv=None):
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark indexing and claim analysis on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Corpus sizes in articles")
+    parser.add_argument("--queries", type=int, default=200, help="Claims per corpus size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-k", type=int, default=5, help="Passages retrieved per claim")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc index size measurement")
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown when comparing")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, num_queries=args.queries, seed=args.seed, k=args.k,
+                           measure_memory=not args.no_memory)
+    _print_results(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, tolerance=args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare} (commit {baseline['meta'].get('commit')}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
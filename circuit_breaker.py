@@ -0,0 +1,92 @@
+import threading
+import time
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0, half_open_max_calls=1):
+        """
+        Initialize a circuit breaker.
+
+        After failure_threshold consecutive failures the circuit opens and
+        calls are rejected. Once recovery_timeout has passed it goes
+        half-open and lets a limited number of trial calls through. A
+        successful trial closes the circuit again; a failed one reopens it.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            recovery_timeout (float): Seconds to stay open before allowing a trial call
+            half_open_max_calls (int): Concurrent trial calls allowed while half-open
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+
+    @property
+    def state(self):
+        """
+        Current state, moving from open to half-open once the recovery timeout passes.
+
+        Returns:
+            str: 'closed', 'open' or 'half_open'
+        """
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def _update_state(self, now):
+        """
+        Move an open circuit to half-open when its recovery timeout has passed.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_calls = 0
+
+    def allow_request(self):
+        """
+        Decide whether a call may go ahead.
+
+        Returns:
+            bool: True if the call should be attempted
+        """
+        with self._lock:
+            self._update_state(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            return False
+
+    def record_success(self):
+        """Record a successful call and close the circuit."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_calls = 0
+
+    def release(self):
+        """Give back a trial slot for a call abandoned before its outcome was known."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._trial_calls > 0:
+                self._trial_calls -= 1
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the threshold is reached or a trial failed."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_calls = 0
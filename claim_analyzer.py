@@ -1,18 +1,45 @@
 import re
-from collections import Counter
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from llm_service import LLMService
+from llm_backends import DeadlineExceeded
+from keyword_matcher import KeywordMatcher
+from circuit_breaker import CircuitBreaker
+from metrics import inc, span
 
 class ClaimAnalyzer:
-    def __init__(self, use_llm=True):
+    def __init__(self, use_llm=True, word_boundary=False, tiered=False, tier_threshold=0.85,
+                 enrich_in_background=False, llm_config=None, breaker_threshold=5, breaker_recovery=30.0):
         """
         Initialize the claim analyzer.
         
         Args:
             use_llm (bool): Whether to use LLM for generating explanations
+            word_boundary (bool): Only match keywords on whole-word boundaries
+            tiered (bool): Skip the LLM and return the rule-based explanation for confident verdicts
+            tier_threshold (float): Confidence at or above which the LLM is skipped in tiered mode
+            enrich_in_background (bool): In tiered mode, still request an LLM explanation in the
+                background and make it available through get_enriched_explanation
+            llm_config (dict, optional): Keyword arguments for LLMService, such as model_id,
+                backend, api_url and api_key
+            breaker_threshold (int): Consecutive LLM failures after which the LLM is skipped
+            breaker_recovery (float): Seconds before a trial LLM call is allowed again
         """
         self.confidence_threshold_high = 0.7
         self.confidence_threshold_medium = 0.5
         
+        # Tiered explanation settings
+        self.tiered = tiered
+        self.tier_threshold = tier_threshold
+        self.enrich_in_background = enrich_in_background
+        self.max_enriched_explanations = 1000
+        self.enriched_explanations = OrderedDict()
+        self.explanation_stats = {'llm_calls': 0, 'llm_calls_avoided': 0}
+        self._stats_lock = threading.Lock()
+        self._enrichment_executor = None
+        
         # Keywords that might indicate paranormal claims
         self.paranormal_keywords = [
             'ghost', 'spirit', 'haunted', 'supernatural', 'apparition',
@@ -30,15 +57,175 @@ class ClaimAnalyzer:
             'hallucination', 'fabricated', 'no evidence', 'anecdotal'
         ]
         
+        # Compile the keyword lists into multi-pattern matchers
+        self.word_boundary = word_boundary
+        self._build_matchers()
+        
+        # Per-passage keyword annotations computed at indexing time, as
+        # (passage_id -> masks, passage_id -> text) replaced in one step on re-indexing
+        self._annotation_index = ({}, {})
+        
+        # Failing LLM calls trip the breaker so claims fall back to rule-based explanations
+        self.circuit_breaker = CircuitBreaker(failure_threshold=breaker_threshold, recovery_timeout=breaker_recovery)
+        
         # Initialize LLM service if enabled
         self.use_llm = use_llm
         if use_llm:
             try:
-                self.llm_service = LLMService()
+                self.llm_service = LLMService(**(llm_config or {}))
             except Exception as e:
                 print(f"Warning: Could not initialize LLM service: {e}")
                 self.use_llm = False
     
+    def _keyword_signature(self):
+        """
+        Describe the current keyword configuration.
+        
+        Returns:
+            tuple: Hashable snapshot of the keyword lists and matching mode
+        """
+        return (tuple(self.debunking_keywords), tuple(self.paranormal_keywords), self.word_boundary)
+    
+    def _build_matchers(self):
+        """Compile Aho-Corasick matchers for the debunking and paranormal keyword lists."""
+        self.debunking_matcher = KeywordMatcher(self.debunking_keywords, word_boundary=self.word_boundary)
+        self.paranormal_matcher = KeywordMatcher(self.paranormal_keywords, word_boundary=self.word_boundary)
+        self._matcher_signature = self._keyword_signature()
+    
+    def _annotate_text(self, text):
+        """
+        Compute keyword annotations for a passage text.
+        
+        Args:
+            text (str): Passage text
+            
+        Returns:
+            tuple: (debunking_mask, paranormal_mask) keyword bitsets
+        """
+        return self.debunking_matcher.match_mask(text), self.paranormal_matcher.match_mask(text)
+    
+    def _refresh_annotations(self):
+        """Recompile matchers and re-annotate indexed passages if the keyword lists changed."""
+        if self._keyword_signature() == self._matcher_signature:
+            return
+        
+        self._build_matchers()
+        indexed_texts = self._annotation_index[1]
+        annotations = {passage_id: self._annotate_text(text) for passage_id, text in indexed_texts.items()}
+        self._annotation_index = (annotations, indexed_texts)
+    
+    @property
+    def passage_annotations(self):
+        """Precomputed (debunking_mask, paranormal_mask) annotations by passage_id."""
+        return self._annotation_index[0]
+    
+    def annotation_signature(self):
+        """
+        Describe what stored annotations must have been computed with to be reused.
+        
+        Returns:
+            list: JSON-serializable keyword lists and matching mode
+        """
+        return [list(self.debunking_keywords), list(self.paranormal_keywords), self.word_boundary]
+    
+    def export_annotations(self, passages):
+        """
+        Package the annotations of indexed passages for saving with the index.
+        
+        Args:
+            passages (list): Passages in index order
+            
+        Returns:
+            dict: {'signature', 'keyword_ids'}, with one [debunking_ids, paranormal_ids] pair of
+                sorted keyword-index lists per passage, for EmbeddingEngine.save
+        """
+        self._refresh_annotations()
+        # Index lists rather than raw bitsets: JSON cannot round-trip ints past 4300 digits
+        keyword_ids = []
+        for passage in passages:
+            debunking_mask, paranormal_mask = self._get_annotations(passage)
+            keyword_ids.append([KeywordMatcher.indices_in_mask(debunking_mask),
+                                KeywordMatcher.indices_in_mask(paranormal_mask)])
+        return {
+            'signature': self.annotation_signature(),
+            'keyword_ids': keyword_ids
+        }
+    
+    def _stored_masks(self, stored_annotations, count):
+        """
+        Decode annotations saved with the index into bitsets.
+        
+        Args:
+            stored_annotations (dict): Output of export_annotations, or the older
+                {'signature', 'masks'} form holding the bitsets as ints
+            count (int): Number of indexed passages
+            
+        Returns:
+            list: (debunking_mask, paranormal_mask) per passage, or None if the stored
+                annotations do not match the current keywords or passages
+        """
+        if stored_annotations is None or stored_annotations.get('signature') != self.annotation_signature():
+            return None
+        keyword_ids = stored_annotations.get('keyword_ids')
+        if keyword_ids is not None and len(keyword_ids) == count:
+            return [(KeywordMatcher.mask_from_indices(debunking_ids), KeywordMatcher.mask_from_indices(paranormal_ids))
+                    for debunking_ids, paranormal_ids in keyword_ids]
+        masks = stored_annotations.get('masks')
+        if masks is not None and len(masks) == count:
+            return [(debunking_mask, paranormal_mask) for debunking_mask, paranormal_mask in masks]
+        return None
+    
+    def index_passages(self, passages, stored_annotations=None):
+        """
+        Precompute keyword annotations for indexed passages.
+        
+        Call this once after the knowledge base is indexed so that
+        extract_key_facts can merge stored annotations instead of scanning text.
+        Annotations saved with the index (IndexSnapshot.annotations) are used
+        as they are when they were computed with the same keyword lists and
+        matching mode. The new annotations replace the old ones in a single
+        step, so it can run while other threads are analyzing claims.
+        
+        Args:
+            passages (list): List of passage dictionaries with 'passage_id' and 'text'
+            stored_annotations (dict, optional): Output of export_annotations for these passages
+            
+        Returns:
+            int: Number of passages annotated
+        """
+        self._refresh_annotations()
+        
+        masks = self._stored_masks(stored_annotations, len(passages))
+        
+        annotations = {}
+        indexed_texts = {}
+        for i, passage in enumerate(passages):
+            passage_id = passage['passage_id']
+            indexed_texts[passage_id] = passage['text']
+            if masks is not None:
+                annotations[passage_id] = masks[i]
+            else:
+                annotations[passage_id] = self._annotate_text(passage['text'])
+        
+        self._annotation_index = (annotations, indexed_texts)
+        return len(annotations)
+    
+    def _get_annotations(self, passage):
+        """
+        Look up precomputed annotations for a passage, scanning its text if it was not indexed.
+        
+        Args:
+            passage (dict): Evidence passage dictionary
+            
+        Returns:
+            tuple: (debunking_mask, paranormal_mask) keyword bitsets
+        """
+        passage_annotations, indexed_texts = self._annotation_index
+        annotations = passage_annotations.get(passage.get('passage_id'))
+        if annotations is not None and indexed_texts.get(passage['passage_id']) == passage['text']:
+            return annotations
+        return self._annotate_text(passage['text'])
+    
     def extract_key_facts(self, passages):
         """
         Extract key facts from evidence passages.
@@ -57,6 +244,8 @@ class ClaimAnalyzer:
             'domains': set()
         }
         
+        self._refresh_annotations()
+        
         for passage in passages:
             text = passage['text']
             source = passage['source']
@@ -67,20 +256,20 @@ class ClaimAnalyzer:
             facts['sources'].add(source)
             facts['domains'].add(domain)
             
+            debunking_mask, paranormal_mask = self._get_annotations(passage)
+            
             # Check for contradictory statements
-            for keyword in self.debunking_keywords:
-                if keyword in text:
-                    facts['contradictions'].append({
-                        'text': text,
-                        'source': source,
-                        'keyword': keyword,
-                        'similarity': similarity
-                    })
+            for keyword in self.debunking_matcher.keywords_in_mask(debunking_mask):
+                facts['contradictions'].append({
+                    'text': text,
+                    'source': source,
+                    'keyword': keyword,
+                    'similarity': similarity
+                })
             
             # Extract potentially relevant terms
-            for keyword in self.paranormal_keywords:
-                if keyword in text:
-                    facts['relevant_terms'][keyword] += 1
+            for keyword in self.paranormal_matcher.keywords_in_mask(paranormal_mask):
+                facts['relevant_terms'][keyword] += 1
             
             # If passage has high similarity, consider it supporting
             if similarity > self.confidence_threshold_high:
@@ -92,23 +281,19 @@ class ClaimAnalyzer:
         
         return facts
     
-    def analyze_claim(self, claim_text, evidence_passages):
+    def assess_claim(self, evidence_passages):
         """
-        Analyze a claim against evidence passages.
+        Compute the rule-based verdict for a claim without generating an explanation.
         
         Args:
-            claim_text (str): The processed claim text
-            evidence_passages (list): List of retrieved evidence passages
+            evidence_passages (list): List of retrieved evidence passages (must be non-empty)
             
         Returns:
-            tuple: (verdict, explanation, confidence)
+            tuple: (verdict, confidence, facts)
         """
-        # Check if we have enough evidence
-        if not evidence_passages:
-            return "Requires Further Research", "No relevant evidence found.", 0.3
-        
         # Extract facts from evidence
-        facts = self.extract_key_facts(evidence_passages)
+        with span('extract_key_facts'):
+            facts = self.extract_key_facts(evidence_passages)
         
         # Calculate overall confidence based on similarity scores
         similarities = [p['similarity'] for p in evidence_passages]
@@ -127,12 +312,196 @@ class ClaimAnalyzer:
             verdict = "Unsupported"
             confidence = avg_similarity
         
+        return verdict, confidence, facts
+    
+    def analyze_claim(self, claim_text, evidence_passages, timeout=None):
+        """
+        Analyze a claim against evidence passages.
+        
+        Args:
+            claim_text (str): The processed claim text
+            evidence_passages (list): List of retrieved evidence passages
+            timeout (float, optional): Seconds allowed for the analysis; the LLM explanation is
+                abandoned for the rule-based one when it cannot finish in time
+            
+        Returns:
+            tuple: (verdict, explanation, confidence)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        # Check if we have enough evidence
+        if not evidence_passages:
+            return "Requires Further Research", "No relevant evidence found.", 0.3
+        
+        verdict, confidence, facts = self.assess_claim(evidence_passages)
+        
         # Generate explanation
-        explanation = self._generate_explanation(claim_text, verdict, facts, evidence_passages)
+        explanation = self._generate_explanation(claim_text, verdict, facts, evidence_passages, confidence,
+                                                 deadline=deadline)
         
         return verdict, explanation, confidence
     
-    def _generate_explanation(self, claim_text, verdict, facts, evidence_passages):
+    def analyze_claims(self, claims_with_evidence, max_workers=4, priority="batch", timeout=None):
+        """
+        Analyze many claims, generating explanations concurrently.
+        
+        Rule-based verdicts are computed as claims are read, and their
+        explanations are dispatched to a bounded thread pool so that LLM
+        round trips overlap. At most 2 * max_workers explanations are queued
+        or running at once, so extracted facts for the whole batch are never
+        held together. Results keep the input order, and a failure on one
+        claim is recorded on that claim only. Verdicts are scored claim by
+        claim with assess_claim; each one only merges precomputed passage
+        annotations, so explanations dominate the batch time.
+        
+        Args:
+            claims_with_evidence (iterable): (claim_text, evidence_passages) tuples
+            max_workers (int): Maximum number of concurrent explanation calls
+            priority (str): LLM scheduling priority for the batch, 'interactive' or 'batch'
+            timeout (float, optional): Seconds allowed for each claim's explanation, counted from
+                when its LLM call starts
+            
+        Returns:
+            list: List of dictionaries with 'verdict', 'explanation', 'confidence' and 'error'
+        """
+        results = []
+        max_workers = max(1, max_workers)
+        window = 2 * max_workers
+        # Future -> position in results of the claim it explains
+        in_flight = {}
+        
+        def collect(done):
+            for future in done:
+                i = in_flight.pop(future)
+                try:
+                    results[i]['explanation'] = future.result()
+                except Exception as e:
+                    results[i]['error'] = str(e)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, (claim_text, evidence_passages) in enumerate(claims_with_evidence):
+                if not evidence_passages:
+                    results.append({
+                        'verdict': "Requires Further Research",
+                        'explanation': "No relevant evidence found.",
+                        'confidence': 0.3,
+                        'error': None
+                    })
+                    continue
+                
+                try:
+                    verdict, confidence, facts = self.assess_claim(evidence_passages)
+                except Exception as e:
+                    results.append({'verdict': None, 'explanation': None, 'confidence': None, 'error': str(e)})
+                    continue
+                
+                results.append({'verdict': verdict, 'explanation': None, 'confidence': confidence, 'error': None})
+                # Wait for a free place in the window before queuing another explanation
+                if len(in_flight) >= window:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = executor.submit(
+                    self._generate_explanation, claim_text, verdict, facts, evidence_passages, confidence, priority,
+                    timeout=timeout
+                )
+                in_flight[future] = i
+            
+            collect(wait(in_flight)[0])
+        
+        return results
+    
+    def llm_avoidance_rate(self):
+        """
+        Fraction of explanations that skipped the LLM because of tiered mode.
+        
+        Returns:
+            float: Avoided LLM calls divided by explanations that would have used the LLM
+        """
+        with self._stats_lock:
+            calls = self.explanation_stats['llm_calls']
+            avoided = self.explanation_stats['llm_calls_avoided']
+        total = calls + avoided
+        return avoided / total if total else 0.0
+    
+    def get_enriched_explanation(self, claim_text, verdict):
+        """
+        Return a background LLM explanation produced in tiered mode, if it is ready.
+        
+        Args:
+            claim_text (str): The claim text
+            verdict (str): The verdict
+            
+        Returns:
+            str: The LLM explanation, or None if not (yet) available
+        """
+        with self._stats_lock:
+            return self.enriched_explanations.get((claim_text, verdict))
+    
+    def close(self, wait=True):
+        """
+        Shut down the background enrichment threads started in tiered mode.
+        
+        A later confident verdict starts them again, so closing is safe while
+        the analyzer is still shared.
+        
+        Args:
+            wait (bool): Wait for enrichments already queued to finish
+        """
+        with self._stats_lock:
+            executor = self._enrichment_executor
+            self._enrichment_executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+    
+    def _enrich_explanation(self, claim_text, verdict, facts, evidence_passages):
+        """
+        Generate an LLM explanation in the background and store it for later retrieval.
+        
+        Args:
+            claim_text (str): The claim text
+            verdict (str): The verdict
+            facts (dict): Extracted facts
+            evidence_passages (list): The evidence passages
+        """
+        if not self.circuit_breaker.allow_request():
+            return
+        try:
+            explanation = self.llm_service.generate_explanation(
+                claim_text, facts, evidence_passages, verdict, priority="batch"
+            )
+        except Exception as e:
+            print(f"Warning: Background LLM enrichment failed: {e}")
+            self.circuit_breaker.record_failure()
+            return
+        self.circuit_breaker.record_success()
+        
+        with self._stats_lock:
+            self.enriched_explanations[(claim_text, verdict)] = explanation
+            self.enriched_explanations.move_to_end((claim_text, verdict))
+            while len(self.enriched_explanations) > self.max_enriched_explanations:
+                self.enriched_explanations.popitem(last=False)
+    
+    def _llm_available(self, deadline=None):
+        """
+        Check whether an LLM call should be attempted now.
+        
+        Args:
+            deadline (float, optional): Absolute time.monotonic() deadline for the call
+            
+        Returns:
+            bool: False if the LLM is disabled, the deadline has passed or the circuit is open
+        """
+        if not self.use_llm:
+            return False
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if not self.circuit_breaker.allow_request():
+            inc('claimcheck_llm_circuit_rejections_total')
+            return False
+        return True
+    
+    def _generate_explanation(self, claim_text, verdict, facts, evidence_passages, confidence=None,
+                              priority="interactive", timeout=None, deadline=None):
         """
         Generate an explanation for the verdict.
         
@@ -141,20 +510,124 @@ class ClaimAnalyzer:
             verdict (str): The verdict
             facts (dict): Extracted facts
             evidence_passages (list): The evidence passages
+            confidence (float, optional): Verdict confidence, used by tiered mode
+            priority (str): LLM scheduling priority, 'interactive' or 'batch'
+            timeout (float, optional): Seconds allowed from now, used when no deadline is given
+            deadline (float, optional): Absolute time.monotonic() deadline for the LLM call
             
         Returns:
             str: Generated explanation
         """
+        if deadline is None and timeout is not None:
+            deadline = time.monotonic() + timeout
+        
         # Try to use LLM for explanation if available
         if self.use_llm:
-            try:
-                return self.llm_service.generate_explanation(claim_text, facts, evidence_passages, verdict)
-            except Exception as e:
-                print(f"Warning: LLM generation failed: {e}. Falling back to rule-based explanation.")
-                # If LLM fails, fall back to rule-based explanation
-                self.use_llm = False
+            # In tiered mode, confident verdicts get the rule-based explanation right away
+            if self.tiered and confidence is not None and confidence >= self.tier_threshold:
+                with self._stats_lock:
+                    self.explanation_stats['llm_calls_avoided'] += 1
+                    if self.enrich_in_background and self._enrichment_executor is None:
+                        self._enrichment_executor = ThreadPoolExecutor(max_workers=2)
+                    executor = self._enrichment_executor
+                if self.enrich_in_background:
+                    executor.submit(self._enrich_explanation, claim_text, verdict, facts, evidence_passages)
+                return self._rule_based_explanation(verdict, facts, evidence_passages)
+            
+            if self._llm_available(deadline):
+                with self._stats_lock:
+                    self.explanation_stats['llm_calls'] += 1
+                try:
+                    explanation = self.llm_service.generate_explanation(
+                        claim_text, facts, evidence_passages, verdict, priority=priority, deadline=deadline
+                    )
+                    self.circuit_breaker.record_success()
+                    return explanation
+                except DeadlineExceeded as e:
+                    # The caller's deadline says nothing about the backend, so the breaker is not charged
+                    print(f"Warning: LLM generation missed its deadline: {e}. Falling back to rule-based explanation.")
+                    self.circuit_breaker.release()
+                except Exception as e:
+                    # If LLM fails, fall back to rule-based explanation
+                    print(f"Warning: LLM generation failed: {e}. Falling back to rule-based explanation.")
+                    self.circuit_breaker.record_failure()
+        
+        return self._rule_based_explanation(verdict, facts, evidence_passages)
+    
+    def stream_explanation(self, claim_text, verdict, facts, evidence_passages, confidence=None, timeout=None):
+        """
+        Stream an explanation for the verdict as it is generated.
+        
+        Uses the same rules as _generate_explanation for when the LLM is
+        consulted; rule-based explanations are yielded as a single chunk.
+        
+        Args:
+            claim_text (str): The claim text
+            verdict (str): The verdict
+            facts (dict): Extracted facts
+            evidence_passages (list): The evidence passages
+            confidence (float, optional): Verdict confidence, used by tiered mode
+            timeout (float, optional): Seconds allowed for the LLM to finish streaming
+            
+        Yields:
+            str: Chunks of the explanation
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        tier_skip = self.tiered and confidence is not None and confidence >= self.tier_threshold
+        if not self.use_llm or tier_skip:
+            yield self._generate_explanation(claim_text, verdict, facts, evidence_passages, confidence,
+                                             deadline=deadline)
+            return
+        # _llm_available may take the breaker's only half-open trial, so it is checked once
+        if not self._llm_available(deadline):
+            yield self._rule_based_explanation(verdict, facts, evidence_passages)
+            return
+        
+        with self._stats_lock:
+            self.explanation_stats['llm_calls'] += 1
+        streamed = False
+        outcome_recorded = False
+        try:
+            for chunk in self.llm_service.stream_explanation(claim_text, facts, evidence_passages, verdict,
+                                                             deadline=deadline):
+                streamed = True
+                yield chunk
+            self.circuit_breaker.record_success()
+            outcome_recorded = True
+            return
+        except DeadlineExceeded as e:
+            print(f"Warning: LLM generation missed its deadline: {e}. Falling back to rule-based explanation.")
+            self.circuit_breaker.release()
+            outcome_recorded = True
+        except Exception as e:
+            print(f"Warning: LLM generation failed: {e}. Falling back to rule-based explanation.")
+            self.circuit_breaker.record_failure()
+            outcome_recorded = True
+        finally:
+            # The consumer closed the stream early (GeneratorExit): chunks arriving show the
+            # backend works, otherwise the breaker slot is handed back without a verdict
+            if not outcome_recorded:
+                if streamed:
+                    self.circuit_breaker.record_success()
+                else:
+                    self.circuit_breaker.release()
         
-        # Rule-based explanation generation (fallback)
+        # A partly streamed answer is left as is rather than followed by a second explanation
+        if not streamed:
+            yield self._rule_based_explanation(verdict, facts, evidence_passages)
+    
+    def _rule_based_explanation(self, verdict, facts, evidence_passages):
+        """
+        Build a template explanation for the verdict without the LLM.
+        
+        Args:
+            verdict (str): The verdict
+            facts (dict): Extracted facts
+            evidence_passages (list): The evidence passages
+            
+        Returns:
+            str: Rule-based explanation
+        """
         explanation = ""
         
         if verdict == "Debunked":
@@ -0,0 +1,252 @@
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+from embedding_engine import extract_keywords
+from metrics import inc
+
+# Mersenne prime 2**61 - 1, larger than any 8-byte token hash folded below it
+_PRIME = (1 << 61) - 1
+
+def jaccard(a, b):
+    """
+    Jaccard similarity of two sets.
+
+    Args:
+        a (set): First set
+        b (set): Second set
+
+    Returns:
+        float: |a & b| / |a | b|, 1.0 when both are empty
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def choose_bands(num_perm, threshold, min_recall=0.99):
+    """
+    Pick the LSH band layout for a similarity threshold.
+
+    A pair with Jaccard similarity s shares at least one band with
+    probability 1 - (1 - s**rows)**bands. The layout with the most rows per
+    band (fewest spurious candidates) that still finds pairs at the
+    threshold with probability min_recall is chosen.
+
+    Args:
+        num_perm (int): Signature length
+        threshold (float): Lowest Jaccard similarity that should be found
+        min_recall (float): Required probability of finding a pair at the threshold
+
+    Returns:
+        tuple: (bands, rows) with bands * rows == num_perm
+    """
+    layout = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= min_recall:
+            layout = (bands, rows)
+    return layout
+
+class ClaimDeduplicator:
+    def __init__(self, threshold=0.8, max_entries=10000, num_perm=64, seed=0):
+        """
+        Initialize a near-duplicate index over analyzed claims.
+
+        Claims are compared as sets of keywords from extract_keywords, the
+        tokenization used for search. MinHash signatures split into LSH
+        bands find candidates without scanning every entry, and candidates
+        are confirmed with their exact Jaccard similarity, so a result is
+        only reused at or above threshold. Entries are kept in least
+        recently used order and the oldest are dropped beyond max_entries.
+
+        Word sets ignore order, stop words and punctuation but not
+        inflection, so a reworded claim ("walk through a wall" against
+        "walked through walls") scores low; keep the threshold high, since
+        claims that differ in a single word can deserve different verdicts.
+
+        Args:
+            threshold (float): Lowest Jaccard similarity at which a result is reused
+            max_entries (int): Analyzed claims kept
+            num_perm (int): MinHash signature length
+            seed (int): Seed for the MinHash permutations
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # (scope, band number, band values) -> entry ids
+        self._buckets = {}
+        # (scope, keyword set) -> entry id, so resubmitting a claim replaces its entry
+        self._exact = {}
+        self._next_id = 0
+
+    def __len__(self):
+        """Number of claims held."""
+        with self._lock:
+            return len(self._entries)
+
+    def _keywords(self, claim_text):
+        """
+        Keyword set of a claim.
+
+        Args:
+            claim_text (str): Processed claim text
+
+        Returns:
+            frozenset: Distinct keywords
+        """
+        return frozenset(extract_keywords(claim_text))
+
+    def signature(self, keywords):
+        """
+        MinHash signature of a keyword set.
+
+        Args:
+            keywords (iterable): Distinct keywords, not empty
+
+        Returns:
+            list: num_perm minimum hash values
+        """
+        hashes = [int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big') % _PRIME
+                  for word in keywords]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._permutations]
+
+    def _band_keys(self, scope, signature):
+        """
+        Bucket keys of a signature, one per band.
+
+        Args:
+            scope (hashable): Context the claim was analyzed in
+            signature (list): MinHash signature
+
+        Returns:
+            list: Bucket keys
+        """
+        rows = self.rows
+        return [(scope, band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def lookup(self, claim_text, scope=None):
+        """
+        Find the most similar analyzed claim at or above the threshold.
+
+        Args:
+            claim_text (str): Processed claim text
+            scope (hashable, optional): Context that must match, e.g. index version, domain filter and k
+
+        Returns:
+            dict: {'result', 'claim_text', 'similarity'} of the best match, or None
+        """
+        keywords = self._keywords(claim_text)
+        if not keywords:
+            return None
+        band_keys = self._band_keys(scope, self.signature(keywords))
+
+        with self._lock:
+            candidates = set()
+            for key in band_keys:
+                candidates.update(self._buckets.get(key, ()))
+
+            best_id, best_similarity = None, 0.0
+            for entry_id in candidates:
+                similarity = jaccard(keywords, self._entries[entry_id]['keywords'])
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                inc('claimcheck_dedup_lookups_total', outcome='miss')
+                return None
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            self.hits += 1
+        inc('claimcheck_dedup_lookups_total', outcome='hit')
+        return {'result': entry['result'], 'claim_text': entry['claim_text'], 'similarity': best_similarity}
+
+    def add(self, claim_text, result, scope=None):
+        """
+        Record the result of analyzing a claim.
+
+        Args:
+            claim_text (str): Processed claim text
+            result (object): What lookup should return for similar claims; not copied
+            scope (hashable, optional): Context the claim was analyzed in
+
+        Returns:
+            bool: False if the claim has no keywords and was not recorded
+        """
+        keywords = self._keywords(claim_text)
+        if not keywords:
+            return False
+        band_keys = self._band_keys(scope, self.signature(keywords))
+
+        with self._lock:
+            previous = self._exact.get((scope, keywords))
+            if previous is not None:
+                self._remove(previous)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'claim_text': claim_text,
+                'keywords': keywords,
+                'scope': scope,
+                'band_keys': band_keys,
+                'result': result
+            }
+            self._exact[(scope, keywords)] = entry_id
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def _remove(self, entry_id):
+        """
+        Drop an entry and its bucket memberships. Caller holds the lock.
+
+        Args:
+            entry_id (int): Entry to drop
+        """
+        entry = self._entries.pop(entry_id)
+        del self._exact[(entry['scope'], entry['keywords'])]
+        for key in entry['band_keys']:
+            bucket = self._buckets[key]
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def clear(self):
+        """Forget every analyzed claim."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._exact.clear()
+
+    def stats(self):
+        """
+        Report the size and hit rate.
+
+        Returns:
+            dict: entries, hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
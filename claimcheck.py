@@ -0,0 +1,409 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+from data_processor import DataProcessor
+from rag_system import RAGSystem
+from claim_analyzer import ClaimAnalyzer
+from embedding_engine import EmbeddingEngine
+from index_store import DEFAULT_INDEX_PATH, load_or_build_index
+from llm_cache import open_cache
+
+# Pipeline objects for the current worker process, set by _init_worker
+_worker = {}
+
+def read_claims(path, input_format=None):
+    """
+    Stream claims from a JSONL or CSV file.
+
+    Records use the generate_claims_data schema: claim_id, claim_text and domain.
+
+    Args:
+        path (str): Input file
+        input_format (str, optional): 'jsonl' or 'csv', guessed from the extension if None
+
+    Yields:
+        dict: One claim per record
+    """
+    if input_format is None:
+        input_format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if input_format == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {'claim_id': None, 'claim_text': None, 'error': f"Line {line_number}: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield {'claim_id': None, 'claim_text': None,
+                       'error': f"Line {line_number}: expected a JSON object, got {type(record).__name__}"}
+                continue
+            yield record
+
+def _init_worker(index_path, analyzer_options, llm_cache_path=None):
+    """
+    Load the index and build the pipeline once per worker process.
+
+    Args:
+        index_path (str): Index file
+        analyzer_options (dict): Keyword arguments for ClaimAnalyzer
+        llm_cache_path (str, optional): LLM response cache file, shared by all workers
+    """
+    engine = load_or_build_index(index_path)
+    # Each process opens its own connection; SQLite connections must not cross a fork
+    cache = open_cache(llm_cache_path) if analyzer_options.get('use_llm') else None
+    if cache is not None:
+        analyzer_options = {**analyzer_options,
+                            'llm_config': {**analyzer_options.get('llm_config', {}), 'cache': cache}}
+    analyzer = ClaimAnalyzer(**analyzer_options)
+    analyzer.index_passages(engine.passages, engine.snapshot.annotations)
+    _worker['data_processor'] = DataProcessor()
+    _worker['rag_system'] = RAGSystem(engine)
+    _worker['claim_analyzer'] = analyzer
+
+def check_claim(claim, k=5, filter_by_domain=False, include_explanation=False, timeout=None):
+    """
+    Run process, retrieve and analyze for one claim in a worker process.
+
+    Args:
+        claim (dict): Claim record with claim_id, claim_text and domain
+        k (int): Evidence passages to retrieve
+        filter_by_domain (bool): Restrict evidence to the claim's domain
+        include_explanation (bool): Include the explanation text in the result
+        timeout (float, optional): Seconds allowed for the explanation
+
+    Returns:
+        dict: Result record with verdict, confidence and evidence ids, or an error
+    """
+    if not isinstance(claim, dict):
+        return {'claim_id': None, 'error': f"Expected a claim record, got {type(claim).__name__}"}
+    result = {'claim_id': claim.get('claim_id')}
+    if claim.get('error'):
+        result['error'] = claim['error']
+        return result
+    claim_text = claim.get('claim_text')
+    if not claim_text:
+        result['error'] = "Missing claim_text"
+        return result
+
+    try:
+        processed_claim = _worker['data_processor'].process_claim_text(claim_text)
+        domain_filter = (claim.get('domain') or None) if filter_by_domain else None
+        evidence = _worker['rag_system'].retrieve_evidence(processed_claim, k=k, domain_filter=domain_filter)
+        verdict, explanation, confidence = _worker['claim_analyzer'].analyze_claim(processed_claim, evidence,
+                                                                                   timeout=timeout)
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+
+    result.update({
+        'verdict': verdict,
+        'confidence': round(confidence, 4),
+        'evidence_ids': [passage['passage_id'] for passage in evidence]
+    })
+    if include_explanation:
+        result['explanation'] = explanation
+    return result
+
+def _check_claim_task(task):
+    """
+    Unpack a (claim, options) pair for Pool.imap.
+
+    Args:
+        task (tuple): (claim, options)
+
+    Returns:
+        dict: Result of check_claim
+    """
+    claim, options = task
+    return check_claim(claim, **options)
+
+def load_checkpoint(path):
+    """
+    Read a checkpoint file.
+
+    Args:
+        path (str): Checkpoint file
+
+    Returns:
+        dict: {'claims_done', 'output_bytes', 'input'}, or None if there is no checkpoint
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(path, checkpoint):
+    """
+    Write a checkpoint file atomically.
+
+    Args:
+        path (str): Checkpoint file
+        checkpoint (dict): Progress to record
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def run_batch(input_path, output_path, processes=None, index_path=DEFAULT_INDEX_PATH, input_format=None,
+              k=5, filter_by_domain=False, include_explanation=False, timeout=None, analyzer_options=None,
+              window_size=None, checkpoint_path=None, resume=False, llm_cache_path=None):
+    """
+    Check every claim in a file and write one JSON result per line.
+
+    Claims are read and dispatched one window at a time, so memory stays
+    bounded regardless of input size. After each window the output is
+    flushed and a checkpoint records how many claims are done and how many
+    output bytes are valid; resuming skips those claims and truncates
+    anything written after the checkpoint.
+
+    Args:
+        input_path (str): JSONL or CSV file of claims
+        output_path (str): JSONL file to write results to
+        processes (int, optional): Worker processes, defaults to the CPU count
+        index_path (str): Index file, built from sample data if missing
+        input_format (str, optional): 'jsonl' or 'csv', guessed from the extension if None
+        k (int): Evidence passages per claim
+        filter_by_domain (bool): Restrict evidence to each claim's domain
+        include_explanation (bool): Include explanation text in the output
+        timeout (float, optional): Seconds allowed per explanation
+        analyzer_options (dict, optional): Keyword arguments for ClaimAnalyzer, LLM off by default
+        window_size (int, optional): Claims dispatched between checkpoints
+        checkpoint_path (str, optional): Checkpoint file, defaults to output_path + '.checkpoint'
+        resume (bool): Continue from an existing checkpoint
+        llm_cache_path (str, optional): LLM response cache file, defaults to LLM_CACHE_PATH
+
+    Returns:
+        dict: Summary with claim, error and verdict counts, elapsed time and throughput
+    """
+    processes = processes or os.cpu_count() or 1
+    window_size = window_size or processes * 64
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    analyzer_options = {'use_llm': False, **(analyzer_options or {})}
+    options = {'k': k, 'filter_by_domain': filter_by_domain, 'include_explanation': include_explanation,
+               'timeout': timeout}
+
+    claims_done = 0
+    output_bytes = 0
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is not None and not os.path.exists(output_path):
+        print(f"Warning: {output_path} is missing, ignoring checkpoint {checkpoint_path} and starting over")
+        checkpoint = None
+    if checkpoint is not None:
+        if checkpoint.get('input') != os.path.abspath(input_path):
+            raise ValueError(f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('input')}")
+        claims_done = checkpoint['claims_done']
+        output_bytes = checkpoint['output_bytes']
+        print(f"Resuming after {claims_done} claims")
+
+    # Build the index and its annotations once up front so workers only load them
+    if not os.path.exists(index_path):
+        load_or_build_index(index_path)
+
+    claims = islice(read_claims(input_path, input_format), claims_done, None)
+    verdicts = Counter()
+    errors = 0
+    processed = 0
+    start = time.perf_counter()
+
+    with open(output_path, 'r+b' if checkpoint is not None else 'wb') as out, \
+            Pool(processes, initializer=_init_worker, initargs=(index_path, analyzer_options, llm_cache_path)) as pool:
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+
+        while True:
+            window = list(islice(claims, window_size))
+            if not window:
+                break
+
+            tasks = ((claim, options) for claim in window)
+            for result in pool.imap(_check_claim_task, tasks, chunksize=max(1, len(window) // (processes * 4))):
+                out.write((json.dumps(result) + '\n').encode('utf-8'))
+                if 'error' in result:
+                    errors += 1
+                else:
+                    verdicts[result['verdict']] += 1
+
+            out.flush()
+            os.fsync(out.fileno())
+            processed += len(window)
+            claims_done += len(window)
+            save_checkpoint(checkpoint_path, {
+                'input': os.path.abspath(input_path),
+                'claims_done': claims_done,
+                'output_bytes': out.tell()
+            })
+
+    elapsed = time.perf_counter() - start
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {
+        'claims': processed,
+        'errors': errors,
+        'verdicts': dict(verdicts),
+        'elapsed_seconds': round(elapsed, 3),
+        'claims_per_second': round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+        'processes': processes
+    }
+
+def _print_summary(summary):
+    """
+    Print a batch run summary.
+
+    Args:
+        summary (dict): Summary from run_batch
+    """
+    print(f"Checked {summary['claims']} claims in {summary['elapsed_seconds']:.2f}s "
+          f"({summary['claims_per_second']} claims/s, {summary['processes']} processes)")
+    for verdict, count in sorted(summary['verdicts'].items()):
+        print(f"  {verdict}: {count}")
+    if summary['errors']:
+        print(f"  Errors: {summary['errors']}")
+
+def memory_report(index_path=DEFAULT_INDEX_PATH, target_passages=None, trace=False):
+    """
+    Measure the memory a serving process spends on the index.
+
+    Loads the index and the claim analyzer's passage annotations the way
+    the app and API server do, then reports EmbeddingEngine.memory_report.
+
+    Args:
+        index_path (str): Index file, built from sample data if missing
+        target_passages (list, optional): Corpus sizes to project memory use for
+        trace (bool): Also load the index again under tracemalloc as a cross-check
+
+    Returns:
+        dict: Report from EmbeddingEngine.memory_report, with 'traced_index_bytes' if trace
+    """
+    engine = load_or_build_index(index_path)
+    analyzer = ClaimAnalyzer(use_llm=False)
+    analyzer.index_passages(engine.passages, engine.snapshot.annotations)
+    report = engine.memory_report(target_passages, caches={'claim_annotations': analyzer.passage_annotations})
+
+    if trace:
+        # Should match the total of every component except the caches
+        tracemalloc.start()
+        snapshot = EmbeddingEngine.load_snapshot(index_path)
+        report['traced_index_bytes'] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del snapshot
+    return report
+
+def _format_bytes(size):
+    """
+    Format a byte count for display.
+
+    Args:
+        size (int): Bytes
+
+    Returns:
+        str: Size in B, KiB, MiB or GiB
+    """
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.2f} GiB"
+
+def _print_memory_report(report):
+    """
+    Print a memory report as a table.
+
+    Args:
+        report (dict): Report from memory_report
+    """
+    total = report['total_bytes'] or 1
+    print(f"Index version {report['version']}: {report['passages']} passages, "
+          f"{_format_bytes(report['total_bytes'])} ({_format_bytes(report['bytes_per_passage'])} per passage)")
+    for name, size in sorted(report['components'].items(), key=lambda item: -item[1]):
+        print(f"  {name:<20} {_format_bytes(size):>12}  {size / total * 100:5.1f}%")
+
+    vocabulary = report['vocabulary']
+    print(f"Vocabulary: {vocabulary['distinct_keywords']} distinct keywords, "
+          f"{_format_bytes(vocabulary['interned_bytes'])} if stored once "
+          f"(Heaps exponent {vocabulary['heaps_exponent']})")
+    if 'traced_index_bytes' in report:
+        print(f"Index allocations traced while loading: {_format_bytes(report['traced_index_bytes'])}")
+    if report['process_rss_bytes'] is not None:
+        print(f"Process resident size: {_format_bytes(report['process_rss_bytes'])}")
+
+    for projection in report['projections']:
+        print(f"Projected for {projection['passages']} passages: {_format_bytes(projection['total_bytes'])}, "
+              f"{projection['distinct_keywords']} distinct keywords")
+
+def main(argv=None):
+    """Run the claimcheck command line."""
+    parser = argparse.ArgumentParser(prog="claimcheck", description="Pakhand Bhedi command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Check a file of claims and write JSONL verdicts")
+    batch.add_argument("input", help="JSONL or CSV file with claim_id, claim_text and domain")
+    batch.add_argument("-o", "--output", required=True, help="JSONL file for results")
+    batch.add_argument("-p", "--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    batch.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Input format (default: from extension)")
+    batch.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file, built from sample data if missing")
+    batch.add_argument("-k", type=int, default=5, help="Evidence passages per claim")
+    batch.add_argument("--filter-by-domain", action="store_true", help="Only use evidence from each claim's domain")
+    batch.add_argument("--explanations", action="store_true", help="Include explanation text in the output")
+    batch.add_argument("--use-llm", action="store_true", help="Generate explanations with the LLM backend")
+    batch.add_argument("--timeout", type=float, default=None, help="Seconds allowed per explanation")
+    batch.add_argument("--llm-cache", default=None, help="SQLite file caching LLM responses (default: LLM_CACHE_PATH)")
+    batch.add_argument("--window", type=int, default=None, help="Claims processed between checkpoints")
+    batch.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+
+    memory = subparsers.add_parser("memory", help="Report the memory used by the index, by component")
+    memory.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file, built from sample data if missing")
+    memory.add_argument("--target", type=int, nargs="+", default=None, help="Corpus sizes to project memory use for")
+    memory.add_argument("--trace", action="store_true", help="Cross-check by loading the index again under tracemalloc")
+    memory.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "batch":
+        try:
+            summary = run_batch(
+                args.input, args.output,
+                processes=args.processes,
+                index_path=args.index,
+                input_format=args.format,
+                k=args.k,
+                filter_by_domain=args.filter_by_domain,
+                include_explanation=args.explanations,
+                timeout=args.timeout,
+                analyzer_options={'use_llm': args.use_llm},
+                window_size=args.window,
+                resume=args.resume,
+                llm_cache_path=args.llm_cache
+            )
+        except KeyboardInterrupt:
+            print("Interrupted; rerun with --resume to continue from the last checkpoint")
+            return 130
+        _print_summary(summary)
+    elif args.command == "memory":
+        report = memory_report(args.index, target_passages=args.target, trace=args.trace)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            _print_memory_report(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
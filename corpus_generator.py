@@ -0,0 +1,351 @@
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import sys
+from collections import Counter
+from datetime import date, timedelta
+from embedding_engine import STOP_WORDS
+from sample_data_generator import generate_myths_data
+
+# Synthetic words are built from these so the vocabulary tail looks like text, not ids
+SYLLABLES = ['ka', 'lo', 'mi', 'ter', 'san', 'vel', 'dor', 'ri', 'qua', 'nex', 'pho', 'lum',
+             'tra', 'gen', 'ois', 'mar', 'cul', 'zen', 'bri', 'tho']
+
+FIRST_DATE = date(2000, 1, 1)
+LAST_DATE = date(2024, 12, 31)
+
+class CorpusGenerator:
+    def __init__(self, seed=0, vocabulary_size=50000, zipf_exponent=1.07, topic_ratio=0.2,
+                 median_words=180, max_words=300):
+        """
+        Initialize a generator of synthetic myth articles.
+
+        The vocabulary starts with the words of the bundled sample articles,
+        most frequent first, and is padded with synthetic words; word ranks
+        follow a Zipf distribution. Each domain also draws topic words from
+        its own sample articles, and domains are mixed in the proportions of
+        the sample data. Article lengths are log-normal around median_words
+        and capped at max_words, the DataProcessor segment length, so each
+        article becomes one passage.
+
+        Args:
+            seed (int): Random seed; the same seed gives the same corpus
+            vocabulary_size (int): Total number of distinct words
+            zipf_exponent (float): Exponent s of the rank-frequency law 1 / rank**s
+            topic_ratio (float): Share of words drawn from the article's domain vocabulary
+            median_words (int): Median article length in words
+            max_words (int): Maximum article length in words
+        """
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        self.topic_ratio = topic_ratio
+        self.median_words = median_words
+        self.max_words = max_words
+
+        samples = generate_myths_data()
+        counts = Counter()
+        domain_counts = {}
+        self.sources = {}
+        for doc in samples:
+            words = re.findall(r"[a-z]+", doc['text'].lower())
+            counts.update(words)
+            domain_counts.setdefault(doc['domain'], Counter()).update(words)
+            self.sources.setdefault(doc['domain'], []).append(doc['source'])
+
+        self.vocabulary = [word for word, _ in counts.most_common()]
+        self.vocabulary.extend(itertools.islice(self._synthetic_words(set(self.vocabulary)),
+                                                max(0, vocabulary_size - len(self.vocabulary))))
+        self._cum_weights = self._zipf_cum_weights(len(self.vocabulary))
+
+        # Topic words: the domain's own content words, most characteristic first
+        common = set(self.vocabulary[:200])
+        self.topics = {}
+        for domain, domain_words in domain_counts.items():
+            words = [word for word, _ in domain_words.most_common()
+                     if word not in common and word not in STOP_WORDS and len(word) > 2]
+            self.topics[domain] = (words, self._zipf_cum_weights(len(words)))
+
+        domain_docs = Counter(doc['domain'] for doc in samples)
+        self.domains = sorted(domain_docs)
+        self._domain_weights = [domain_docs[domain] for domain in self.domains]
+
+    def _zipf_cum_weights(self, n):
+        """
+        Cumulative Zipf weights for ranks 1..n.
+
+        Args:
+            n (int): Number of ranks
+
+        Returns:
+            list: Cumulative weights for random.choices
+        """
+        return list(itertools.accumulate(1.0 / rank ** self.zipf_exponent for rank in range(1, n + 1)))
+
+    def _synthetic_words(self, taken):
+        """
+        Yield pronounceable words not already in the vocabulary, shortest first.
+
+        Args:
+            taken (set): Words to skip
+
+        Yields:
+            str: New word
+        """
+        for length in itertools.count(2):
+            for parts in itertools.product(SYLLABLES, repeat=length):
+                word = ''.join(parts)
+                if word not in taken:
+                    yield word
+
+    def _article_length(self, rng):
+        """
+        Draw an article length in words.
+
+        Args:
+            rng (random.Random): Random source
+
+        Returns:
+            int: Number of words
+        """
+        return max(20, min(self.max_words, int(rng.lognormvariate(math.log(self.median_words), 0.45))))
+
+    def _words(self, rng, domain, n):
+        """
+        Draw n words mixing the general vocabulary with the domain's topic words.
+
+        Args:
+            rng (random.Random): Random source
+            domain (str): Article domain
+            n (int): Number of words
+
+        Returns:
+            list: Words
+        """
+        n_topic = sum(1 for _ in range(n) if rng.random() < self.topic_ratio)
+        topic_words, topic_weights = self.topics[domain]
+        words = rng.choices(self.vocabulary, cum_weights=self._cum_weights, k=n - n_topic)
+        if topic_words:
+            words += rng.choices(topic_words, cum_weights=topic_weights, k=n_topic)
+        rng.shuffle(words)
+        return words
+
+    def _sentences(self, rng, words):
+        """
+        Join words into capitalized sentences of 6 to 24 words.
+
+        Args:
+            rng (random.Random): Random source
+            words (list): Words of the article
+
+        Returns:
+            str: Article text
+        """
+        sentences = []
+        i = 0
+        while i < len(words):
+            length = rng.randint(6, 24)
+            sentence = ' '.join(words[i:i + length])
+            sentences.append(sentence[:1].upper() + sentence[1:] + '.')
+            i += length
+        return ' '.join(sentences)
+
+    def iter_documents(self, num_documents):
+        """
+        Generate myth articles one at a time, in the generate_myths_data schema.
+
+        Args:
+            num_documents (int): Number of articles
+
+        Yields:
+            dict: Article with source_id, source, publication_date, domain and text
+        """
+        rng = random.Random(self.seed)
+        date_range = (LAST_DATE - FIRST_DATE).days
+        for n in range(num_documents):
+            domain = rng.choices(self.domains, weights=self._domain_weights)[0]
+            words = self._words(rng, domain, self._article_length(rng))
+            yield {
+                'source_id': f"SYN{n:08d}",
+                'source': rng.choice(self.sources[domain]),
+                'publication_date': (FIRST_DATE + timedelta(days=rng.randint(0, date_range))).isoformat(),
+                'domain': domain,
+                'text': self._sentences(rng, words)
+            }
+
+    def generate_documents(self, num_documents):
+        """
+        Generate a list of myth articles.
+
+        Args:
+            num_documents (int): Number of articles
+
+        Returns:
+            list: Articles, see iter_documents
+        """
+        return list(self.iter_documents(num_documents))
+
+    def sample_targets(self, documents, num_queries, rng):
+        """
+        Choose the articles claims will target, in one pass over the articles.
+
+        Reservoir sampling (Algorithm R) keeps min(num_queries, n) articles
+        chosen uniformly without replacement, so articles can be streamed
+        and only the chosen ones are held in memory.
+
+        Args:
+            documents (iterable): Articles from iter_documents
+            num_queries (int): Number of claims to be generated
+            rng (random.Random): Random source
+
+        Returns:
+            list: Chosen articles, in random order
+        """
+        reservoir = []
+        for seen, doc in enumerate(documents):
+            if seen < num_queries:
+                reservoir.append(doc)
+                continue
+            slot = rng.randint(0, seen)
+            if slot < num_queries:
+                reservoir[slot] = doc
+        rng.shuffle(reservoir)
+        return reservoir
+
+    def generate_queries(self, documents, num_queries, noise_ratio=0.3, min_words=5, max_words=15):
+        """
+        Generate claims targeting known articles, in the generate_claims_data schema.
+
+        Each claim takes content words from one article, mixed with words
+        from the general vocabulary, and records that article's source_id
+        so retrieval quality can be measured against it. Claims target
+        distinct articles while there are enough of them, and cycle through
+        all articles otherwise.
+
+        Args:
+            documents (iterable): Articles from generate_documents or iter_documents; read once
+            num_queries (int): Number of claims
+            noise_ratio (float): Share of claim words not taken from the target article
+            min_words (int): Minimum words per claim
+            max_words (int): Maximum words per claim
+
+        Returns:
+            list: Claims with claim_id, claim_text, claim_date, domain and target_source_id
+        """
+        rng = random.Random(f"{self.seed}-queries")
+        targets = self.sample_targets(documents, num_queries, rng)
+        claims = []
+        if not targets:
+            return claims
+        for claim_id in range(1, num_queries + 1):
+            doc = targets[(claim_id - 1) % len(targets)]
+            content = list(dict.fromkeys(word for word in re.findall(r"[a-z]+", doc['text'].lower())
+                                         if word not in STOP_WORDS and len(word) > 2))
+            n = rng.randint(min_words, max_words)
+            n_noise = sum(1 for _ in range(n) if rng.random() < noise_ratio)
+            words = rng.sample(content, min(len(content), n - n_noise))
+            words += rng.choices(self.vocabulary, cum_weights=self._cum_weights, k=n_noise)
+            rng.shuffle(words)
+            claims.append({
+                'claim_id': claim_id,
+                'claim_text': "I believe " + ' '.join(words) + '.',
+                'claim_date': doc['publication_date'],
+                'domain': doc['domain'],
+                'target_source_id': doc['source_id']
+            })
+        return claims
+
+def generate_corpus(num_documents, num_queries=0, seed=0, **options):
+    """
+    Generate a synthetic corpus and a query set.
+
+    Args:
+        num_documents (int): Number of articles
+        num_queries (int): Number of claims
+        seed (int): Random seed
+        **options: Keyword arguments for CorpusGenerator
+
+    Returns:
+        tuple: (myths_data, claims_data)
+    """
+    generator = CorpusGenerator(seed=seed, **options)
+    documents = generator.generate_documents(num_documents)
+    return documents, generator.generate_queries(documents, num_queries)
+
+def write_jsonl(records, path):
+    """
+    Write records as JSON lines.
+
+    Args:
+        records (iterable): JSON-serializable records
+        path (str): Output file
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+            count += 1
+    return count
+
+def write_jsonl_through(records, path):
+    """
+    Write records as JSON lines while passing them on.
+
+    Args:
+        records (iterable): JSON-serializable records
+        path (str): Output file, complete once the records are exhausted
+
+    Yields:
+        object: Each record, after it is written
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+            yield record
+
+def read_jsonl(path):
+    """
+    Read records written by write_jsonl.
+
+    Args:
+        path (str): Input file
+
+    Returns:
+        list: Records
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main(argv=None):
+    """Write a synthetic corpus and query set from the command line."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic myth corpus and claims for benchmarking")
+    parser.add_argument("documents", type=int, help="Number of articles (one passage each)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file for the articles")
+    parser.add_argument("--queries", type=int, default=0, help="Number of claims to generate")
+    parser.add_argument("--queries-output", default=None, help="JSONL file for the claims")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Vocabulary size")
+    parser.add_argument("--zipf", type=float, default=1.07, help="Zipf exponent of word frequencies")
+    args = parser.parse_args(argv)
+
+    if args.queries and not args.queries_output:
+        parser.error("--queries-output is required with --queries")
+
+    generator = CorpusGenerator(seed=args.seed, vocabulary_size=args.vocabulary, zipf_exponent=args.zipf)
+    # Stream so corpora larger than memory can be written; claims keep only their sampled targets
+    documents = generator.iter_documents(args.documents)
+    if args.queries:
+        claims = generator.generate_queries(write_jsonl_through(documents, args.output), args.queries)
+        write_jsonl(claims, args.queries_output)
+    else:
+        write_jsonl(documents, args.output)
+    print(f"Wrote {args.documents} articles to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ import string
 import json
 from io import StringIO
 from collections import defaultdict
+from metrics import span
 
 class DataProcessor:
     def __init__(self):
@@ -92,7 +93,8 @@ class DataProcessor:
         Returns:
             str: Processed claim text
         """
-        return self.clean_text(claim_text)
+        with span('clean_text'):
+            return self.clean_text(claim_text)
     
     def process_claims(self, claims_data):
         """
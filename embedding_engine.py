@@ -1,6 +1,194 @@
+import copy
+import gc
+import inspect
+import json
 import math
+import os
 import re
+import sys
+import tempfile
+import threading
+import time
+import weakref
 from collections import Counter
+from collections.abc import Sequence
+from types import MappingProxyType
+from metadata_store import MetadataStore, PassageFilter
+from metrics import inc, span
+
+# Bumped whenever the on-disk index layout changes
+INDEX_FORMAT = 1
+
+# Filter stop words (common words that don't add much meaning)
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 
+              'were', 'in', 'to', 'of', 'for', 'with', 'by', 'at', 'on', 
+              'from', 'that', 'this', 'these', 'those', 'it', 'its', 'as', 
+              'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 
+              'did', 'will', 'would', 'shall', 'should', 'can', 'could', 
+              'may', 'might', 'must', 'their', 'they', 'them', 'he', 'she', 
+              'him', 'her', 'his', 'hers', 'i', 'me', 'my', 'mine', 'we', 
+              'us', 'our', 'ours', 'you', 'your', 'yours', 'not'}
+
+def extract_keywords(text):
+    """
+    Extract keywords from text with simple tokenization.
+    
+    Args:
+        text (str): Text to extract keywords from
+        
+    Returns:
+        Counter: Counter of keywords and their frequencies
+    """
+    # Convert to lowercase and replace non-alphanumeric with spaces
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    
+    # Split into tokens
+    tokens = text.split()
+    
+    filtered_tokens = [token for token in tokens if token not in STOP_WORDS and len(token) > 2]
+    
+    # Count frequencies
+    return Counter(filtered_tokens)
+
+class PassageView(Sequence):
+    def __init__(self, records, metadata):
+        """
+        Read-only sequence of full passage dictionaries.
+
+        Each item is built on access from the passage's record and its
+        fields in the metadata store, so the index keeps one copy of them.
+
+        Args:
+            records (tuple): Passage dictionaries without the MetadataStore.FIELDS
+            metadata (MetadataStore): Columns holding those fields
+        """
+        self._records = records
+        self._metadata = metadata
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._records)))]
+        if i < 0:
+            i += len(self._records)
+        return {**self._records[i], **self._metadata.fields(i)}
+
+class IndexSnapshot:
+    def __init__(self, passages, keywords, version=None, annotations=None):
+        """
+        Initialize an immutable version of the search index.
+        
+        A snapshot is never modified after construction. Searches hold a
+        reference to one snapshot for their whole duration, so replacing the
+        engine's snapshot never affects queries already in flight.
+        
+        Args:
+            passages (list): Passage dictionaries; treated as read-only from now on
+            keywords (dict): Passage position -> Counter of keyword frequencies
+            version (str, optional): Version label
+            annotations (dict, optional): Claim analyzer annotations for these passages, stored
+                with the index (see ClaimAnalyzer.export_annotations)
+        """
+        passages = tuple(passages)
+        self.keywords = MappingProxyType(dict(keywords))
+        self.version = version
+        self.annotations = annotations
+        self.passage_ids = MappingProxyType({passage['passage_id']: i for i, passage in enumerate(passages)})
+        self.metadata = MetadataStore(passages)
+        # Source, domain and date live only in the metadata columns; passages reads them back
+        self.passage_records = tuple(
+            {key: value for key, value in passage.items() if key not in MetadataStore.FIELDS} for passage in passages
+        )
+        self.passages = PassageView(self.passage_records, self.metadata)
+    
+    def with_version(self, version, annotations=None):
+        """
+        Return the same index data under a different version label.
+        
+        Args:
+            version (str): Version label
+            annotations (dict, optional): Annotations replacing this snapshot's
+            
+        Returns:
+            IndexSnapshot: Snapshot sharing this snapshot's passages and keywords
+        """
+        snapshot = copy.copy(self)
+        snapshot.version = version
+        if annotations is not None:
+            snapshot.annotations = annotations
+        return snapshot
+
+def build_snapshot(passages, version=None, progress=None, progress_every=500):
+    """
+    Extract keywords for every passage and build an index snapshot.
+    
+    Args:
+        passages (list): Passage dictionaries containing 'text'
+        version (str, optional): Version label
+        progress (callable, optional): Called as progress(done, total) while building
+        progress_every (int): Passages between progress calls
+        
+    Returns:
+        IndexSnapshot: The new snapshot
+    """
+    total = len(passages)
+    keywords = {}
+    for i, passage in enumerate(passages):
+        keywords[i] = extract_keywords(passage['text'])
+        if progress is not None and (i + 1) % progress_every == 0:
+            progress(i + 1, total)
+    if progress is not None:
+        progress(total, total)
+    return IndexSnapshot(passages, keywords, version)
+
+def _deep_sizeof(obj, seen):
+    """
+    Total sys.getsizeof of an object and everything reachable through containers.
+    
+    Objects whose id is already in seen are not counted again, so one seen
+    set can be shared across calls to attribute shared objects only once.
+    
+    Args:
+        obj (object): Root object
+        seen (set): Ids of objects already counted; updated in place
+        
+    Returns:
+        int: Bytes
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, MappingProxyType):
+            # Count the mapping behind the read-only view
+            stack.extend(gc.get_referents(obj))
+            continue
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+def _process_rss():
+    """
+    Resident set size of this process.
+    
+    Returns:
+        int: Bytes, or None where /proc is not available
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
 
 class EmbeddingEngine:
     def __init__(self, model_name=None):
@@ -10,8 +198,74 @@ class EmbeddingEngine:
         Args:
             model_name (str, optional): Ignored, kept for compatibility
         """
-        self.passages = []
-        self.keywords = {}  # Will store keyword frequencies for each passage
+        self._snapshot = IndexSnapshot((), {})
+        self._swap_lock = threading.Lock()
+        self._swap_listeners = []
+    
+    @property
+    def snapshot(self):
+        """The current IndexSnapshot."""
+        return self._snapshot
+    
+    @property
+    def passages(self):
+        """Passages of the current snapshot."""
+        return self._snapshot.passages
+    
+    @property
+    def keywords(self):
+        """Read-only mapping of passage position to keyword frequencies in the current snapshot."""
+        return self._snapshot.keywords
+    
+    @property
+    def version(self):
+        """Version label of the current snapshot."""
+        return self._snapshot.version
+    
+    def add_swap_listener(self, callback):
+        """
+        Register a callback to prepare for a new snapshot before it goes live.
+        
+        The callback is called with the new snapshot's passages and stored
+        annotations, e.g. ClaimAnalyzer.index_passages. Bound methods are
+        held weakly so the engine does not keep their objects alive.
+        
+        Args:
+            callback (callable): callback(passages, annotations)
+        """
+        if inspect.ismethod(callback):
+            reference = weakref.WeakMethod(callback)
+        else:
+            reference = lambda: callback
+        with self._swap_lock:
+            self._swap_listeners.append(reference)
+    
+    def swap(self, snapshot):
+        """
+        Atomically replace the current snapshot (read-copy-update).
+        
+        Swap listeners run first, so dependent state is ready before any
+        new query sees the snapshot. Queries already running keep using the
+        snapshot they started with.
+        
+        Args:
+            snapshot (IndexSnapshot): The new snapshot
+            
+        Returns:
+            IndexSnapshot: The snapshot that was replaced
+        """
+        with self._swap_lock:
+            listeners = []
+            for reference in self._swap_listeners:
+                callback = reference()
+                if callback is not None:
+                    listeners.append(reference)
+                    callback(snapshot.passages, snapshot.annotations)
+            self._swap_listeners = listeners
+            
+            previous = self._snapshot
+            self._snapshot = snapshot
+        return previous
     
     def _extract_keywords(self, text):
         """
@@ -23,47 +277,215 @@ class EmbeddingEngine:
         Returns:
             Counter: Counter of keywords and their frequencies
         """
-        # Convert to lowercase and replace non-alphanumeric with spaces
-        text = text.lower()
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        
-        # Split into tokens
-        tokens = text.split()
-        
-        # Filter stop words (common words that don't add much meaning)
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'is', 'are', 'was', 
-                      'were', 'in', 'to', 'of', 'for', 'with', 'by', 'at', 'on', 
-                      'from', 'that', 'this', 'these', 'those', 'it', 'its', 'as', 
-                      'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 
-                      'did', 'will', 'would', 'shall', 'should', 'can', 'could', 
-                      'may', 'might', 'must', 'their', 'they', 'them', 'he', 'she', 
-                      'him', 'her', 'his', 'hers', 'i', 'me', 'my', 'mine', 'we', 
-                      'us', 'our', 'ours', 'you', 'your', 'yours', 'not'}
-        
-        filtered_tokens = [token for token in tokens if token not in stop_words and len(token) > 2]
-        
-        # Count frequencies
-        return Counter(filtered_tokens)
+        return extract_keywords(text)
     
     def create_embeddings(self, passages):
         """
         Process passages and extract keywords for each.
         
+        The new index is built off to the side and swapped in when complete.
+        
         Args:
             passages (list): List of dictionaries containing passage text and metadata
             
         Returns:
             bool: True if successful
         """
-        # Store passages for later retrieval
-        self.passages = passages
+        self.swap(build_snapshot(passages))
+        return True
+    
+    def save(self, path, version=None, annotations=None):
+        """
+        Write the index to disk atomically.
         
-        # Process each passage to extract keywords
-        for i, passage in enumerate(passages):
-            keywords = self._extract_keywords(passage['text'])
-            self.keywords[i] = keywords
+        The index is written to a temporary file in the same directory and
+        moved into place with os.replace, so readers never see a partial file.
         
-        return True
+        Args:
+            path (str): Destination file
+            version (str, optional): Version label stored with the index, defaults to a timestamp
+            annotations (dict, optional): Claim analyzer annotations to store, defaults to the
+                snapshot's; loaders pass them to ClaimAnalyzer.index_passages to skip re-annotating
+            
+        Returns:
+            str: The version label that was written
+        """
+        snapshot = self._snapshot
+        if not snapshot.keywords:
+            raise ValueError("Keywords not created. Call create_embeddings first.")
+        
+        version = version or str(time.time_ns())
+        data = {
+            'format': INDEX_FORMAT,
+            'version': version,
+            'passages': list(snapshot.passages),
+            'keywords': [snapshot.keywords[i] for i in range(len(snapshot.passages))]
+        }
+        annotations = annotations if annotations is not None else snapshot.annotations
+        if annotations is not None:
+            data['annotations'] = annotations
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.index-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        # Relabel without rebuilding, unless another snapshot was swapped in meanwhile
+        with self._swap_lock:
+            if self._snapshot is snapshot:
+                self._snapshot = snapshot.with_version(version, annotations)
+        return version
+    
+    @staticmethod
+    def load_snapshot(path):
+        """
+        Read an index written by save into a snapshot.
+        
+        Args:
+            path (str): Index file
+            
+        Returns:
+            IndexSnapshot: The loaded snapshot
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format {data.get('format')} in {path}")
+        
+        keywords = {i: Counter(keywords) for i, keywords in enumerate(data['keywords'])}
+        # Repeated source, domain and date values are kept once, in the snapshot's metadata columns
+        return IndexSnapshot(data['passages'], keywords, data['version'], data.get('annotations'))
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save.
+        
+        Args:
+            path (str): Index file
+            
+        Returns:
+            EmbeddingEngine: Engine ready for search
+        """
+        engine = cls()
+        engine.swap(cls.load_snapshot(path))
+        return engine
+    
+    def get_passage(self, passage_id):
+        """
+        Look up a passage by its passage_id.
+        
+        Args:
+            passage_id (str): Passage identifier assigned by DataProcessor
+            
+        Returns:
+            dict: The passage, or None if it is not in the index
+        """
+        snapshot = self._snapshot
+        i = snapshot.passage_ids.get(passage_id)
+        return None if i is None else snapshot.passages[i]
+    
+    def memory_report(self, target_passages=None, caches=None):
+        """
+        Break down the memory held by the current index by component.
+        
+        Sizes come from a deep sys.getsizeof walk. Objects shared between
+        components are counted once, in the first component that reaches
+        them, in this order: passage texts, passage metadata, keyword
+        strings, keyword counters, passage id index, metadata columns,
+        annotations loaded with the index, then each cache.
+        Keyword strings are the words held as Counter keys; every passage
+        keeps its own copies, so they are reported next to the size the
+        distinct vocabulary would take if it were stored once.
+        
+        Projections scale the per-passage components linearly and the
+        vocabulary by Heaps' law, with the exponent estimated from how the
+        vocabulary grows between the first half of the index and all of it.
+        Keyword strings beyond one copy per distinct word (an index built in
+        memory; a loaded one shares them) are projected as per-passage.
+        
+        Args:
+            target_passages (int or list, optional): Corpus size(s) to project memory use for
+            caches (dict, optional): Name -> object for other per-index structures to include,
+                e.g. {'claim_annotations': analyzer.passage_annotations}
+        
+        Returns:
+            dict: Report with passages, components (bytes), total_bytes, bytes_per_passage,
+                vocabulary, process_rss_bytes and projections
+        """
+        snapshot = self._snapshot
+        records = snapshot.passage_records
+        n = len(records)
+        seen = set()
+        
+        components = {}
+        components['passage_texts'] = sum(_deep_sizeof(record['text'], seen) for record in records)
+        components['passage_metadata'] = _deep_sizeof(records, seen)
+        components['keyword_strings'] = sum(
+            _deep_sizeof(word, seen) for keywords in snapshot.keywords.values() for word in keywords
+        )
+        components['keyword_counters'] = _deep_sizeof(snapshot.keywords, seen)
+        components['passage_id_index'] = _deep_sizeof(snapshot.passage_ids, seen)
+        components['metadata_columns'] = _deep_sizeof(vars(snapshot.metadata), seen)
+        components['stored_annotations'] = _deep_sizeof(snapshot.annotations, seen)
+        for name, cache in (caches or {}).items():
+            components[name] = _deep_sizeof(cache, seen)
+        total = sum(components.values())
+        
+        # Vocabulary growth between half and all of the index gives the Heaps' law exponent
+        half_vocabulary = set()
+        for i in range(n // 2):
+            half_vocabulary.update(snapshot.keywords[i])
+        vocabulary = set(half_vocabulary)
+        for i in range(n // 2, n):
+            vocabulary.update(snapshot.keywords[i])
+        heaps_exponent = None
+        if len(half_vocabulary) > 0 and len(vocabulary) > len(half_vocabulary):
+            heaps_exponent = math.log(len(vocabulary) / len(half_vocabulary)) / math.log(n / (n // 2))
+        interned_bytes = sum(sys.getsizeof(word) for word in vocabulary)
+        
+        report = {
+            'passages': n,
+            'version': snapshot.version,
+            'components': components,
+            'total_bytes': total,
+            'bytes_per_passage': round(total / n, 1) if n else 0.0,
+            'vocabulary': {
+                'distinct_keywords': len(vocabulary),
+                'heaps_exponent': round(heaps_exponent, 3) if heaps_exponent is not None else None,
+                'interned_bytes': interned_bytes
+            },
+            'process_rss_bytes': _process_rss(),
+            'projections': []
+        }
+        
+        if target_passages is None or n == 0:
+            return report
+        if isinstance(target_passages, int):
+            target_passages = [target_passages]
+        for target in target_passages:
+            scale = target / n
+            exponent = heaps_exponent if heaps_exponent is not None else 1.0
+            projected = {name: int(size * scale) for name, size in components.items()}
+            duplicate_bytes = max(0, components['keyword_strings'] - interned_bytes)
+            projected['keyword_strings'] = int(min(interned_bytes, components['keyword_strings']) * scale ** exponent
+                                               + duplicate_bytes * scale)
+            report['projections'].append({
+                'passages': target,
+                'components': projected,
+                'total_bytes': sum(projected.values()),
+                'distinct_keywords': int(len(vocabulary) * scale ** exponent),
+                'interned_vocabulary_bytes': int(interned_bytes * scale ** exponent)
+            })
+        return report
     
     def get_embedding(self, text):
         """
@@ -78,62 +500,64 @@ class EmbeddingEngine:
         # Extract keywords from the query text
         return self._extract_keywords(text)
     
-    def search(self, query_keywords, k=5, domain_filter=None):
+    def search(self, query_keywords, k=5, domain_filter=None, passage_filter=None):
         """
         Search for similar passages using keyword matching.
         
+        Filters are applied to the metadata columns before scoring, so only
+        passages that pass them are scored.
+        
         Args:
             query_keywords (Counter): Query keyword frequencies
             k (int): Number of results to return
             domain_filter (str, optional): Domain to filter results by
+            passage_filter (PassageFilter, optional): Domains, date range and sources to restrict results to
             
         Returns:
             list: List of dictionaries with passage info and similarity scores
         """
-        if not self.keywords:
+        # Use one snapshot throughout, even if a new one is swapped in meanwhile
+        snapshot = self._snapshot
+        if not snapshot.keywords:
             raise ValueError("Keywords not created. Call create_embeddings first.")
         
-        # Calculate similarity scores using dot product of term frequencies
-        similarity_scores = []
-        for idx, passage_keywords in self.keywords.items():
-            score = 0
-            # Calculate dot product
-            for word, query_count in query_keywords.items():
-                passage_count = passage_keywords.get(word, 0)
-                score += query_count * passage_count
-            
-            # Normalize by document lengths using cosine similarity formula
-            query_magnitude = math.sqrt(sum(c*c for c in query_keywords.values()))
-            passage_magnitude = math.sqrt(sum(c*c for c in passage_keywords.values()))
-            
-            # Avoid division by zero
-            magnitude_product = query_magnitude * passage_magnitude
-            if magnitude_product > 0:
-                score = score / magnitude_product
+        with span('search'):
+            mask = snapshot.metadata.select(passage_filter)
+            if domain_filter:
+                domain_mask = snapshot.metadata.select(PassageFilter(domains=[domain_filter]))
+                mask = domain_mask if mask is None else mask & domain_mask
+            if mask is None:
+                candidates = snapshot.keywords.items()
+                inc('claimcheck_search_candidates_total', len(snapshot.keywords))
             else:
+                positions = snapshot.metadata.positions(mask)
+                candidates = ((idx, snapshot.keywords[idx]) for idx in positions)
+                inc('claimcheck_search_candidates_total', len(positions))
+            
+            # Calculate similarity scores using dot product of term frequencies
+            similarity_scores = []
+            for idx, passage_keywords in candidates:
                 score = 0
+                # Calculate dot product
+                for word, query_count in query_keywords.items():
+                    passage_count = passage_keywords.get(word, 0)
+                    score += query_count * passage_count
                 
-            similarity_scores.append((idx, score))
-        
-        # Sort by similarity (descending)
-        similarity_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        # Process results
-        results = []
-        for idx, similarity in similarity_scores:
-            passage = self.passages[idx]
-            
-            # Filter by domain if specified
-            if domain_filter and passage['domain'] != domain_filter:
-                continue
+                # Normalize by document lengths using cosine similarity formula
+                query_magnitude = math.sqrt(sum(c*c for c in query_keywords.values()))
+                passage_magnitude = math.sqrt(sum(c*c for c in passage_keywords.values()))
+                
+                # Avoid division by zero
+                magnitude_product = query_magnitude * passage_magnitude
+                if magnitude_product > 0:
+                    score = score / magnitude_product
+                else:
+                    score = 0
+                    
+                similarity_scores.append((idx, score))
             
-            results.append({
-                **passage,
-                'similarity': similarity
-            })
+            # Sort by similarity (descending)
+            similarity_scores.sort(key=lambda x: x[1], reverse=True)
             
-            # Stop once we have enough results after filtering
-            if len(results) >= k:
-                break
-        
-        return results
+            # Process results
+            return [{**snapshot.passages[idx], 'similarity': similarity} for idx, similarity in similarity_scores[:k]]
@@ -0,0 +1,306 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+
+# Spilled entries of sessions idle this long are deleted by the next sweep
+SESSION_TTL = 24 * 3600
+# Spilled entries kept in the database across all sessions
+MAX_SPILLED_ENTRIES = 100000
+# Spills between sweeps
+SWEEP_INTERVAL = 100
+
+def _release_session(conn, session_id):
+    """
+    Delete a session's spilled entries and close its connection.
+
+    Args:
+        conn (sqlite3.Connection): The session's connection
+        session_id (str): Owner of the entries
+    """
+    try:
+        conn.execute("DELETE FROM claim_history WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM claim_history_sessions WHERE session_id = ?", (session_id,))
+    except sqlite3.Error as e:
+        print(f"Warning: Could not delete spilled history of session {session_id}: {e}")
+    finally:
+        conn.close()
+
+class ClaimHistoryStore:
+    def __init__(self, max_entries=50, spill_path=None, session_id=None, session_ttl=SESSION_TTL,
+                 max_spilled_entries=MAX_SPILLED_ENTRIES):
+        """
+        Initialize a bounded history of analyzed claims.
+
+        Entries keep the claim, verdict, confidence, explanation and the
+        passage_id and similarity of each evidence passage, not the passage
+        text; resolve_evidence looks the text up in the index when needed.
+        Only the newest max_entries are kept in memory. Older entries are
+        dropped, or moved to SQLite when spill_path is given.
+
+        The spill file is shared by all sessions. A session's rows are deleted
+        and its connection closed by close, or when the store is garbage
+        collected, e.g. after Streamlit drops an ended session's state. Rows
+        left by a process that exited abruptly are removed by sweeps, which
+        run when a store opens the file and every SWEEP_INTERVAL spills. A
+        sweep deletes the rows of sessions idle longer than session_ttl, then
+        the oldest rows beyond max_spilled_entries.
+
+        Args:
+            max_entries (int): Entries kept in memory
+            spill_path (str, optional): SQLite file for entries older than max_entries
+            session_id (str, optional): Owner of the spilled entries, defaults to a random id
+            session_ttl (float): Seconds of inactivity after which a session's spilled entries are deleted
+            max_spilled_entries (int): Spilled entries kept across all sessions
+        """
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self.session_id = session_id or uuid.uuid4().hex
+        self.session_ttl = session_ttl
+        self.max_spilled_entries = max_spilled_entries
+
+        self._entries = deque()
+        self._next_id = 0
+        self._spilled = 0
+        self._spills_since_sweep = 0
+        self._last_seen = 0.0
+        self._lock = threading.Lock()
+
+        self._conn = None
+        if spill_path is not None:
+            directory = os.path.dirname(os.path.abspath(spill_path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(spill_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claim_history ("
+                "session_id TEXT NOT NULL, entry_id INTEGER NOT NULL, entry TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, entry_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claim_history_sessions (session_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+            )
+            self._finalizer = weakref.finalize(self, _release_session, self._conn, self.session_id)
+            with self._lock:
+                self._touch()
+                self._sweep()
+
+    def _touch(self):
+        """Record that this session is active. Caller holds the lock."""
+        now = time.time()
+        # A session idle past its TTL may have been swept by another one
+        if now - self._last_seen > self.session_ttl:
+            self._count_spilled()
+        # Writing once a minute is enough for a TTL measured in hours
+        if now - self._last_seen >= 60:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO claim_history_sessions (session_id, last_seen) VALUES (?, ?)",
+                (self.session_id, now)
+            )
+            self._last_seen = now
+
+    def _count_spilled(self):
+        """Recount this session's spilled entries after a sweep. Caller holds the lock."""
+        self._spilled = self._conn.execute(
+            "SELECT COUNT(*) FROM claim_history WHERE session_id = ?", (self.session_id,)
+        ).fetchone()[0]
+
+    def _sweep(self):
+        """Delete spilled entries of idle sessions and the oldest beyond the limit. Caller holds the lock."""
+        cutoff = time.time() - self.session_ttl
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "DELETE FROM claim_history WHERE session_id IN "
+                "(SELECT session_id FROM claim_history_sessions WHERE last_seen < ?)", (cutoff,)
+            )
+            # Rows of sessions that never registered (older files) are expired too
+            self._conn.execute(
+                "DELETE FROM claim_history WHERE session_id NOT IN (SELECT session_id FROM claim_history_sessions)"
+            )
+            self._conn.execute("DELETE FROM claim_history_sessions WHERE last_seen < ?", (cutoff,))
+            # Row ids grow with each insert, so the smallest belong to the oldest spills
+            self._conn.execute(
+                "DELETE FROM claim_history WHERE rowid IN (SELECT rowid FROM claim_history ORDER BY rowid LIMIT "
+                "max(0, (SELECT COUNT(*) FROM claim_history) - ?))", (self.max_spilled_entries,)
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._count_spilled()
+        self._spills_since_sweep = 0
+
+    def __len__(self):
+        """Number of entries, including spilled ones."""
+        with self._lock:
+            return self._spilled + len(self._entries)
+
+    def add(self, claim, verdict, confidence, explanation, evidence_passages):
+        """
+        Record an analyzed claim.
+
+        Args:
+            claim (str): The claim as entered
+            verdict (str): The verdict
+            confidence (float): Verdict confidence
+            explanation (str): The explanation shown to the user
+            evidence_passages (list): Retrieved passages with passage_id and similarity
+
+        Returns:
+            int: Id of the new entry
+        """
+        entry = {
+            'claim': claim,
+            'verdict': verdict,
+            'confidence': confidence,
+            'explanation': explanation,
+            'evidence': [(passage['passage_id'], passage['similarity']) for passage in evidence_passages],
+            'timestamp': time.time()
+        }
+
+        with self._lock:
+            entry['id'] = self._next_id
+            self._next_id += 1
+            self._entries.append(entry)
+
+            while len(self._entries) > self.max_entries:
+                oldest = self._entries.popleft()
+                if self._conn is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO claim_history (session_id, entry_id, entry) VALUES (?, ?, ?)",
+                        (self.session_id, oldest['id'], json.dumps(oldest))
+                    )
+                    self._spilled += 1
+                    self._spills_since_sweep += 1
+
+            if self._conn is not None:
+                self._touch()
+                if self._spills_since_sweep >= SWEEP_INTERVAL:
+                    self._sweep()
+
+        return entry['id']
+
+    def page(self, page_number=0, page_size=10):
+        """
+        Return one page of entries, newest first.
+
+        Args:
+            page_number (int): Zero-based page number
+            page_size (int): Entries per page
+
+        Returns:
+            list: Entry dictionaries
+        """
+        start = page_number * page_size
+        stop = start + page_size
+
+        with self._lock:
+            in_memory = len(self._entries)
+            # Newest entries come from memory
+            entries = [self._entries[in_memory - 1 - i] for i in range(start, min(stop, in_memory))]
+
+            if self._conn is not None:
+                self._touch()
+            if stop > in_memory and self._spilled:
+                offset = max(0, start - in_memory)
+                rows = self._conn.execute(
+                    "SELECT entry FROM claim_history WHERE session_id = ? ORDER BY entry_id DESC LIMIT ? OFFSET ?",
+                    (self.session_id, stop - max(start, in_memory), offset)
+                ).fetchall()
+                entries.extend(self._decode(row[0]) for row in rows)
+                # Fewer rows than expected means a sweep removed some of ours
+                if len(rows) < stop - max(start, in_memory) and offset + len(rows) < self._spilled:
+                    self._count_spilled()
+
+        return entries
+
+    def page_count(self, page_size=10):
+        """
+        Number of pages of the given size.
+
+        Args:
+            page_size (int): Entries per page
+
+        Returns:
+            int: Page count, at least 1
+        """
+        return max(1, -(-len(self) // page_size))
+
+    def get(self, entry_id):
+        """
+        Look up an entry by id.
+
+        Args:
+            entry_id (int): Id returned by add
+
+        Returns:
+            dict: The entry, or None if it was dropped or never existed
+        """
+        with self._lock:
+            if self._entries and entry_id >= self._entries[0]['id']:
+                position = entry_id - self._entries[0]['id']
+                return self._entries[position] if position < len(self._entries) else None
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT entry FROM claim_history WHERE session_id = ? AND entry_id = ?", (self.session_id, entry_id)
+            ).fetchone()
+        return None if row is None else self._decode(row[0])
+
+    def _decode(self, data):
+        """
+        Decode a spilled entry.
+
+        Args:
+            data (str): JSON-encoded entry
+
+        Returns:
+            dict: The entry with evidence as (passage_id, similarity) tuples
+        """
+        entry = json.loads(data)
+        entry['evidence'] = [tuple(ref) for ref in entry['evidence']]
+        return entry
+
+    @staticmethod
+    def resolve_evidence(entry, embedding_engine):
+        """
+        Look up the full evidence passages of an entry in the index.
+
+        Passages that are no longer in the index are skipped.
+
+        Args:
+            entry (dict): History entry
+            embedding_engine (EmbeddingEngine): Index to resolve passage ids against
+
+        Returns:
+            list: Passage dictionaries with their recorded similarity
+        """
+        passages = []
+        for passage_id, similarity in entry['evidence']:
+            passage = embedding_engine.get_passage(passage_id)
+            if passage is not None:
+                passages.append({**passage, 'similarity': similarity})
+        return passages
+
+    def clear(self):
+        """Remove all entries, including spilled ones."""
+        with self._lock:
+            self._entries.clear()
+            self._spilled = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM claim_history WHERE session_id = ?", (self.session_id,))
+
+    def close(self):
+        """Delete this session's spilled entries and close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._entries.clear()
+                self._spilled = 0
+                self._finalizer()
+                self._conn = None
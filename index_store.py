@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from data_processor import DataProcessor
+from embedding_engine import EmbeddingEngine, build_snapshot
+from claim_analyzer import ClaimAnalyzer
+from sample_data_generator import generate_myths_data
+
+DEFAULT_INDEX_PATH = os.getenv("CLAIM_INDEX_PATH", "claim_index.json")
+
+def build_index(myths_data=None):
+    """
+    Process myth articles and build a search index over their passages.
+    
+    Args:
+        myths_data (list, optional): Myth articles, defaults to the bundled sample data
+        
+    Returns:
+        EmbeddingEngine: Engine ready for search
+    """
+    if myths_data is None:
+        myths_data = generate_myths_data()
+    
+    passages = DataProcessor().process_texts(myths_data)
+    engine = EmbeddingEngine()
+    engine.create_embeddings(passages)
+    return engine
+
+def default_annotations(passages):
+    """
+    Compute the annotations a default ClaimAnalyzer would make, for saving with an index.
+    
+    Args:
+        passages (list): Passages in index order
+        
+    Returns:
+        dict: Output of ClaimAnalyzer.export_annotations
+    """
+    return ClaimAnalyzer(use_llm=False).export_annotations(passages)
+
+def index_version(path):
+    """
+    Cheap marker that changes whenever the index file is replaced.
+    
+    Args:
+        path (str): Index file
+        
+    Returns:
+        tuple: (inode, size, mtime_ns), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def load_or_build_index(path=DEFAULT_INDEX_PATH, myths_data=None):
+    """
+    Load the index from disk, building and saving it first if it is missing.
+    
+    Args:
+        path (str): Index file
+        myths_data (list, optional): Myth articles used if the index has to be built
+        
+    Returns:
+        EmbeddingEngine: Engine ready for search
+    """
+    if os.path.exists(path):
+        try:
+            return EmbeddingEngine.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not load index from {path}: {e}. Rebuilding.")
+    
+    engine = build_index(myths_data)
+    try:
+        engine.save(path, annotations=default_annotations(engine.passages))
+    except OSError as e:
+        print(f"Warning: Could not save index to {path}: {e}")
+    return engine
+
+class BackgroundIndexBuilder:
+    def __init__(self, embedding_engine, save_path=None):
+        """
+        Initialize a builder that re-indexes a corpus on a background thread.
+
+        The new index is built as a separate snapshot while the engine keeps
+        serving the current one, then swapped in atomically. Progress can be
+        polled from any thread.
+
+        Args:
+            embedding_engine (EmbeddingEngine): Engine whose snapshot is replaced
+            save_path (str, optional): Also write each new index here, e.g. for the API server to pick up
+        """
+        self.embedding_engine = embedding_engine
+        self.save_path = save_path
+        self._lock = threading.Lock()
+        self._thread = None
+        self._progress = {'state': 'idle', 'done': 0, 'total': 0, 'version': None, 'error': None,
+                          'started': None, 'finished': None}
+
+    @property
+    def progress(self):
+        """
+        Current build progress.
+
+        Returns:
+            dict: 'state' ('idle', 'processing', 'indexing', 'activating', 'saving', 'done' or 'failed'),
+                'done' and 'total' items of the current stage, 'version', 'error', 'started' and 'finished'
+        """
+        with self._lock:
+            return dict(self._progress)
+
+    def _update(self, **changes):
+        """
+        Update progress fields.
+
+        Args:
+            **changes: Fields to set
+        """
+        with self._lock:
+            self._progress.update(changes)
+
+    def is_running(self):
+        """
+        Check whether a build is in progress.
+
+        Returns:
+            bool: True while the background thread is running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, myths_data=None, passages=None):
+        """
+        Start building a new index in the background.
+
+        Args:
+            myths_data (list, optional): Myth articles to process, defaults to the bundled sample data
+            passages (list, optional): Already processed passages; skips processing when given
+
+        Returns:
+            bool: False if a build is already running
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._progress = {'state': 'processing', 'done': 0, 'total': 0, 'version': None, 'error': None,
+                              'started': time.time(), 'finished': None}
+            self._thread = threading.Thread(target=self._run, args=(myths_data, passages),
+                                            name="index-builder", daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Wait for the current build to finish.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            bool: True if no build is running any more
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.is_running()
+
+    def _run(self, myths_data, passages):
+        """
+        Build, swap in and optionally save a new index snapshot.
+
+        Args:
+            myths_data (list, optional): Myth articles to process
+            passages (list, optional): Already processed passages
+        """
+        try:
+            if passages is None:
+                if myths_data is None:
+                    myths_data = generate_myths_data()
+                data_processor = DataProcessor()
+                passages = []
+                self._update(total=len(myths_data))
+                for i, doc in enumerate(myths_data):
+                    passages.extend(data_processor.process_texts([doc]))
+                    self._update(done=i + 1)
+
+            self._update(state='indexing', done=0, total=len(passages))
+            snapshot = build_snapshot(passages, version=str(time.time_ns()),
+                                      progress=lambda done, total: self._update(done=done))
+            # Annotated once here, so swap listeners and later loads of the saved file can reuse them
+            snapshot = snapshot.with_version(snapshot.version, default_annotations(snapshot.passages))
+
+            # Swap listeners (e.g. claim analyzers) re-annotate here, before queries see the new index
+            self._update(state='activating', version=snapshot.version)
+            self.embedding_engine.swap(snapshot)
+
+            if self.save_path is not None:
+                self._update(state='saving')
+                self.embedding_engine.save(self.save_path, version=snapshot.version)
+
+            self._update(state='done', finished=time.time())
+        except Exception as e:
+            print(f"Warning: Background index build failed: {e}")
+            self._update(state='failed', error=str(e), finished=time.time())
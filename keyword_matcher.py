@@ -0,0 +1,186 @@
+from collections import deque
+
+class KeywordMatcher:
+    def __init__(self, keywords, word_boundary=False):
+        """
+        Compile an Aho-Corasick automaton for multi-pattern keyword matching.
+
+        Args:
+            keywords (list): Keywords and phrases to search for
+            word_boundary (bool): Only report hits that start and end on word boundaries
+        """
+        self.keywords = list(keywords)
+        self.word_boundary = word_boundary
+
+        # Trie transitions, failure links and per-state output (keyword indices)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for index, keyword in enumerate(self.keywords):
+            self._add_keyword(keyword, index)
+
+        self._build_failure_links()
+
+    def _add_keyword(self, keyword, index):
+        """
+        Insert a keyword into the trie.
+
+        Args:
+            keyword (str): The keyword to insert
+            index (int): Position of the keyword in the keyword list
+        """
+        if not keyword:
+            return
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                # Follow failure links until a state with a matching transition
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+
+                # A state also matches everything its failure state matches
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _is_boundary(self, text, start, end):
+        """
+        Check whether text[start:end] is delimited by word boundaries.
+
+        Args:
+            text (str): The searched text
+            start (int): Start offset of the hit
+            end (int): End offset of the hit (exclusive)
+
+        Returns:
+            bool: True if the hit is a whole word or phrase
+        """
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+        return True
+
+    def find_all(self, text):
+        """
+        Find every keyword occurrence in a single pass over the text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: List of (start_offset, keyword_index) tuples in order of match end
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        hits = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for index in output[state]:
+                start = position + 1 - len(self.keywords[index])
+                if self.word_boundary and not self._is_boundary(text, start, position + 1):
+                    continue
+                hits.append((start, index))
+
+        return hits
+
+    def match_mask(self, text):
+        """
+        Return a bitset of the keywords present in the text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            int: Bitset where bit i is set if keywords[i] occurs in the text
+        """
+        mask = 0
+        for _, index in self.find_all(text):
+            mask |= 1 << index
+        return mask
+
+    def keywords_in_mask(self, mask):
+        """
+        Decode a bitset from match_mask into keywords, in keyword-list order.
+
+        Args:
+            mask (int): Bitset produced by match_mask
+
+        Returns:
+            list: Matched keywords
+        """
+        return [self.keywords[index] for index in self.indices_in_mask(mask)]
+
+    @staticmethod
+    def indices_in_mask(mask):
+        """
+        List the set bits of a bitset, visiting only the set bits.
+
+        Args:
+            mask (int): Bitset produced by match_mask
+
+        Returns:
+            list: Keyword indices in ascending order
+        """
+        indices = []
+        while mask:
+            low_bit = mask & -mask
+            indices.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return indices
+
+    @staticmethod
+    def mask_from_indices(indices):
+        """
+        Build a bitset from keyword indices, the inverse of indices_in_mask.
+
+        Args:
+            indices (iterable): Keyword indices
+
+        Returns:
+            int: Bitset with bit i set for each index i
+        """
+        mask = 0
+        for index in indices:
+            mask |= 1 << index
+        return mask
+
+    def matched_keywords(self, text):
+        """
+        Return the distinct keywords present in the text, in keyword-list order.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: Matched keywords
+        """
+        return self.keywords_in_mask(self.match_mask(text))
@@ -0,0 +1,668 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+import requests
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limiting and "model loading"/overload
+RETRY_STATUS_CODES = (429, 503)
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+def get_shared_session(pool_size=10):
+    """
+    Get a process-wide pooled HTTP session.
+
+    Sessions keep connections alive between requests, so repeated calls to the
+    same endpoint reuse the TCP/TLS connection instead of handshaking again.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: Shared session for the given pool size
+    """
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_sessions[pool_size] = session
+        return session
+
+class LLMServiceError(Exception):
+    """Raised when the LLM endpoint returns an unusable response."""
+
+class DeadlineExceeded(LLMServiceError):
+    """Raised when a request cannot finish before its deadline."""
+
+def remaining_time(deadline):
+    """
+    Seconds left until a deadline.
+
+    Args:
+        deadline (float, optional): Absolute time.monotonic() deadline
+
+    Returns:
+        float: Seconds remaining (may be negative), or None without a deadline
+    """
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+class LLMBackend:
+    """
+    Interface for text-generation backends used by LLMService.
+
+    Backends receive backend-neutral generation parameters
+    (max_new_tokens, do_sample, temperature, top_p) and raise
+    LLMServiceError when a request fails.
+    """
+    name = "base"
+
+    def generate(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """
+        Generate text for a single prompt.
+
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            str: Generated text
+        """
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, parameters, priority="interactive", tenant="default", deadline=None):
+        """
+        Generate text for several prompts; sends them one at a time unless overridden.
+
+        Args:
+            prompts (list): Input text prompts
+            parameters (dict): Generation parameters shared by all prompts
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            list: Generated text for each prompt, in order
+        """
+        return [self.generate(prompt, parameters, priority, tenant, deadline) for prompt in prompts]
+
+    def stream(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """
+        Generate text, yielding chunks as they become available.
+
+        Backends without streaming yield the whole response as one chunk.
+
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Yields:
+            str: Chunks of generated text
+        """
+        yield self.generate(prompt, parameters, priority, tenant, deadline)
+
+class HTTPBackend(LLMBackend):
+    def __init__(self, api_url, headers=None, pool_size=10, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=3, backoff_factor=0.5, backoff_max=30.0, scheduler=None):
+        """
+        Initialize a backend that talks to an HTTP endpoint.
+
+        Args:
+            api_url (str): Endpoint URL
+            headers (dict, optional): Request headers
+            pool_size (int): Size of the shared HTTP connection pool
+            connect_timeout (float): Seconds to wait for a connection to be established
+            read_timeout (float): Seconds to wait for the endpoint to respond
+            max_retries (int): Retries on connection errors and 429/503 responses
+            backoff_factor (float): Base delay in seconds for exponential backoff
+            backoff_max (float): Upper bound on a single backoff delay in seconds
+            scheduler (PriorityScheduler, optional): Rate limiter and priority queue for outgoing requests
+        """
+        self.api_url = api_url
+        self.headers = headers or {"Content-Type": "application/json"}
+        self.session = get_shared_session(pool_size)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.scheduler = scheduler
+
+    def _backoff_delay(self, attempt, response=None):
+        """
+        Compute how long to wait before retrying.
+
+        Uses exponential backoff with full jitter, but waits at least as long
+        as the server asks for via Retry-After or Hugging Face's estimated_time.
+
+        Args:
+            attempt (int): Zero-based retry attempt
+            response (requests.Response, optional): The response that triggered the retry
+
+        Returns:
+            float: Delay in seconds
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+
+        if response is not None:
+            hint = response.headers.get("Retry-After")
+            if hint is None:
+                try:
+                    hint = response.json().get("estimated_time")
+                except (ValueError, AttributeError):
+                    hint = None
+            try:
+                delay = max(delay, min(float(hint), self.backoff_max))
+            except (TypeError, ValueError):
+                pass
+
+        return delay
+
+    def _send(self, payload, priority, tenant, stream=False, deadline=None):
+        """
+        Send a single POST, waiting for a scheduler slot first if one is configured.
+
+        The slot is released once the response has arrived, or for a streamed
+        response, which is still being generated when its headers arrive, once
+        the response is closed.
+
+        Args:
+            payload (dict): JSON request body
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            stream (bool): Return as soon as headers arrive and stream the body
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            requests.Response: The response
+        """
+        if self.scheduler is None:
+            return self._request(payload, stream, deadline)
+        try:
+            self.scheduler.acquire(priority, tenant, timeout=remaining_time(deadline))
+        except TimeoutError:
+            raise DeadlineExceeded("Deadline passed while waiting for a request slot")
+        try:
+            response = self._request(payload, stream, deadline)
+        except BaseException:
+            self.scheduler.release()
+            raise
+        if not stream:
+            self.scheduler.release()
+            return response
+        return _release_on_close(response, self.scheduler)
+
+    def _request(self, payload, stream, deadline):
+        """
+        Issue the HTTP request with timeouts capped by the deadline.
+
+        Args:
+            payload (dict): JSON request body
+            stream (bool): Return as soon as headers arrive and stream the body
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            requests.Response: The response
+        """
+        timeout = self.timeout
+        remaining = remaining_time(deadline)
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceeded("Deadline passed before the request was sent")
+            timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+        return self.session.post(self.api_url, headers=self.headers, json=payload, timeout=timeout, stream=stream)
+
+    def _sleep_before_retry(self, delay, deadline):
+        """
+        Sleep before a retry unless that would run past the deadline.
+
+        Args:
+            delay (float): Backoff delay in seconds
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+        """
+        remaining = remaining_time(deadline)
+        if remaining is not None and delay >= remaining:
+            raise DeadlineExceeded("Deadline would pass before the next retry")
+        time.sleep(delay)
+
+    def _post(self, payload, priority="interactive", tenant="default", stream=False, deadline=None):
+        """
+        POST a payload to the endpoint, retrying transient failures.
+
+        Args:
+            payload (dict): JSON request body
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            stream (bool): Return as soon as headers arrive and stream the body
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            requests.Response: The final response
+
+        Raises:
+            LLMServiceError: If the final response has a non-200 status
+            DeadlineExceeded: If the deadline passes before a response arrives
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._send(payload, priority, tenant, stream, deadline)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                remaining = remaining_time(deadline)
+                if remaining is not None and remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline passed waiting for the endpoint: {e}")
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep_before_retry(self._backoff_delay(attempt), deadline)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, response)
+                response.close()
+                self._sleep_before_retry(delay, deadline)
+                continue
+
+            if response.status_code != 200:
+                message = response.text
+                response.close()
+                raise LLMServiceError(f"API returned status code {response.status_code}. Message: {message}")
+
+            return response
+
+    def _iter_events(self, response):
+        """
+        Yield the data fields of a server-sent events response.
+
+        Args:
+            response (requests.Response): Streaming response
+
+        Yields:
+            dict: Decoded JSON event data
+        """
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            event = json.loads(data)
+            if "error" in event:
+                raise LLMServiceError(str(event["error"]))
+            yield event
+
+class HuggingFaceBackend(HTTPBackend):
+    name = "huggingface"
+
+    def __init__(self, model_id, api_url=None, api_key=None, **http_options):
+        """
+        Initialize a backend for the Hugging Face Inference API.
+
+        Args:
+            model_id (str): Model identifier on Hugging Face
+            api_url (str, optional): Endpoint URL, defaults to the Inference API URL for model_id
+            api_key (str, optional): API key, defaults to the HUGGINGFACE_API_KEY environment variable
+            **http_options: Connection, retry and scheduling options for HTTPBackend
+        """
+        if api_key is None:
+            api_key = os.getenv('HUGGINGFACE_API_KEY', '')
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        super().__init__(api_url or f"https://api-inference.huggingface.co/models/{model_id}", headers,
+                         **http_options)
+        self.model_id = model_id
+
+    def _parse_result(self, item):
+        """
+        Extract generated text from one result entry.
+
+        Args:
+            item (object): A result entry, possibly a list of candidates
+
+        Returns:
+            str: Generated text
+        """
+        # Batched pipelines return one list of candidates per input
+        if isinstance(item, list):
+            item = item[0] if item else {}
+        if isinstance(item, dict):
+            return item.get("generated_text", "").strip()
+        return str(item)
+
+    def generate(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Generate text for a single prompt. See LLMBackend.generate."""
+        payload = {
+            "inputs": prompt,
+            "parameters": parameters
+        }
+
+        result = self._post(payload, priority, tenant, deadline=deadline).json()
+        # Format might vary based on model, adjust as needed
+        if isinstance(result, list) and len(result) > 0:
+            return self._parse_result(result[0])
+        return str(result)
+
+    def generate_batch(self, prompts, parameters, priority="interactive", tenant="default", deadline=None):
+        """Send several prompts as one multi-input request. See LLMBackend.generate_batch."""
+        payload = {
+            "inputs": list(prompts),
+            "parameters": parameters
+        }
+
+        result = self._post(payload, priority, tenant, deadline=deadline).json()
+        if not isinstance(result, list) or len(result) != len(prompts):
+            raise LLMServiceError(f"Expected {len(prompts)} results from batch request, got: {str(result)[:200]}")
+        return [self._parse_result(item) for item in result]
+
+    def stream(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Stream text using text-generation-inference server-sent events. See LLMBackend.stream."""
+        payload = {
+            "inputs": prompt,
+            "parameters": parameters,
+            "stream": True
+        }
+
+        with self._post(payload, priority, tenant, stream=True, deadline=deadline) as response:
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                result = response.json()
+                if isinstance(result, list) and len(result) > 0:
+                    yield self._parse_result(result[0])
+                else:
+                    yield str(result)
+                return
+
+            for event in self._iter_events(response):
+                token = event.get("token") or {}
+                if token.get("text") and not token.get("special"):
+                    yield token["text"]
+
+class OpenAICompatibleBackend(HTTPBackend):
+    name = "openai"
+
+    def __init__(self, model_id, api_url="http://127.0.0.1:8000/v1", api_key=None, **http_options):
+        """
+        Initialize a backend for an OpenAI-compatible completions server (vLLM, llama.cpp, Ollama, ...).
+
+        Args:
+            model_id (str): Model name as known to the server
+            api_url (str): Base URL of the API, including the /v1 prefix
+            api_key (str, optional): API key, defaults to the OPENAI_API_KEY environment variable
+            **http_options: Connection, retry and scheduling options for HTTPBackend
+        """
+        if api_key is None:
+            api_key = os.getenv('OPENAI_API_KEY', '')
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        super().__init__(api_url.rstrip("/") + "/completions", headers, **http_options)
+        self.model_id = model_id
+
+    def _payload(self, prompt, parameters, stream=False):
+        """
+        Translate generation parameters into a completions request.
+
+        Args:
+            prompt (str or list): Prompt or prompts
+            parameters (dict): Generation parameters
+            stream (bool): Request server-sent events
+
+        Returns:
+            dict: Request body
+        """
+        payload = {
+            "model": self.model_id,
+            "prompt": prompt,
+            "max_tokens": parameters.get("max_new_tokens", 250),
+            "temperature": parameters.get("temperature", 0.0) if parameters.get("do_sample") else 0.0,
+            "stream": stream
+        }
+        if "top_p" in parameters:
+            payload["top_p"] = parameters["top_p"]
+        return payload
+
+    def generate(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Generate text for a single prompt. See LLMBackend.generate."""
+        result = self._post(self._payload(prompt, parameters), priority, tenant, deadline=deadline).json()
+        choices = result.get("choices") or []
+        if not choices:
+            raise LLMServiceError(f"No choices in completion response: {str(result)[:200]}")
+        return choices[0].get("text", "").strip()
+
+    def generate_batch(self, prompts, parameters, priority="interactive", tenant="default", deadline=None):
+        """Send several prompts in one completions request. See LLMBackend.generate_batch."""
+        result = self._post(self._payload(list(prompts), parameters), priority, tenant, deadline=deadline).json()
+        texts = [None] * len(prompts)
+        for choice in result.get("choices") or []:
+            index = choice.get("index", 0)
+            if 0 <= index < len(texts) and texts[index] is None:
+                texts[index] = choice.get("text", "").strip()
+        if any(text is None for text in texts):
+            raise LLMServiceError(f"Expected {len(prompts)} choices from batch request, got: {str(result)[:200]}")
+        return texts
+
+    def stream(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Stream text using completions server-sent events. See LLMBackend.stream."""
+        payload = self._payload(prompt, parameters, stream=True)
+        with self._post(payload, priority, tenant, stream=True, deadline=deadline) as response:
+            for event in self._iter_events(response):
+                choices = event.get("choices") or []
+                if choices:
+                    text = choices[0].get("text") or (choices[0].get("delta") or {}).get("content")
+                    if text:
+                        yield text
+
+def render_template_response(prompt):
+    """
+    Produce a deterministic explanation for a prompt.
+
+    Args:
+        prompt (str): An explanation prompt
+
+    Returns:
+        str: Generated text
+    """
+    claim = re.search(r'Claim: "(.*?)"', prompt)
+    verdict = re.search(r'Verdict: (.+)', prompt)
+    claim = claim.group(1) if claim else prompt.strip()[:80]
+    verdict = verdict.group(1).strip() if verdict else "Requires Further Research"
+    return (
+        f"The claim \"{claim}\" was assessed as {verdict}. "
+        "The retrieved evidence was compared against the claim and the verdict reflects "
+        "how closely the knowledge base passages address it."
+    )
+
+class TemplateBackend(LLMBackend):
+    name = "template"
+
+    def __init__(self, model_id="template", latency_ms=300.0, per_token_ms=15.0, jitter=0.3, seed=None,
+                 scheduler=None):
+        """
+        Initialize a deterministic in-process backend that simulates model latency.
+
+        Output depends only on the prompt. Latency is a time-to-first-token
+        plus a per-token cost, scaled by log-normal jitter, so load tests see
+        a realistic spread without any network access.
+
+        Args:
+            model_id (str): Name reported for the simulated model
+            latency_ms (float): Median time to first token in milliseconds
+            per_token_ms (float): Median time per generated token in milliseconds
+            jitter (float): Sigma of the log-normal latency multiplier, 0 for fixed latency
+            seed (int, optional): Seed for the latency jitter
+            scheduler (PriorityScheduler, optional): Rate limiter applied as if requests were remote
+        """
+        self.model_id = model_id
+        self.latency_ms = latency_ms
+        self.per_token_ms = per_token_ms
+        self.jitter = jitter
+        self.scheduler = scheduler
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _scale(self):
+        """
+        Draw a latency multiplier.
+
+        Returns:
+            float: Multiplier with median 1
+        """
+        if not self.jitter:
+            return 1.0
+        with self._random_lock:
+            return self._random.lognormvariate(0.0, self.jitter)
+
+    def _tokens(self, prompt, parameters):
+        """
+        Render the response for a prompt and split it into tokens.
+
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+
+        Returns:
+            list: Token strings, truncated to max_new_tokens
+        """
+        tokens = re.findall(r'\S+\s*', render_template_response(prompt))
+        return tokens[:parameters.get("max_new_tokens", len(tokens))]
+
+    def _slot(self, priority, tenant, deadline):
+        """
+        Hold a scheduler slot as if the request were remote.
+
+        Args:
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+
+        Returns:
+            contextmanager: Scheduler slot, or a no-op without a scheduler
+        """
+        if self.scheduler is None:
+            return nullcontext()
+        try:
+            self.scheduler.acquire(priority, tenant, timeout=remaining_time(deadline))
+        except TimeoutError:
+            raise DeadlineExceeded("Deadline passed while waiting for a request slot")
+        return _released(self.scheduler)
+
+    def _sleep(self, seconds, deadline):
+        """
+        Simulate generation time, giving up at the deadline.
+
+        Args:
+            seconds (float): Simulated duration
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+        """
+        remaining = remaining_time(deadline)
+        if remaining is not None and seconds > remaining:
+            time.sleep(max(0.0, remaining))
+            raise DeadlineExceeded("Deadline passed during generation")
+        time.sleep(seconds)
+
+    def generate(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Generate text for a single prompt. See LLMBackend.generate."""
+        tokens = self._tokens(prompt, parameters)
+        with self._slot(priority, tenant, deadline):
+            self._sleep((self.latency_ms + self.per_token_ms * len(tokens)) * self._scale() / 1000.0, deadline)
+        return "".join(tokens).strip()
+
+    def generate_batch(self, prompts, parameters, priority="interactive", tenant="default", deadline=None):
+        """Generate a batch in one simulated call. See LLMBackend.generate_batch."""
+        token_lists = [self._tokens(prompt, parameters) for prompt in prompts]
+        longest = max((len(tokens) for tokens in token_lists), default=0)
+        with self._slot(priority, tenant, deadline):
+            self._sleep((self.latency_ms + self.per_token_ms * longest) * self._scale() / 1000.0, deadline)
+        return ["".join(tokens).strip() for tokens in token_lists]
+
+    def stream(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """Yield tokens at the simulated generation pace. See LLMBackend.stream."""
+        scale = self._scale()
+        with self._slot(priority, tenant, deadline):
+            self._sleep(self.latency_ms * scale / 1000.0, deadline)
+            for token in self._tokens(prompt, parameters):
+                self._sleep(self.per_token_ms * scale / 1000.0, deadline)
+                yield token
+
+@contextmanager
+def _released(scheduler):
+    """
+    Release an already acquired scheduler slot when the block exits.
+
+    Args:
+        scheduler (PriorityScheduler): Scheduler holding the slot
+    """
+    try:
+        yield
+    finally:
+        scheduler.release()
+
+def _release_on_close(response, scheduler):
+    """
+    Release an already acquired scheduler slot when a streamed response is closed.
+
+    The stream methods read the body inside a with block, so the slot is
+    freed when the body is exhausted, fails or the consumer stops early.
+
+    Args:
+        response (requests.Response): Streaming response
+        scheduler (PriorityScheduler): Scheduler holding the slot
+
+    Returns:
+        requests.Response: The same response
+    """
+    close = response.close
+    lock = threading.Lock()
+    released = []
+
+    def close_and_release():
+        with lock:
+            first = not released
+            released.append(True)
+        try:
+            close()
+        finally:
+            if first:
+                scheduler.release()
+
+    response.close = close_and_release
+    return response
+
+BACKENDS = {
+    HuggingFaceBackend.name: HuggingFaceBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend,
+    TemplateBackend.name: TemplateBackend
+}
+
+def create_backend(name, model_id, **options):
+    """
+    Create a backend by name.
+
+    Args:
+        name (str): 'huggingface', 'openai' or 'template'
+        model_id (str): Model identifier
+        **options: Backend-specific options
+
+    Returns:
+        LLMBackend: The configured backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {name}. Choose from {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](model_id=model_id, **options)
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+def make_cache_key(model_id, prompt, parameters):
+    """
+    Build a content-addressed cache key for an LLM request.
+
+    Args:
+        model_id (str): Model identifier
+        prompt (str): The full prompt text
+        parameters (dict): Generation parameters sent with the prompt
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request
+    """
+    payload = json.dumps([model_id, prompt, parameters], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def open_cache(path=None):
+    """
+    Open the response cache configured for this process.
+
+    Args:
+        path (str, optional): SQLite file, defaults to the LLM_CACHE_PATH environment variable
+
+    Returns:
+        LLMResponseCache: The cache, or None when no path is configured
+    """
+    path = path or os.getenv("LLM_CACHE_PATH")
+    return LLMResponseCache(path) if path else None
+
+class LLMResponseCache:
+    def __init__(self, path="llm_cache.sqlite3", max_bytes=64 * 1024 * 1024, ttl_seconds=7 * 24 * 3600,
+                 flush_entries=256, flush_interval=30.0):
+        """
+        Initialize a persistent SQLite-backed cache of LLM responses.
+
+        Entries expire after ttl_seconds, and the least recently used entries
+        are evicted once the stored responses exceed max_bytes.
+
+        Args:
+            path (str): Path of the SQLite database file
+            max_bytes (int): Maximum total size of cached responses in bytes
+            ttl_seconds (float): Time-to-live of an entry in seconds, None for no expiry
+            flush_entries (int): Pending access times that trigger a flush on a cache hit
+            flush_interval (float): Seconds after which a cache hit flushes pending access times
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.flush_entries = flush_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._create_size_total()
+
+        # Access times are recorded in memory and flushed on the next write, or by a hit once
+        # enough are pending or enough time has passed, so most hits are a single indexed read
+        self._pending_access = {}
+        self._last_flush = time.monotonic()
+
+    def _create_size_total(self):
+        """
+        Keep the total size of stored responses in a one-row table.
+
+        Triggers update it on every insert, update and delete, so eviction
+        reads one row instead of summing the table, and the total stays right
+        for every process sharing the file. A database from before the table
+        existed is summed once here.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_size ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_size (id, total_bytes) "
+                "SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN "
+                "UPDATE cache_size SET total_bytes = total_bytes + new.size WHERE id = 0; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN "
+                "UPDATE cache_size SET total_bytes = total_bytes + new.size - old.size WHERE id = 0; END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN "
+                "UPDATE cache_size SET total_bytes = total_bytes - old.size WHERE id = 0; END"
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def total_bytes(self):
+        """
+        Report the total size of stored responses.
+
+        Returns:
+            int: Bytes of cached response text
+        """
+        with self._lock:
+            return self._conn.execute("SELECT total_bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            str: The cached response, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds is not None and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self._pending_access[key] = now
+            self.hits += 1
+            # A read-mostly cache would otherwise evict by access times that are never written
+            if (len(self._pending_access) >= self.flush_entries
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_access()
+            return row[0]
+
+    def _flush_access(self):
+        """Write pending access times to the database. Caller holds the lock."""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()]
+            )
+            self._pending_access = {}
+        self._last_flush = time.monotonic()
+
+    def put(self, key, value):
+        """
+        Store a response and evict expired or least recently used entries.
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value (str): Response text to cache
+        """
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._flush_access()
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size triggers
+                self._conn.execute(
+                    "INSERT INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                    "created = excluded.created, accessed = excluded.accessed",
+                    (key, value, size, now, now)
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now):
+        """
+        Remove expired entries, then least recently used ones until under max_bytes.
+
+        Args:
+            now (float): Current time in seconds since the epoch
+        """
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+
+        total = self._conn.execute("SELECT total_bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._pending_access = {}
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        """Flush recorded access times and close the underlying database connection."""
+        with self._lock:
+            self._flush_access()
+            self._conn.close()
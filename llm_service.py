@@ -1,89 +1,595 @@
+import asyncio
 import os
 import json
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from llm_backends import (LLMBackend, LLMServiceError, DeadlineExceeded, HTTPBackend, BACKENDS, create_backend,
+                          remaining_time)
+from llm_cache import make_cache_key
+from singleflight import SingleFlight
+from micro_batcher import MicroBatcher
+from prompt_builder import build_explanation_prompt, estimate_tokens, estimate_tokens_for_chars
+from metrics import REGISTRY, inc, span
+
+# Uncompressed explanation prompt, used when no prompt_token_budget is set
+FULL_PROMPT_TEMPLATE = """
+        Task: Generate a detailed explanation for the analysis of a paranormal claim.
+        
+        Claim: "{claim}"
+        
+        Evidence summary:
+        {evidence}
+        
+        Key facts:
+        {facts}
+        
+        Verdict: {verdict}
+        
+        Please provide a thorough explanation for this verdict, referencing the evidence and key facts. 
+        Maintain an objective, scientific tone. If debunked, explain why the claim contradicts evidence. 
+        If unsupported, explain the lack of supporting evidence. If more research is needed, explain what 
+        aspects require further investigation.
+        
+        Explanation:
+        """
+_FULL_PROMPT_FIXED_CHARS = len(FULL_PROMPT_TEMPLATE.format(claim='', evidence='', facts='', verdict=''))
+
+# Label ending both explanation prompts, which some backends echo back with the prompt
+EXPLANATION_LABEL = "Explanation:"
+
+def _indented_json_length(value):
+    """
+    Length of json.dumps(value, indent=2), computed from the compact encoding.
+    
+    Indenting only changes the whitespace around container elements, so
+    the difference is counted per container instead of running the
+    pure-Python indenting encoder.
+    
+    Args:
+        value: JSON-serializable value
+        
+    Returns:
+        int: Length of the indented encoding
+    """
+    def extra(container, depth):
+        children = container.values() if isinstance(container, dict) else container
+        if not children:
+            return 0
+        # Each ', ' becomes ',' plus a newline and indent, and the closing bracket gets its own line
+        total = 2 * depth * (len(children) + 1)
+        for child in children:
+            if isinstance(child, (dict, list, tuple)):
+                total += extra(child, depth + 1)
+        return total
+    
+    compact = len(json.dumps(value))
+    return compact + extra(value, 1) if isinstance(value, (dict, list, tuple)) else compact
+
+def _clean_explanation(text, prompt):
+    """
+    Remove an echoed prompt or a leading 'Explanation:' label from a response.
+    
+    Args:
+        text (str): Generated text
+        prompt (str): The prompt it was generated for
+        
+    Returns:
+        str: The explanation alone, without surrounding whitespace
+    """
+    echo = prompt.strip()
+    text = text.strip()
+    for lead in (echo, EXPLANATION_LABEL):
+        if text.startswith(lead):
+            return text[len(lead):].strip()
+    return text
+
+def _clean_explanation_stream(chunks, prompt):
+    """
+    Apply _clean_explanation to a stream of chunks as they arrive.
+    
+    Only text that could still be an echoed prompt or the label, and
+    whitespace that could turn out to be trailing, is held back, so the
+    joined output always equals _clean_explanation of the joined input.
+    
+    Args:
+        chunks (iterable): Chunks of generated text
+        prompt (str): The prompt they were generated for
+        
+    Yields:
+        str: Chunks of the cleaned explanation
+    """
+    echo = prompt.strip()
+    pending = ""
+    deciding = True
+    started = False
+    for chunk in chunks:
+        if deciding:
+            pending += chunk
+            head = pending.lstrip()
+            if echo.startswith(head) or EXPLANATION_LABEL.startswith(head):
+                continue
+            for lead in (echo, EXPLANATION_LABEL):
+                if head.startswith(lead):
+                    head = head[len(lead):]
+                    break
+            deciding = False
+            chunk, pending = head, ""
+        
+        text = pending + chunk
+        if not started:
+            text = text.lstrip()
+            started = bool(text)
+        body = text.rstrip()
+        pending = text[len(body):]
+        if body:
+            yield body
+    
+    if deciding:
+        text = _clean_explanation(pending, prompt)
+        if text:
+            yield text
 
 class LLMService:
-    def __init__(self, model_id="mistralai/Mistral-7B-Instruct-v0.2"):
+    def __init__(self, model_id="mistralai/Mistral-7B-Instruct-v0.2", backend=None, api_url=None, api_key=None,
+                 backend_options=None, pool_size=10, connect_timeout=5.0, read_timeout=60.0, max_retries=3,
+                 backoff_factor=0.5, backoff_max=30.0, cache=None, cache_sampled=False, coalesce=True,
+                 scheduler=None, micro_batch=False, max_batch_size=8, max_batch_wait_ms=5,
+                 prompt_token_budget=512, hedge=False, hedge_percentile=0.95, hedge_min_samples=20):
         """
-        Initialize the LLM service using Hugging Face Inference API.
+        Initialize the LLM service on a pluggable text-generation backend.
         
         Args:
-            model_id (str): Model identifier on Hugging Face
+            model_id (str): Model identifier for the backend
+            backend (str or LLMBackend, optional): 'huggingface', 'openai', 'template' or a backend
+                instance; defaults to the LLM_BACKEND environment variable, then 'huggingface'
+            api_url (str, optional): Endpoint URL for HTTP backends, defaults to the LLM_API_URL
+                environment variable, then the backend's default
+            api_key (str, optional): API key for HTTP backends, defaults to the backend's environment variable
+            backend_options (dict, optional): Extra options for the backend, e.g. latency_ms for 'template'
+            pool_size (int): Size of the shared HTTP connection pool
+            connect_timeout (float): Seconds to wait for a connection to be established
+            read_timeout (float): Seconds to wait for the endpoint to respond
+            max_retries (int): Retries on connection errors and 429/503 responses
+            backoff_factor (float): Base delay in seconds for exponential backoff
+            backoff_max (float): Upper bound on a single backoff delay in seconds
+            cache (LLMResponseCache, optional): Persistent response cache, disabled if None
+            cache_sampled (bool): Also cache responses generated with sampling (temperature > 0);
+                by default only deterministic requests are cached
+            coalesce (bool): Share one in-flight request among concurrent identical prompts
+            scheduler (PriorityScheduler, optional): Rate limiter and priority queue for outgoing requests
+            micro_batch (bool): Gather concurrent prompts into multi-input requests
+            max_batch_size (int): Maximum prompts per request, for micro-batching and generate_batch
+            max_batch_wait_ms (float): How long the micro-batcher waits for more prompts
+            prompt_token_budget (int, optional): Input-token budget for explanation prompts;
+                None uses the uncompressed prompt
+            hedge (bool): Send a second, identical request when the first is slower than
+                the hedge_percentile of recent latencies, and use whichever finishes first
+            hedge_percentile (float): Latency percentile after which a request is hedged
+            hedge_min_samples (int): Successful requests to observe before hedging starts
         """
         self.model_id = model_id
-        self.api_url = f"https://api-inference.huggingface.co/models/{model_id}"
-        self.headers = {
-            "Authorization": f"Bearer {os.getenv('HUGGINGFACE_API_KEY', '')}",
-            "Content-Type": "application/json"
+        
+        if isinstance(backend, LLMBackend):
+            self.backend = backend
+        else:
+            name = backend or os.getenv("LLM_BACKEND", "huggingface")
+            options = dict(backend_options or {})
+            options.setdefault("scheduler", scheduler)
+            if name in BACKENDS and issubclass(BACKENDS[name], HTTPBackend):
+                api_url = api_url or os.getenv("LLM_API_URL")
+                if api_url:
+                    options.setdefault("api_url", api_url)
+                if api_key is not None:
+                    options.setdefault("api_key", api_key)
+                options.setdefault("pool_size", pool_size)
+                options.setdefault("connect_timeout", connect_timeout)
+                options.setdefault("read_timeout", read_timeout)
+                options.setdefault("max_retries", max_retries)
+                options.setdefault("backoff_factor", backoff_factor)
+                options.setdefault("backoff_max", backoff_max)
+            self.backend = create_backend(name, model_id, **options)
+        
+        self.cache = cache
+        self.cache_sampled = cache_sampled
+        self.coalesce = coalesce
+        self.single_flight = SingleFlight()
+        self.max_batch_size = max_batch_size
+        self.prompt_token_budget = prompt_token_budget
+        self.last_prompt_stats = None
+        self.prompt_stats = {'prompts': 0, 'prompt_tokens': 0, 'tokens_saved': 0}
+        self._prompt_stats_lock = threading.Lock()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_stats = {'hedged': 0, 'hedge_wins': 0}
+        self._latencies = deque(maxlen=500)
+        self._latency_lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size) if hedge else None
+        self.batcher = None
+        if micro_batch:
+            self.batcher = MicroBatcher(self.backend.generate_batch, max_batch_size=max_batch_size,
+                                        max_wait_ms=max_batch_wait_ms, max_in_flight=pool_size)
+    
+    def _build_parameters(self, max_length, temperature):
+        """
+        Build generation parameters for a request.
+        
+        Args:
+            max_length (int): Maximum length of the generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            
+        Returns:
+            dict: Generation parameters
+        """
+        # Ensure max_length doesn't exceed the model's limit
+        max_length = min(max_length, 250)
+        
+        if temperature > 0:
+            return {
+                "max_new_tokens": max_length,
+                "temperature": temperature,
+                "top_p": 0.95,
+                "do_sample": True,
+            }
+        return {
+            "max_new_tokens": max_length,
+            "do_sample": False,
         }
     
-    def generate_response(self, prompt, max_length=250, temperature=0.7):
+    def _hedge_delay(self):
+        """
+        Delay after which a request is hedged, from recent successful latencies.
+        
+        Returns:
+            float: Seconds to wait before hedging, or None until enough samples are seen
+        """
+        with self._latency_lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile))
+        return latencies[index]
+    
+    def _send(self, prompt, parameters, priority, tenant, deadline):
+        """
+        Send one request to the backend and record its latency.
+        
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Returns:
+            str: Generated text
+        """
+        start = time.monotonic()
+        try:
+            with span('llm_request'):
+                if self.batcher is not None:
+                    try:
+                        text = self.batcher.submit(prompt, parameters, priority, tenant, deadline)
+                    except TimeoutError:
+                        raise DeadlineExceeded("Deadline passed waiting for a batched request")
+                else:
+                    text = self.backend.generate(prompt, parameters, priority, tenant, deadline)
+        except Exception as e:
+            inc('claimcheck_llm_errors_total', error=type(e).__name__)
+            raise
+        
+        with self._latency_lock:
+            self._latencies.append(time.monotonic() - start)
+        return text
+    
+    def _send_hedged(self, prompt, parameters, priority, tenant, deadline):
+        """
+        Send a request and, if it is slower than usual, a second identical one.
+        
+        The first successful response wins; the slower request is left to
+        finish in the background and its result is discarded.
+        
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Returns:
+            str: Generated text
+        """
+        delay = self._hedge_delay()
+        remaining = remaining_time(deadline)
+        if delay is None or (remaining is not None and delay >= remaining):
+            return self._send(prompt, parameters, priority, tenant, deadline)
+        
+        primary = self._hedge_executor.submit(self._send, prompt, parameters, priority, tenant, deadline)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        hedge = self._hedge_executor.submit(self._send, prompt, parameters, priority, tenant, deadline)
+        with self._latency_lock:
+            self.hedge_stats['hedged'] += 1
+        
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=remaining_time(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded("Deadline passed waiting for hedged requests")
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._latency_lock:
+                            self.hedge_stats['hedge_wins'] += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    def _fetch(self, prompt, parameters, cache_key=None, priority="interactive", tenant="default", deadline=None):
+        """
+        Send one generation request and cache the result if requested.
+        
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            cache_key (str, optional): Key to store a successful response under
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Returns:
+            str: Generated text
+            
+        Raises:
+            LLMServiceError: If the backend request fails
+            DeadlineExceeded: If the deadline passes first
+        """
+        if self.hedge:
+            text = self._send_hedged(prompt, parameters, priority, tenant, deadline)
+        else:
+            text = self._send(prompt, parameters, priority, tenant, deadline)
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text
+    
+    def _prepare(self, prompt, max_length, temperature):
+        """
+        Resolve parameters, the coalescing key and any cached response for a prompt.
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum length of the generated response
+            temperature (float): Controls randomness in generation
+            
+        Returns:
+            tuple: (parameters, request_key, cache_key, cached_text)
+        """
+        parameters = self._build_parameters(max_length, temperature)
+        request_key = make_cache_key(self.model_id, prompt, parameters)
+        
+        # Only deterministic requests are cached unless sampled caching is enabled
+        cache_key = None
+        cached = None
+        if self.cache is not None and (not parameters["do_sample"] or self.cache_sampled):
+            cache_key = request_key
+            cached = self.cache.get(cache_key)
+            inc('claimcheck_llm_cache_requests_total', result='miss' if cached is None else 'hit')
+        
+        return parameters, request_key, cache_key, cached
+    
+    def _generate(self, prompt, max_length, temperature, priority, tenant, deadline):
+        """
+        Generate a response, raising on failure.
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum length of the generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Returns:
+            str: Generated text
+            
+        Raises:
+            LLMServiceError: If the backend request fails
+            DeadlineExceeded: If the deadline passes first
+        """
+        parameters, request_key, cache_key, cached = self._prepare(prompt, max_length, temperature)
+        if cached is not None:
+            return cached
+        
+        if not self.coalesce:
+            return self._fetch(prompt, parameters, cache_key, priority, tenant, deadline)
+        try:
+            return self.single_flight.do(request_key, self._fetch, prompt, parameters, cache_key, priority, tenant,
+                                         deadline, timeout=remaining_time(deadline))
+        except TimeoutError:
+            raise DeadlineExceeded("Deadline passed waiting for an identical in-flight request")
+    
+    def generate_response(self, prompt, max_length=250, temperature=0.7, priority="interactive", tenant="default",
+                          deadline=None):
         """
         Generate a response from the LLM.
         
+        Concurrent calls with an identical prompt and parameters share a single
+        request to the endpoint.
+        
         Args:
             prompt (str): Input text prompt
             max_length (int): Maximum length of the generated response (capped at 250)
-            temperature (float): Controls randomness in generation
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
             
         Returns:
             str: Generated text response or error message
         """
         try:
-            # Ensure max_length doesn't exceed the model's limit
-            max_length = min(max_length, 250)
-            
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": max_length,
-                    "temperature": temperature,
-                    "top_p": 0.95,
-                    "do_sample": True,
-                }
-            }
-            
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            return self._generate(prompt, max_length, temperature, priority, tenant, deadline)
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    def generate_batch(self, prompts, max_length=250, temperature=0.7, priority="batch", tenant="default",
+                       deadline=None):
+        """
+        Generate responses for several prompts using multi-input requests.
+        
+        Cached prompts are answered from the cache and the rest are sent in
+        chunks of max_batch_size.
+        
+        Args:
+            prompts (list): Input text prompts
+            max_length (int): Maximum length of each generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the whole batch
             
-            if response.status_code == 200:
-                result = response.json()
-                # Format might vary based on model, adjust as needed
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get("generated_text", "").strip()
-                return str(result)
+        Returns:
+            list: Generated text or error message for each prompt, in order
+        """
+        results = [None] * len(prompts)
+        misses = []
+        
+        for i, prompt in enumerate(prompts):
+            parameters, request_key, cache_key, cached = self._prepare(prompt, max_length, temperature)
+            if cached is not None:
+                results[i] = cached
             else:
-                return f"Error: API returned status code {response.status_code}. Message: {response.text}"
+                misses.append((i, prompt, cache_key))
+        
+        parameters = self._build_parameters(max_length, temperature)
+        for start in range(0, len(misses), self.max_batch_size):
+            chunk = misses[start:start + self.max_batch_size]
+            try:
+                with span('llm_batch_request'):
+                    texts = self.backend.generate_batch([prompt for _, prompt, _ in chunk], parameters, priority,
+                                                        tenant, deadline)
+            except Exception as e:
+                inc('claimcheck_llm_errors_total', error=type(e).__name__)
+                for i, _, _ in chunk:
+                    results[i] = f"Error: {str(e)}"
+                continue
+            
+            for (i, _, cache_key), text in zip(chunk, texts):
+                results[i] = text
+                if cache_key is not None:
+                    self.cache.put(cache_key, text)
+        
+        return results
+    
+    def _stream(self, prompt, max_length, temperature, priority, tenant, deadline):
+        """
+        Stream a response, raising on failure.
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum length of the generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Yields:
+            str: Chunks of generated text
+        """
+        parameters, request_key, cache_key, cached = self._prepare(prompt, max_length, temperature)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        start = time.perf_counter()
+        try:
+            for text in self.backend.stream(prompt, parameters, priority, tenant, deadline):
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            inc('claimcheck_llm_errors_total', error=type(e).__name__)
+            raise
+        REGISTRY.observe('claimcheck_stage_seconds', time.perf_counter() - start, stage='llm_stream')
+        
+        # Stored exactly as received, as _fetch does, so either path can serve the other's entry
+        if cache_key is not None:
+            self.cache.put(cache_key, "".join(chunks))
+    
+    def stream_response(self, prompt, max_length=250, temperature=0.7, priority="interactive", tenant="default",
+                        deadline=None):
+        """
+        Generate a response from the LLM, yielding text as it arrives.
+        
+        Uses the backend's streaming mode when it has one and otherwise
+        yields the whole response as a single chunk.
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum length of the generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Yields:
+            str: Chunks of generated text, or a single error message
+        """
+        try:
+            yield from self._stream(prompt, max_length, temperature, priority, tenant, deadline)
+        except Exception as e:
+            yield f"Error: {str(e)}"
+    
+    async def agenerate_response(self, prompt, max_length=250, temperature=0.7, priority="interactive", tenant="default"):
+        """
+        Asyncio variant of generate_response.
+        
+        Identical concurrent prompts are coalesced across coroutines and with
+        threaded callers of generate_response.
+        
+        Args:
+            prompt (str): Input text prompt
+            max_length (int): Maximum length of the generated response (capped at 250)
+            temperature (float): Controls randomness in generation (0 for greedy decoding)
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            
+        Returns:
+            str: Generated text response or error message
+        """
+        try:
+            parameters, request_key, cache_key, cached = self._prepare(prompt, max_length, temperature)
+            if cached is not None:
+                return cached
+            
+            if self.coalesce:
+                return await self.single_flight.do_async(
+                    request_key, self._fetch, prompt, parameters, cache_key, priority, tenant
+                )
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._fetch, prompt, parameters, cache_key, priority, tenant
+            )
         
         except Exception as e:
             return f"Error: {str(e)}"
     
-    def generate_explanation(self, claim, facts, evidence_passages, verdict, temperature=None, max_length=None):
+    def _full_prompt_parts(self, facts, evidence_passages):
         """
-        Generate an explanation for a paranormal claim analysis using the LLM.
+        Prepare the evidence summary and facts of the uncompressed prompt.
         
         Args:
-            claim (str): The paranormal claim text
             facts (dict): Extracted key facts from evidence
             evidence_passages (list): List of relevant evidence passages
-            verdict (str): The verdict (Debunked, Unsupported, etc.)
-            temperature (float, optional): Controls randomness in generation
-            max_length (int, optional): Maximum length of the generated response
             
         Returns:
-            str: Generated explanation
+            tuple: (evidence_text, facts_json), facts_json still to be encoded
         """
-        # Get temperature and max_length from Streamlit session state if available
-        import streamlit as st
-        if temperature is None and 'temperature' in st.session_state:
-            temperature = st.session_state.temperature
-        else:
-            temperature = temperature or 0.5
-            
-        if max_length is None and 'max_length' in st.session_state:
-            max_length = min(st.session_state.max_length, 250)  # Cap at 250 for API limit
-        else:
-            max_length = min(max_length or 250, 250)  # Cap at 250 for API limit
-        
         # Format evidence passages for the prompt
         evidence_text = ""
         for i, passage in enumerate(evidence_passages[:3]):  # Limit to top 3 for prompt size
@@ -95,34 +601,168 @@ class LLMService:
             facts_json['sources'] = list(facts_json['sources'])
         if 'domains' in facts_json and isinstance(facts_json['domains'], set):
             facts_json['domains'] = list(facts_json['domains'])
+        return evidence_text, facts_json
+    
+    def _build_full_prompt(self, claim, facts, evidence_passages, verdict):
+        """
+        Build the uncompressed explanation prompt.
         
-        # Create a prompt for the LLM
-        prompt = f"""
-        Task: Generate a detailed explanation for the analysis of a paranormal claim.
+        Args:
+            claim (str): The paranormal claim text
+            facts (dict): Extracted key facts from evidence
+            evidence_passages (list): List of relevant evidence passages
+            verdict (str): The verdict (Debunked, Unsupported, etc.)
+            
+        Returns:
+            str: The prompt
+        """
+        evidence_text, facts_json = self._full_prompt_parts(facts, evidence_passages)
+        return FULL_PROMPT_TEMPLATE.format(claim=claim, evidence=evidence_text,
+                                           facts=json.dumps(facts_json, indent=2), verdict=verdict)
+    
+    def _full_prompt_tokens(self, claim, facts, evidence_passages, verdict):
+        """
+        Estimate the tokens of the uncompressed prompt without building it.
         
-        Claim: "{claim}"
+        Args:
+            claim (str): The paranormal claim text
+            facts (dict): Extracted key facts from evidence
+            evidence_passages (list): List of relevant evidence passages
+            verdict (str): The verdict (Debunked, Unsupported, etc.)
+            
+        Returns:
+            int: Same estimate as estimate_tokens on _build_full_prompt's result
+        """
+        evidence_text, facts_json = self._full_prompt_parts(facts, evidence_passages)
+        length = (_FULL_PROMPT_FIXED_CHARS + len(claim) + len(evidence_text) + _indented_json_length(facts_json)
+                  + len(verdict))
+        return estimate_tokens_for_chars(length)
+    
+    def _build_explanation_prompt(self, claim, facts, evidence_passages, verdict, temperature=None, max_length=None):
+        """
+        Build the explanation prompt and resolve generation settings.
         
-        Evidence summary:
-        {evidence_text}
+        With a prompt_token_budget, the prompt is compressed to fit it and the
+        tokens saved against the uncompressed prompt are recorded in
+        last_prompt_stats and accumulated in prompt_stats.
         
-        Key facts:
-        {json.dumps(facts_json, indent=2)}
+        Args:
+            claim (str): The paranormal claim text
+            facts (dict): Extracted key facts from evidence
+            evidence_passages (list): List of relevant evidence passages
+            verdict (str): The verdict (Debunked, Unsupported, etc.)
+            temperature (float, optional): Controls randomness in generation
+            max_length (int, optional): Maximum length of the generated response
+            
+        Returns:
+            tuple: (prompt, temperature, max_length)
+        """
+        # Get temperature and max_length from Streamlit session state if available
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        # Outside a Streamlit script run (API server, batch jobs, worker threads) there is no session
+        session_state = st.session_state if get_script_run_ctx(suppress_warning=True) is not None else {}
+        # 0 is a valid setting (greedy decoding), so only fill in a missing temperature
+        if temperature is None:
+            temperature = session_state.temperature if 'temperature' in session_state else 0.5
+            
+        if max_length is None and 'max_length' in session_state:
+            max_length = min(session_state.max_length, 250)  # Cap at 250 for API limit
+        else:
+            max_length = min(max_length or 250, 250)  # Cap at 250 for API limit
         
-        Verdict: {verdict}
+        if self.prompt_token_budget is None:
+            prompt = self._build_full_prompt(claim, facts, evidence_passages, verdict)
+            prompt_tokens = full_tokens = estimate_tokens(prompt)
+        else:
+            prompt, prompt_tokens = build_explanation_prompt(
+                claim, facts, evidence_passages, verdict, token_budget=self.prompt_token_budget
+            )
+            # Counted from the parts' lengths; the full prompt itself is never sent
+            full_tokens = self._full_prompt_tokens(claim, facts, evidence_passages, verdict)
         
-        Please provide a thorough explanation for this verdict, referencing the evidence and key facts. 
-        Maintain an objective, scientific tone. If debunked, explain why the claim contradicts evidence. 
-        If unsupported, explain the lack of supporting evidence. If more research is needed, explain what 
-        aspects require further investigation.
+        stats = {
+            'prompt_tokens': prompt_tokens,
+            'full_prompt_tokens': full_tokens,
+            'tokens_saved': max(0, full_tokens - prompt_tokens)
+        }
+        with self._prompt_stats_lock:
+            self.last_prompt_stats = stats
+            self.prompt_stats['prompts'] += 1
+            self.prompt_stats['prompt_tokens'] += prompt_tokens
+            self.prompt_stats['tokens_saved'] += stats['tokens_saved']
         
-        Explanation:
+        return prompt, temperature, max_length
+    
+    def generate_explanation(self, claim, facts, evidence_passages, verdict, temperature=None, max_length=None,
+                             priority="interactive", tenant="default", deadline=None):
         """
+        Generate an explanation for a paranormal claim analysis using the LLM.
+        
+        Args:
+            claim (str): The paranormal claim text
+            facts (dict): Extracted key facts from evidence
+            evidence_passages (list): List of relevant evidence passages
+            verdict (str): The verdict (Debunked, Unsupported, etc.)
+            temperature (float, optional): Controls randomness in generation
+            max_length (int, optional): Maximum length of the generated response
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
+            
+        Returns:
+            str: Generated explanation
+            
+        Raises:
+            LLMServiceError: If the request fails, so callers can fall back
+            DeadlineExceeded: If the deadline passes first
+        """
+        prompt, temperature, max_length = self._build_explanation_prompt(
+            claim, facts, evidence_passages, verdict, temperature, max_length
+        )
         
         # Generate the explanation
-        explanation = self.generate_response(prompt, max_length=max_length, temperature=temperature)
+        try:
+            explanation = self._generate(prompt, max_length, temperature, priority, tenant, deadline)
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            raise LLMServiceError(str(e)) from e
         
-        # Clean up the response if needed
-        if "Explanation:" in explanation:
-            explanation = explanation.split("Explanation:")[1].strip()
+        return _clean_explanation(explanation, prompt)
+    
+    def stream_explanation(self, claim, facts, evidence_passages, verdict, temperature=None, max_length=None,
+                           priority="interactive", tenant="default", deadline=None):
+        """
+        Stream an explanation for a paranormal claim analysis as it is generated.
+        
+        Args:
+            claim (str): The paranormal claim text
+            facts (dict): Extracted key facts from evidence
+            evidence_passages (list): List of relevant evidence passages
+            verdict (str): The verdict (Debunked, Unsupported, etc.)
+            temperature (float, optional): Controls randomness in generation
+            max_length (int, optional): Maximum length of the generated response
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for the request
             
-        return explanation
\ No newline at end of file
+        Yields:
+            str: Chunks of the generated explanation
+            
+        Raises:
+            LLMServiceError: If the request fails, so callers can fall back
+            DeadlineExceeded: If the deadline passes first
+        """
+        prompt, temperature, max_length = self._build_explanation_prompt(
+            claim, facts, evidence_passages, verdict, temperature, max_length
+        )
+        
+        try:
+            yield from _clean_explanation_stream(
+                self._stream(prompt, max_length, temperature, priority, tenant, deadline), prompt
+            )
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            raise LLMServiceError(str(e)) from e
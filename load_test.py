@@ -0,0 +1,414 @@
+import argparse
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+import requests
+from benchmark import latency_summary
+from claim_analyzer import ClaimAnalyzer
+from claimcheck import read_claims
+from corpus_generator import CorpusGenerator
+from data_processor import DataProcessor
+from index_store import DEFAULT_INDEX_PATH, build_index, load_or_build_index
+from metrics import REGISTRY, stage_summary
+from mock_llm_server import LATENCY_DISTRIBUTIONS, start_mock_server
+from rag_system import RAGSystem
+from sample_data_generator import generate_claims_data
+
+class InProcessTarget:
+    name = "in-process"
+
+    def __init__(self, embedding_engine, analyzer_options=None, k=5, timeout=None):
+        """
+        Initialize a target running the pipeline in this process.
+
+        One DataProcessor, RAGSystem and ClaimAnalyzer are shared by all
+        simulated users, as in the app and each API worker, so contention on
+        the analyzer's LLM connection pool and scheduler shows up.
+
+        Args:
+            embedding_engine (EmbeddingEngine): Index to search
+            analyzer_options (dict, optional): Keyword arguments for ClaimAnalyzer
+            k (int): Evidence passages per claim
+            timeout (float, optional): Seconds allowed per explanation
+        """
+        self.data_processor = DataProcessor()
+        self.rag_system = RAGSystem(embedding_engine)
+        self.claim_analyzer = ClaimAnalyzer(**(analyzer_options or {'use_llm': False}))
+        self.claim_analyzer.index_passages(embedding_engine.passages, embedding_engine.snapshot.annotations)
+        self.k = k
+        self.timeout = timeout
+
+    def __call__(self, claim):
+        """
+        Run process, retrieve and analyze (with the explanation) for one claim.
+
+        Args:
+            claim (dict): Claim with claim_text and optionally domain
+
+        Returns:
+            dict: Seconds spent in each stage
+        """
+        t0 = time.perf_counter()
+        processed_claim = self.data_processor.process_claim_text(claim['claim_text'])
+        t1 = time.perf_counter()
+        evidence = self.rag_system.retrieve_evidence(processed_claim, k=self.k)
+        t2 = time.perf_counter()
+        self.claim_analyzer.analyze_claim(processed_claim, evidence, timeout=self.timeout)
+        t3 = time.perf_counter()
+        return {'process': t1 - t0, 'retrieve': t2 - t1, 'analyze_explain': t3 - t2}
+
+class HTTPTarget:
+    name = "http"
+
+    def __init__(self, base_url, k=5, timeout=None, request_timeout=60.0):
+        """
+        Initialize a target sending claims to a running api_server.
+
+        Every simulated user keeps its own keep-alive connection.
+
+        Args:
+            base_url (str): Server URL, e.g. http://127.0.0.1:8000
+            k (int): Evidence passages per claim
+            timeout (float, optional): Seconds allowed per explanation, sent with each request
+            request_timeout (float): Client-side timeout in seconds
+        """
+        self.url = base_url.rstrip('/') + '/analyze'
+        self.k = k
+        self.timeout = timeout
+        self.request_timeout = request_timeout
+        self._local = threading.local()
+
+    def __call__(self, claim):
+        """
+        POST one claim to /analyze.
+
+        Args:
+            claim (dict): Claim with claim_text
+
+        Returns:
+            dict: Seconds spent on the request
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        body = {'claim_text': claim['claim_text'], 'k': self.k}
+        if self.timeout is not None:
+            body['timeout'] = self.timeout
+        start = time.perf_counter()
+        response = session.post(self.url, json=body, timeout=self.request_timeout)
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return {'request': elapsed}
+
+def run_level(target, claims, users, duration, think_time=0.0, arrival_rate=None, seed=0):
+    """
+    Drive a target with simulated users for a fixed time.
+
+    Without arrival_rate the load is closed-loop: each user sends its next
+    claim as soon as the previous one is answered, after an exponentially
+    distributed think time. With arrival_rate the load is open-loop:
+    claims arrive as a Poisson process and wait in a queue for one of the
+    users, so the time spent queueing is measured as well.
+
+    Args:
+        target (callable): InProcessTarget or HTTPTarget
+        claims (list): Claims to draw from
+        users (int): Concurrent simulated users
+        duration (float): Seconds to run
+        think_time (float): Mean seconds a closed-loop user waits between claims
+        arrival_rate (float, optional): Claims per second for open-loop load
+        seed (int): Seed for claim choice, think times and arrivals
+
+    Returns:
+        dict: Throughput, latency, queueing, errors and per-stage summaries for this level
+    """
+    REGISTRY.reset()
+    lock = threading.Lock()
+    latencies = []
+    queue_waits = []
+    stage_samples = {}
+    errors = Counter()
+    arrivals = queue.Queue() if arrival_rate else None
+    max_backlog = 0
+    end = time.perf_counter() + duration
+
+    def record(started, stages, arrived, error):
+        finished = time.perf_counter()
+        with lock:
+            if error is not None:
+                errors[type(error).__name__] += 1
+                return
+            latencies.append(finished - started)
+            if arrived is not None:
+                queue_waits.append(started - arrived)
+            for stage, seconds in stages.items():
+                stage_samples.setdefault(stage, []).append(seconds)
+
+    def user(user_id):
+        rng = random.Random(f"{seed}-{user_id}")
+        while True:
+            arrived = None
+            if arrivals is not None:
+                try:
+                    arrived = arrivals.get(timeout=0.05)
+                except queue.Empty:
+                    if time.perf_counter() >= end:
+                        return
+                    continue
+                if arrived is None:
+                    return
+            elif time.perf_counter() >= end:
+                return
+
+            started = time.perf_counter()
+            try:
+                stages, error = target(rng.choice(claims)), None
+            except Exception as e:
+                stages, error = {}, e
+            record(started, stages, arrived, error)
+
+            if arrivals is None and think_time > 0:
+                time.sleep(min(rng.expovariate(1.0 / think_time), max(0.0, end - time.perf_counter())))
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    offered = 0
+    if arrivals is not None:
+        rng = random.Random(f"{seed}-arrivals")
+        next_arrival = start
+        while True:
+            next_arrival += rng.expovariate(arrival_rate)
+            if next_arrival >= end:
+                break
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            arrivals.put(next_arrival)
+            offered += 1
+            max_backlog = max(max_backlog, arrivals.qsize())
+        time.sleep(max(0.0, end - time.perf_counter()))
+
+    backlog = 0
+    if arrivals is not None:
+        # Claims still queued at the end were never started
+        while True:
+            try:
+                arrivals.get_nowait()
+            except queue.Empty:
+                break
+            backlog += 1
+        for _ in threads:
+            arrivals.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    completed = len(latencies)
+    failed = sum(errors.values())
+    level = {
+        'users': users,
+        'arrival_rate': arrival_rate,
+        'think_time': think_time,
+        'duration_seconds': round(elapsed, 3),
+        'completed': completed,
+        'errors': dict(errors),
+        'error_rate': round(failed / (completed + failed), 4) if completed + failed else 0.0,
+        'throughput': round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency': latency_summary(latencies, elapsed),
+        'stages': {stage: latency_summary(samples) for stage, samples in stage_samples.items()},
+        'pipeline_stages': stage_summary(REGISTRY.snapshot())
+    }
+    if arrivals is not None:
+        level['offered'] = offered
+        level['queue_wait'] = latency_summary(queue_waits, elapsed)
+        level['max_backlog'] = max_backlog
+        level['unstarted'] = backlog
+    return level
+
+def find_saturation(levels, min_gain=0.1, max_error_rate=0.01):
+    """
+    Find where adding load stops adding throughput.
+
+    For closed-loop levels, saturation is the last level before throughput
+    grows by less than min_gain, or before errors exceed max_error_rate.
+    For open-loop levels, it is the last arrival rate that was served
+    without a growing backlog and within max_error_rate.
+
+    Args:
+        levels (list): Results of run_level, in increasing load
+        min_gain (float): Smallest relative throughput gain that counts as scaling
+        max_error_rate (float): Highest acceptable error rate
+
+    Returns:
+        dict: {'saturated': bool, 'level': users or arrival rate, 'throughput'}
+    """
+    if not levels:
+        return {'saturated': False, 'level': None, 'throughput': None}
+
+    def key(level):
+        return level['arrival_rate'] if level['arrival_rate'] else level['users']
+
+    best = levels[0]
+    for previous, level in zip(levels, levels[1:]):
+        if level['arrival_rate']:
+            overloaded = level['unstarted'] > 0 or level['throughput'] < 0.95 * level['offered'] / level['duration_seconds']
+        else:
+            overloaded = level['throughput'] < previous['throughput'] * (1 + min_gain)
+        if overloaded or level['error_rate'] > max_error_rate:
+            return {'saturated': True, 'level': key(previous), 'throughput': previous['throughput']}
+        best = level
+    return {'saturated': False, 'level': key(best), 'throughput': best['throughput']}
+
+def run_load_test(target, claims, user_levels=(1, 2, 4, 8, 16), duration=10.0, think_time=0.0,
+                  arrival_rates=None, seed=0, mock_server=None):
+    """
+    Run a series of load levels and locate the saturation point.
+
+    Args:
+        target (callable): InProcessTarget or HTTPTarget
+        claims (list): Claims to draw from
+        user_levels (iterable): Concurrent users per closed-loop level; with arrival_rates,
+            the largest is the number of users serving the queue
+        duration (float): Seconds per level
+        think_time (float): Mean seconds between a closed-loop user's claims
+        arrival_rates (iterable, optional): Claims per second for open-loop levels
+        seed (int): Random seed
+        mock_server (MockLLMServer, optional): Mock LLM whose counters are reported per level
+
+    Returns:
+        dict: {'target', 'levels', 'saturation'}
+    """
+    levels = []
+    if arrival_rates:
+        plan = [(max(user_levels), rate) for rate in arrival_rates]
+    else:
+        plan = [(users, None) for users in user_levels]
+
+    for users, rate in plan:
+        before = None
+        if mock_server:
+            # Peaks are reported per level
+            mock_server.reset_peaks()
+            before = mock_server.stats_snapshot()
+        level = run_level(target, claims, users, duration, think_time=think_time, arrival_rate=rate, seed=seed)
+        if mock_server:
+            after = mock_server.stats_snapshot()
+            level['llm'] = {
+                'requests': after['requests'] - before['requests'],
+                'errors': after['errors'] - before['errors'],
+                'max_in_flight': after['max_in_flight'],
+                'max_waiting': after['max_waiting']
+            }
+        levels.append(level)
+        _print_level(level)
+
+    return {'target': target.name, 'levels': levels, 'saturation': find_saturation(levels)}
+
+def _print_level(level):
+    """
+    Print one load level.
+
+    Args:
+        level (dict): Result of run_level
+    """
+    load = f"{level['arrival_rate']}/s offered, {level['users']} users" if level['arrival_rate'] \
+        else f"{level['users']} users"
+    latency = level['latency']
+    line = (f"{load}: {level['throughput']} claims/s, p50 {latency.get('p50_ms', 0):.1f} ms, "
+            f"p99 {latency.get('p99_ms', 0):.1f} ms, errors {level['error_rate'] * 100:.1f}%")
+    if 'queue_wait' in level:
+        line += f", queue p99 {level['queue_wait'].get('p99_ms', 0):.1f} ms, unstarted {level['unstarted']}"
+    if 'llm' in level:
+        line += f", LLM in flight max {level['llm']['max_in_flight']}"
+    print(line, flush=True)
+
+def main(argv=None):
+    """Load test the claim pipeline from the command line."""
+    parser = argparse.ArgumentParser(description="Concurrent load test for the claim analysis pipeline")
+    parser.add_argument("--target", default=None, help="api_server URL; runs the pipeline in-process if omitted")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Concurrent users per level")
+    parser.add_argument("--rate", type=float, nargs="+", default=None,
+                        help="Open-loop arrival rates in claims/s, served by the largest --users value")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds between a user's claims")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file for in-process runs")
+    parser.add_argument("--claims", default=None, help="JSONL or CSV claims (default: the sample claims)")
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="In-process: use a synthetic corpus of this many articles and its claims")
+    parser.add_argument("-k", type=int, default=5, help="Evidence passages per claim")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per explanation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--use-llm", action="store_true", help="In-process: generate explanations with the LLM")
+    parser.add_argument("--pool-size", type=int, default=10, help="In-process: LLM connection pool size")
+    llm = parser.add_argument_group("mock LLM")
+    llm.add_argument("--mock-llm", action="store_true", help="Start a local mock LLM and use it in-process")
+    llm.add_argument("--llm-latency", type=float, default=0.2, help="Mock LLM response latency in seconds")
+    llm.add_argument("--llm-latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    llm.add_argument("--llm-latency-sigma", type=float, default=0.5)
+    llm.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of mock LLM requests that fail")
+    llm.add_argument("--llm-error-status", type=int, default=503)
+    llm.add_argument("--llm-max-concurrency", type=int, default=None, help="Mock LLM generation slots")
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the report")
+    args = parser.parse_args(argv)
+
+    mock_server = None
+    if args.mock_llm:
+        mock_server = start_mock_server(
+            latency=args.llm_latency,
+            latency_distribution=args.llm_latency_distribution,
+            latency_sigma=args.llm_latency_sigma,
+            error_rate=args.llm_error_rate,
+            error_status=args.llm_error_status,
+            max_concurrency=args.llm_max_concurrency,
+            seed=args.seed
+        )
+        mock_url = f"http://127.0.0.1:{mock_server.server_port}/"
+        print(f"Mock LLM listening on {mock_url}")
+
+    if args.target:
+        target = HTTPTarget(args.target, k=args.k, timeout=args.timeout)
+        if mock_server:
+            print(f"Start the API server with LLM_API_URL={mock_url} --use-llm to route its LLM calls to the mock")
+        claims = list(read_claims(args.claims)) if args.claims else generate_claims_data()
+    else:
+        if args.synthetic:
+            generator = CorpusGenerator(seed=args.seed)
+            documents = generator.generate_documents(args.synthetic)
+            claims = generator.generate_queries(documents, max(100, args.synthetic // 10))
+            engine = build_index(documents)
+        else:
+            engine = load_or_build_index(args.index)
+            claims = list(read_claims(args.claims)) if args.claims else generate_claims_data()
+
+        analyzer_options = {'use_llm': args.use_llm or args.mock_llm}
+        if args.mock_llm:
+            analyzer_options['llm_config'] = {'backend': 'huggingface', 'api_url': mock_url, 'api_key': 'mock',
+                                              'pool_size': args.pool_size}
+        elif args.use_llm:
+            analyzer_options['llm_config'] = {'pool_size': args.pool_size}
+        target = InProcessTarget(engine, analyzer_options, k=args.k, timeout=args.timeout)
+
+    report = run_load_test(target, claims, user_levels=args.users, duration=args.duration,
+                           think_time=args.think_time, arrival_rates=args.rate, seed=args.seed,
+                           mock_server=mock_server)
+
+    saturation = report['saturation']
+    unit = "claims/s offered" if args.rate else "users"
+    if saturation['saturated']:
+        print(f"Saturated after {saturation['level']} {unit} at {saturation['throughput']} claims/s")
+    else:
+        print(f"No saturation up to {saturation['level']} {unit} ({saturation['throughput']} claims/s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
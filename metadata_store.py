@@ -0,0 +1,368 @@
+from array import array
+from datetime import date
+from itertools import compress
+
+EPOCH = date(1970, 1, 1)
+# Day number stored for passages without a parseable publication date
+MISSING_DAY = -2 ** 31
+
+def epoch_day(value):
+    """
+    Convert a publication date to days since 1970-01-01.
+
+    Args:
+        value (str or date): ISO date such as '2023-01-15', or a date
+
+    Returns:
+        int: Days since the epoch, or None if value is empty or not a date
+    """
+    if isinstance(value, date):
+        return (value - EPOCH).days
+    if not value:
+        return None
+    try:
+        return (date.fromisoformat(value[:10]) - EPOCH).days
+    except (TypeError, ValueError):
+        return None
+
+def _table(predicate):
+    """
+    Translation table mapping each byte value to 1 where predicate holds, else 0.
+
+    Args:
+        predicate (callable): predicate(byte_value) -> bool
+
+    Returns:
+        bytes: 256-byte table for bytes.translate
+    """
+    return bytes(1 if predicate(value) else 0 for value in range(256))
+
+class _ByteSlices:
+    def __init__(self, values, max_value):
+        """
+        Store non-negative integers as byte planes, most significant first.
+
+        Plane j holds byte j of every value, one byte per passage, so a
+        comparison against a constant is a bytes.translate per plane. The
+        resulting 0/1 bytes are read as one big integer, and masks combine
+        with & and | over all passages at once.
+
+        Args:
+            values (iterable): One integer per passage
+            max_value (int): Largest value, which sets the number of planes
+        """
+        values = array('q', values)
+        self.size = len(values)
+        self.width = max(1, (max_value.bit_length() + 7) // 8)
+        self.planes = tuple(bytes((value >> (8 * shift)) & 255 for value in values)
+                            for shift in reversed(range(self.width)))
+        self.all = int.from_bytes(b'\x01' * self.size, 'big')
+
+    def value(self, i):
+        """
+        Value of one passage.
+
+        Args:
+            i (int): Passage position
+
+        Returns:
+            int: Stored value
+        """
+        result = 0
+        for plane in self.planes:
+            result = (result << 8) | plane[i]
+        return result
+
+    def _match(self, plane, predicate):
+        """
+        Mask of passages whose byte in a plane satisfies predicate.
+
+        Args:
+            plane (bytes): Byte plane
+            predicate (callable): predicate(byte_value) -> bool
+
+        Returns:
+            int: Mask with byte i set to 1 where passage i matches
+        """
+        return int.from_bytes(plane.translate(_table(predicate)), 'big')
+
+    def equals_any(self, values):
+        """
+        Mask of passages whose value is in a set.
+
+        Args:
+            values (set): Values to match
+
+        Returns:
+            int: Mask
+        """
+        return self._equals_any(self.planes, values)
+
+    def _equals_any(self, planes, values):
+        """
+        Mask of passages whose value over some trailing planes is in a set.
+
+        Args:
+            planes (tuple): Byte planes, most significant first
+            values (set): Values to match, as numbers over these planes
+
+        Returns:
+            int: Mask
+        """
+        if not values:
+            return 0
+        if len(planes) == 1:
+            return self._match(planes[0], lambda byte: byte in values)
+        # Group values by their top byte and match the lower bytes within each group
+        shift = 8 * (len(planes) - 1)
+        groups = {}
+        for value in values:
+            groups.setdefault(value >> shift, set()).add(value & ((1 << shift) - 1))
+        mask = 0
+        for top, lower in groups.items():
+            mask |= self._match(planes[0], lambda byte, top=top: byte == top) & self._equals_any(planes[1:], lower)
+        return mask
+
+    def compare(self, value, greater):
+        """
+        Mask of passages whose value is at least, or at most, a constant.
+
+        Planes are compared most significant first: a passage is greater
+        at the first plane where it differs, as long as it was equal on
+        all the planes before.
+
+        Args:
+            value (int): Constant to compare with
+            greater (bool): True for value >= constant, False for value <= constant
+
+        Returns:
+            int: Mask
+        """
+        mask = 0
+        equal_so_far = self.all
+        for j, plane in enumerate(self.planes):
+            byte = (value >> (8 * (self.width - 1 - j))) & 255
+            if greater:
+                mask |= equal_so_far & self._match(plane, lambda b: b > byte)
+            else:
+                mask |= equal_so_far & self._match(plane, lambda b: b < byte)
+            equal_so_far &= self._match(plane, lambda b: b == byte)
+        return mask | equal_so_far
+
+class PassageFilter:
+    def __init__(self, domains=None, date_from=None, date_to=None, sources=None, exclude_sources=None):
+        """
+        Initialize a metadata restriction applied to passages before scoring.
+
+        Every given condition must hold; None leaves that field unrestricted.
+
+        Args:
+            domains (iterable, optional): Allowed domains
+            date_from (str or date, optional): Earliest publication date, inclusive
+            date_to (str or date, optional): Latest publication date, inclusive
+            sources (iterable, optional): Allowed sources
+            exclude_sources (iterable, optional): Sources to leave out
+        """
+        self.domains = None if domains is None else frozenset(domains)
+        self.sources = None if sources is None else frozenset(sources)
+        self.exclude_sources = frozenset(exclude_sources or ())
+        self.date_from = None if date_from is None else self._parse_date(date_from, 'date_from')
+        self.date_to = None if date_to is None else self._parse_date(date_to, 'date_to')
+
+    def _parse_date(self, value, name):
+        """
+        Convert a date bound to days since the epoch.
+
+        Args:
+            value (str or date): ISO date or date
+            name (str): Parameter name for the error message
+
+        Returns:
+            int: Days since 1970-01-01
+        """
+        day = epoch_day(value)
+        if day is None:
+            raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD), got {value!r}")
+        return day
+
+    def is_empty(self):
+        """Whether the filter lets every passage through."""
+        return (self.domains is None and self.sources is None and not self.exclude_sources
+                and self.date_from is None and self.date_to is None)
+
+    def _key(self):
+        """Tuple identifying the filter, for equality and hashing."""
+        return (self.domains, self.date_from, self.date_to, self.sources, self.exclude_sources)
+
+    def __eq__(self, other):
+        return isinstance(other, PassageFilter) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return (f"PassageFilter(domains={self.domains}, date_from={self.date_from}, date_to={self.date_to}, "
+                f"sources={self.sources}, exclude_sources={self.exclude_sources})")
+
+class MetadataStore:
+    # Passage fields held here rather than in each passage dict
+    FIELDS = ('source', 'domain', 'publication_date')
+
+    def __init__(self, passages):
+        """
+        Build column-oriented metadata for a list of passages.
+
+        Domain and source are dictionary-encoded: each distinct value is
+        stored once and passages hold its code. Publication dates are kept
+        as int32 days since 1970-01-01 (MISSING_DAY when absent), and their
+        original strings dictionary-encoded so fields can return them as
+        given. Codes and dates are also byte-sliced (see _ByteSlices) so
+        select can build a mask for a PassageFilter without a Python loop
+        over the passages.
+
+        Args:
+            passages (list): Passage dictionaries with 'domain', 'source' and 'publication_date'
+        """
+        self.size = len(passages)
+        self.domains, domain_codes = self._encode(passage['domain'] for passage in passages)
+        self.sources, source_codes = self._encode(passage['source'] for passage in passages)
+        self._domain_codes = {value: code for code, value in enumerate(self.domains)}
+        self._source_codes = {value: code for code, value in enumerate(self.sources)}
+
+        self.publication_dates, self._date_codes = self._encode(passage['publication_date'] for passage in passages)
+        days = [epoch_day(date_value) for date_value in self.publication_dates]
+        days = [days[code] for code in self._date_codes]
+        self.days = array('i', (MISSING_DAY if day is None else day for day in days))
+        known = [day for day in days if day is not None]
+        self.first_day = min(known) if known else None
+        self.last_day = max(known) if known else None
+
+        self._domain_slices = _ByteSlices(domain_codes, max(len(self.domains) - 1, 0))
+        self._source_slices = _ByteSlices(source_codes, max(len(self.sources) - 1, 0))
+        # Dates are sliced relative to the first day, with 0 reserved for a missing date
+        offset = 0 if self.first_day is None else self.first_day - 1
+        self._day_slices = _ByteSlices((0 if day is None else day - offset for day in days),
+                                       0 if self.last_day is None else self.last_day - offset)
+        self._day_offset = offset
+
+    def __len__(self):
+        """Number of passages."""
+        return self.size
+
+    def _encode(self, values):
+        """
+        Dictionary-encode a column.
+
+        Args:
+            values (iterable): One value per passage
+
+        Returns:
+            tuple: (distinct values in first-seen order, array of codes)
+        """
+        dictionary = {}
+        codes = array('I')
+        for value in values:
+            code = dictionary.get(value)
+            if code is None:
+                code = dictionary[value] = len(dictionary)
+            codes.append(code)
+        return list(dictionary), codes
+
+    def domain(self, i):
+        """
+        Domain of one passage.
+
+        Args:
+            i (int): Passage position
+
+        Returns:
+            str: Domain
+        """
+        return self.domains[self._domain_slices.value(i)]
+
+    def source(self, i):
+        """
+        Source of one passage.
+
+        Args:
+            i (int): Passage position
+
+        Returns:
+            str: Source
+        """
+        return self.sources[self._source_slices.value(i)]
+
+    def fields(self, i):
+        """
+        Stored metadata fields of one passage.
+
+        Args:
+            i (int): Passage position
+
+        Returns:
+            dict: 'source', 'domain' and 'publication_date' as the passage gave them
+        """
+        return {
+            'source': self.source(i),
+            'domain': self.domain(i),
+            'publication_date': self.publication_dates[self._date_codes[i]]
+        }
+
+    def select(self, passage_filter):
+        """
+        Mask of the passages a filter lets through.
+
+        Args:
+            passage_filter (PassageFilter): Filter, or None
+
+        Returns:
+            int: Mask with byte i set to 1 for each selected passage,
+                or None when every passage is selected
+        """
+        if passage_filter is None or passage_filter.is_empty():
+            return None
+        mask = self._domain_slices.all
+        if passage_filter.domains is not None:
+            codes = {self._domain_codes[d] for d in passage_filter.domains if d in self._domain_codes}
+            mask &= self._domain_slices.equals_any(codes)
+        if passage_filter.sources is not None:
+            codes = {self._source_codes[s] for s in passage_filter.sources if s in self._source_codes}
+            mask &= self._source_slices.equals_any(codes)
+        if passage_filter.exclude_sources:
+            codes = {self._source_codes[s] for s in passage_filter.exclude_sources if s in self._source_codes}
+            mask &= self._source_slices.all ^ self._source_slices.equals_any(codes)
+        if passage_filter.date_from is not None or passage_filter.date_to is not None:
+            mask &= self._date_mask(passage_filter.date_from, passage_filter.date_to)
+        return mask
+
+    def _date_mask(self, date_from, date_to):
+        """
+        Mask of passages published within a range; passages without a date never match.
+
+        Args:
+            date_from (int): First day, inclusive, or None
+            date_to (int): Last day, inclusive, or None
+
+        Returns:
+            int: Mask
+        """
+        if self.first_day is None:
+            return 0
+        low = max(self.first_day if date_from is None else date_from, self.first_day)
+        high = min(self.last_day if date_to is None else date_to, self.last_day)
+        if low > high:
+            return 0
+        return (self._day_slices.compare(low - self._day_offset, greater=True)
+                & self._day_slices.compare(high - self._day_offset, greater=False))
+
+    def positions(self, mask):
+        """
+        Positions of the passages selected by a mask, in index order.
+
+        Args:
+            mask (int): Output of select, not None
+
+        Returns:
+            list: Passage positions
+        """
+        return list(compress(range(self.size), mask.to_bytes(self.size, 'big')))
@@ -0,0 +1,389 @@
+import bisect
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; wide enough for both in-process stages and LLM round trips
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'claimcheck_stage_seconds': ('histogram', "Time spent in each pipeline stage"),
+    'claimcheck_search_candidates_total': ('counter', "Passages scored by EmbeddingEngine.search"),
+    'claimcheck_llm_cache_requests_total': ('counter', "LLM response cache lookups by result"),
+    'claimcheck_llm_errors_total': ('counter', "Failed LLM requests by error type"),
+    'claimcheck_llm_circuit_rejections_total': ('counter', "LLM calls skipped because the circuit breaker was open"),
+    'claimcheck_http_requests_total': ('counter', "API requests by endpoint and status")
+}
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize a histogram with fixed bucket boundaries.
+
+        Args:
+            buckets (tuple): Sorted upper bounds; an implicit +Inf bucket is added
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Record one observation. Callers hold the registry lock.
+
+        Args:
+            value (float): Observed value
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+def histogram_quantile(q, buckets, counts):
+    """
+    Estimate a quantile from bucket counts by linear interpolation within a bucket.
+
+    Args:
+        q (float): Quantile between 0 and 1
+        buckets (tuple): Bucket upper bounds, without +Inf
+        counts (list): Per-bucket (non-cumulative) counts, including the +Inf bucket
+
+    Returns:
+        float: Estimated quantile, or NaN without observations
+    """
+    total = sum(counts)
+    if total == 0:
+        return math.nan
+
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if cumulative + count >= rank and count > 0:
+            if i == len(buckets):
+                # Values beyond the last bound are reported as that bound
+                return buckets[-1]
+            lower = buckets[i - 1] if i > 0 else 0.0
+            return lower + (buckets[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return buckets[-1]
+
+class MetricsRegistry:
+    def __init__(self, enabled=True):
+        """
+        Initialize a registry of counters and histograms.
+
+        Metrics are identified by name and a sorted tuple of label pairs.
+        When disabled, recording calls return immediately.
+
+        Args:
+            enabled (bool): Whether to record metrics
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Metric name
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            **labels: Label values
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def _timed(self, stage):
+        """
+        Time the enclosed block into the stage histogram.
+
+        Args:
+            stage (str): Pipeline stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('claimcheck_stage_seconds', time.perf_counter() - start, stage=stage)
+
+    def span(self, stage):
+        """
+        Context manager timing a pipeline stage.
+
+        Args:
+            stage (str): Pipeline stage name, e.g. 'search' or 'llm_request'
+
+        Returns:
+            contextmanager: Records the block's duration, or does nothing when disabled
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed(stage)
+
+    def snapshot(self):
+        """
+        Copy the current values into a JSON-serializable structure.
+
+        Returns:
+            dict: {'counters': [[name, labels, value]], 'histograms': [[name, labels, buckets, counts, sum, count]]}
+        """
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, list(labels), list(h.buckets), list(h.counts), h.sum, h.count]
+                for (name, labels), h in self._histograms.items()
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def reset(self):
+        """Drop all recorded values."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def dump(self, path):
+        """
+        Write a snapshot to a file atomically, for aggregation across processes.
+
+        Args:
+            path (str): Destination file
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+class _NullSpan:
+    """Reusable do-nothing context manager returned by disabled spans."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def merge_snapshots(snapshots):
+    """
+    Add up snapshots from several processes.
+
+    Args:
+        snapshots (iterable): Snapshots from MetricsRegistry.snapshot
+
+    Returns:
+        dict: Combined snapshot
+    """
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels), tuple(buckets))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [
+            [name, list(labels), list(buckets), counts, total, count]
+            for (name, labels, buckets), (counts, total, count) in histograms.items()
+        ]
+    }
+
+# pid -> time the process first asked for its dump path, so a forked worker gets its own
+_process_starts = {}
+_process_starts_lock = threading.Lock()
+
+def worker_dump_path(directory):
+    """
+    Path of this process's metrics dump in a shared directory.
+
+    Named by pid and process start time: a dump left by a worker that has
+    exited is kept, so its counts still add to the merged totals, even if a
+    later worker is given the same pid.
+
+    Args:
+        directory (str): Directory of per-worker dumps
+
+    Returns:
+        str: Dump file path, the same for every call in this process
+    """
+    pid = os.getpid()
+    with _process_starts_lock:
+        started = _process_starts.setdefault(pid, time.time_ns())
+    return os.path.join(directory, f"worker-{pid}-{started}.json")
+
+def load_snapshots(directory):
+    """
+    Read every metrics dump in a directory.
+
+    Args:
+        directory (str): Directory written to with MetricsRegistry.dump
+
+    Returns:
+        list: Snapshots
+    """
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+def _format_labels(labels, extra=None):
+    """
+    Format label pairs for the Prometheus text format.
+
+    Args:
+        labels (list): (name, value) pairs
+        extra (tuple, optional): One more (name, value) pair, e.g. the bucket bound
+
+    Returns:
+        str: '{a="1",b="2"}' or an empty string
+    """
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    """
+    Format a sample value or bucket bound.
+
+    Args:
+        value (float): Value
+
+    Returns:
+        str: Prometheus number
+    """
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def export_prometheus(snapshot):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot (dict): Snapshot from MetricsRegistry.snapshot or merge_snapshots
+
+    Returns:
+        str: Exposition text
+    """
+    families = {}
+    for name, labels, value in snapshot['counters']:
+        families.setdefault(name, []).append(('counter', labels, value))
+    for name, labels, buckets, counts, total, count in snapshot['histograms']:
+        families.setdefault(name, []).append(('histogram', labels, (buckets, counts, total, count)))
+
+    lines = []
+    for name in sorted(families):
+        samples = sorted(families[name], key=lambda sample: sample[1])
+        metric_type, help_text = METRIC_HELP.get(name, (samples[0][0], name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for kind, labels, value in samples:
+            if kind == 'counter':
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            buckets, counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + [math.inf], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return '\n'.join(lines) + '\n'
+
+def stage_summary(snapshot):
+    """
+    Summarize stage latencies for display.
+
+    Args:
+        snapshot (dict): Snapshot from MetricsRegistry.snapshot
+
+    Returns:
+        list: One dict per stage with count, mean and estimated p50/p95/p99 in milliseconds
+    """
+    rows = []
+    for name, labels, buckets, counts, total, count in snapshot['histograms']:
+        if name != 'claimcheck_stage_seconds' or count == 0:
+            continue
+        rows.append({
+            'stage': dict(tuple(pair) for pair in labels).get('stage', ''),
+            'count': count,
+            'mean_ms': round(total / count * 1000, 3),
+            'p50_ms': round(histogram_quantile(0.5, buckets, counts) * 1000, 3),
+            'p95_ms': round(histogram_quantile(0.95, buckets, counts) * 1000, 3),
+            'p99_ms': round(histogram_quantile(0.99, buckets, counts) * 1000, 3)
+        })
+    return sorted(rows, key=lambda row: row['stage'])
+
+# Process-wide registry; set CLAIMCHECK_METRICS=0 to disable recording
+REGISTRY = MetricsRegistry(enabled=os.getenv("CLAIMCHECK_METRICS", "1") != "0")
+
+def span(stage):
+    """
+    Time a pipeline stage in the process-wide registry.
+
+    Args:
+        stage (str): Pipeline stage name
+
+    Returns:
+        contextmanager: Timing context
+    """
+    if not REGISTRY.enabled:
+        return _NULL_SPAN
+    return REGISTRY._timed(stage)
+
+def inc(name, amount=1, **labels):
+    """
+    Increase a counter in the process-wide registry.
+
+    Args:
+        name (str): Metric name
+        amount (float): Amount to add
+        **labels: Label values
+    """
+    if REGISTRY.enabled:
+        REGISTRY.inc(name, amount, **labels)
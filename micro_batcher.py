@@ -0,0 +1,131 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from llm_backends import LLMServiceError
+
+class _Request:
+    def __init__(self, prompt, parameters, priority, tenant, deadline):
+        """Describe one prompt waiting to be batched."""
+        self.prompt = prompt
+        self.parameters = parameters
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+        self.future = Future()
+
+class MicroBatcher:
+    def __init__(self, send_batch, max_batch_size=8, max_wait_ms=5, max_in_flight=4):
+        """
+        Initialize a micro-batching dispatcher.
+
+        Prompts submitted concurrently are gathered for up to max_wait_ms and
+        sent together as one multi-input request. Prompts are only batched
+        with others that share the same generation parameters, priority and
+        tenant.
+
+        Args:
+            send_batch (callable): send_batch(prompts, parameters, priority, tenant, deadline) -> list of texts
+            max_batch_size (int): Maximum prompts per request
+            max_wait_ms (float): How long to wait for more prompts after the first one arrives
+            max_in_flight (int): Maximum number of batch requests sent concurrently
+        """
+        self.send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_sent = 0
+        self.prompts_sent = 0
+        self._stats_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._thread = threading.Thread(target=self._run, name="llm-micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt, parameters, priority="interactive", tenant="default", deadline=None):
+        """
+        Queue a prompt and block until its batch returns.
+
+        Args:
+            prompt (str): Input text prompt
+            parameters (dict): Generation parameters
+            priority (str): Scheduling priority, 'interactive' or 'batch'
+            tenant (str): Tenant identifier for fair scheduling
+            deadline (float, optional): Absolute time.monotonic() deadline for this prompt
+
+        Returns:
+            str: Generated text for this prompt
+
+        Raises:
+            TimeoutError: If the deadline passes before the batch returns
+        """
+        request = _Request(prompt, parameters, priority, tenant, deadline)
+        self._queue.put(request)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return request.future.result(timeout=timeout)
+
+    def _run(self):
+        """Gather queued prompts into batches and hand them to the executor."""
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for request in pending:
+                try:
+                    group_key = (json.dumps(request.parameters, sort_keys=True), request.priority, request.tenant)
+                except Exception as e:
+                    request.future.set_exception(e)
+                    continue
+                groups.setdefault(group_key, []).append(request)
+
+            for requests in groups.values():
+                self._executor.submit(self._dispatch, requests)
+
+    def _dispatch(self, requests):
+        """
+        Send one batch and resolve each caller's future with its own result.
+
+        Every future is resolved, with an exception if the batch fails or
+        returns the wrong number of texts, so no caller waits forever.
+
+        Args:
+            requests (list): _Request objects sharing parameters, priority and tenant
+        """
+        # Callers whose deadline already passed have stopped waiting
+        now = time.monotonic()
+        expired = [r for r in requests if r.deadline is not None and r.deadline <= now]
+        requests = [r for r in requests if r.deadline is None or r.deadline > now]
+        for request in expired:
+            request.future.set_exception(TimeoutError("Deadline passed before the batch was sent"))
+        if not requests:
+            return
+
+        # The batch may run as long as its most patient caller waits
+        deadlines = [r.deadline for r in requests]
+        deadline = None if None in deadlines else max(deadlines)
+
+        first = requests[0]
+        try:
+            texts = self.send_batch([r.prompt for r in requests], first.parameters, first.priority, first.tenant,
+                                    deadline)
+            if len(texts) != len(requests):
+                raise LLMServiceError(f"Expected {len(requests)} texts from batch request, got {len(texts)}")
+            with self._stats_lock:
+                self.batches_sent += 1
+                self.prompts_sent += len(requests)
+            for request, text in zip(requests, texts):
+                request.future.set_result(text)
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
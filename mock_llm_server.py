@@ -0,0 +1,263 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llm_backends import render_template_response
+
+LATENCY_DISTRIBUTIONS = ("fixed", "exponential", "lognormal")
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Keep-alive clients would otherwise wait on delayed ACKs between header and body writes
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def _send_json(self, status, body, headers=None):
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): HTTP status code
+            body (object): JSON-serializable body
+            headers (dict, optional): Extra response headers
+        """
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_tokens(self, text):
+        """
+        Send text as text-generation-inference style server-sent events.
+
+        Args:
+            text (str): Text to stream token by token
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        tokens = re.findall(r'\S+\s*', text)
+        for i, token in enumerate(tokens):
+            time.sleep(self.server.token_delay)
+            event = {
+                "token": {"id": i, "text": token, "special": False},
+                "generated_text": text if i == len(tokens) - 1 else None
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+    def do_POST(self):
+        """Handle a Hugging Face Inference API style generation request."""
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        inputs = request.get("inputs", "")
+
+        server = self.server
+        server.record(requests=1, waiting=1)
+        if server.slots is not None:
+            server.slots.acquire()
+        server.record(waiting=-1, in_flight=1)
+        try:
+            time.sleep(server.sample_latency())
+            if server.should_fail():
+                server.record(errors=1)
+                headers = None if server.retry_after is None else {"Retry-After": str(server.retry_after)}
+                self._send_json(server.error_status, {"error": "Simulated failure"}, headers)
+                return
+            self._respond(request, inputs)
+        finally:
+            server.record(in_flight=-1)
+            if server.slots is not None:
+                server.slots.release()
+
+    def _respond(self, request, inputs):
+        """
+        Send a generated response.
+
+        Args:
+            request (dict): Decoded request body
+            inputs (str or list): Prompt, or prompts for a batched request
+        """
+        if request.get("stream"):
+            self._stream_tokens(render_template_response(inputs))
+            return
+
+        if isinstance(inputs, list):
+            # Batched requests get one list of candidates per input
+            self._send_json(200, [[{"generated_text": render_template_response(text)}] for text in inputs])
+            return
+
+        self._send_json(200, [{"generated_text": render_template_response(inputs)}])
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, latency=0.0, token_delay=0.0, latency_distribution="fixed",
+                 latency_sigma=0.5, error_rate=0.0, error_status=503, max_concurrency=None, seed=None,
+                 fail_first=0, retry_after=None):
+        """
+        Initialize the mock LLM server.
+
+        Args:
+            server_address (tuple): (host, port) to bind
+            latency (float): Seconds before responding; the mean for 'exponential'
+                and the median for 'lognormal'
+            token_delay (float): Seconds between streamed tokens
+            latency_distribution (str): 'fixed', 'exponential' or 'lognormal'
+            latency_sigma (float): Shape of the lognormal distribution; larger means a longer tail
+            error_rate (float): Share of requests answered with error_status
+            error_status (int): Status for simulated failures, e.g. 503 or 429 (retried) or 500
+            max_concurrency (int, optional): Requests generated at once; others wait, like a
+                model server with a fixed number of slots
+            seed (int, optional): Seed for latencies and failures
+            fail_first (int): Answer this many requests with error_status before any succeeds,
+                e.g. to test that clients retry
+            retry_after (float, optional): Retry-After header sent with simulated failures
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency_distribution!r}")
+        super().__init__(server_address, MockLLMHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0, 'waiting': 0, 'max_waiting': 0}
+
+    def sample_latency(self):
+        """
+        Draw the delay for one request.
+
+        Returns:
+            float: Seconds
+        """
+        if self.latency <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == "exponential":
+                return self._rng.expovariate(1.0 / self.latency)
+            if self.latency_distribution == "lognormal":
+                return self._rng.lognormvariate(math.log(self.latency), self.latency_sigma)
+        return self.latency
+
+    def should_fail(self):
+        """
+        Decide whether the current request fails.
+
+        Returns:
+            bool: True to answer with error_status
+        """
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return True
+            if self.error_rate <= 0:
+                return False
+            return self._rng.random() < self.error_rate
+
+    def record(self, **changes):
+        """
+        Adjust request counters, tracking the peaks of in_flight and waiting.
+
+        Args:
+            **changes: Amount to add to each counter
+        """
+        with self._lock:
+            for name, amount in changes.items():
+                self.stats[name] += amount
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+            self.stats['max_waiting'] = max(self.stats['max_waiting'], self.stats['waiting'])
+
+    def reset_peaks(self):
+        """Start tracking max_in_flight and max_waiting afresh from the current values."""
+        with self._lock:
+            self.stats['max_in_flight'] = self.stats['in_flight']
+            self.stats['max_waiting'] = self.stats['waiting']
+
+    def stats_snapshot(self):
+        """
+        Copy the request counters.
+
+        Returns:
+            dict: requests, errors, in_flight, max_in_flight, waiting and max_waiting
+        """
+        with self._lock:
+            return dict(self.stats)
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0, token_delay=0.0, **options):
+    """
+    Start the mock LLM server on a background thread.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 for any free port
+        latency (float): Seconds to wait before responding
+        token_delay (float): Seconds between streamed tokens
+        **options: Latency distribution, error and concurrency options for MockLLMServer
+
+    Returns:
+        MockLLMServer: The running server; its URL is http://host:server_port/
+    """
+    server = MockLLMServer((host, port), latency=latency, token_delay=token_delay, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """Run the mock LLM server from the command line."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Hugging Face Inference API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Seconds between streamed tokens")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="How response latency varies around --latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal shape; larger gives a longer tail")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of failed requests")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail this many requests before any succeeds")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with failures")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Requests generated at once")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        (args.host, args.port),
+        latency=args.latency,
+        token_delay=args.token_delay,
+        latency_distribution=args.latency_distribution,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+        fail_first=args.fail_first,
+        retry_after=args.retry_after
+    )
+    print(f"Mock LLM server listening on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
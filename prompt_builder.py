@@ -0,0 +1,256 @@
+import json
+import math
+import re
+from collections import Counter
+from embedding_engine import extract_keywords
+
+PROMPT_TEMPLATE = """Task: Explain the verdict on a paranormal claim.
+Claim: "{claim}"
+Evidence:
+{evidence}
+Facts: {facts}
+Verdict: {verdict}
+Explain this verdict objectively and scientifically, citing evidence by number. If debunked, say why the evidence contradicts the claim; if unsupported, explain the missing support; otherwise say what needs further investigation.
+Explanation:"""
+
+# Sentences longer than this are split into windows so scoring stays selective
+MAX_SENTENCE_WORDS = 40
+WINDOW_WORDS = 25
+
+def estimate_tokens(text):
+    """
+    Estimate the number of model tokens in a text.
+
+    Uses the common approximation of four characters per token, which is
+    close enough for budgeting without loading a tokenizer.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    return estimate_tokens_for_chars(len(text))
+
+def estimate_tokens_for_chars(length):
+    """
+    Estimate the number of model tokens in a text of a known length.
+
+    Args:
+        length (int): Text length in characters
+
+    Returns:
+        int: Estimated token count, as estimate_tokens
+    """
+    return math.ceil(length / 4)
+
+def split_sentences(text):
+    """
+    Split a passage into sentence-sized fragments.
+
+    Processed passages have most punctuation stripped, so long runs
+    without sentence breaks are cut into fixed-size word windows.
+
+    Args:
+        text (str): Passage text
+
+    Returns:
+        list: Sentence fragments
+    """
+    fragments = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        words = sentence.split()
+        if len(words) <= MAX_SENTENCE_WORDS:
+            if words:
+                fragments.append(' '.join(words))
+            continue
+        for start in range(0, len(words), WINDOW_WORDS):
+            fragments.append(' '.join(words[start:start + WINDOW_WORDS]))
+    return fragments
+
+def _score_sentence(sentence, claim_keywords):
+    """
+    Score a sentence by keyword overlap with the claim.
+
+    Args:
+        sentence (str): Sentence fragment
+        claim_keywords (Counter): Keywords of the claim
+
+    Returns:
+        float: Overlap normalized by sentence length
+    """
+    sentence_keywords = extract_keywords(sentence)
+    if not sentence_keywords:
+        return 0.0
+    overlap = sum(min(count, claim_keywords[word]) for word, count in sentence_keywords.items() if word in claim_keywords)
+    return overlap / math.sqrt(sum(sentence_keywords.values()))
+
+def _compact_facts(facts, passage_refs, max_terms=5):
+    """
+    Summarize extracted facts without repeating passage text.
+
+    Args:
+        facts (dict): Facts from ClaimAnalyzer.extract_key_facts
+        passage_refs (dict): Passage text -> evidence label such as 'E1'
+        max_terms (int): Number of relevant terms to keep
+
+    Returns:
+        dict: Compact facts referencing evidence by label
+    """
+    contradictions = {}
+    for contradiction in facts.get('contradictions', []):
+        label = passage_refs.get(contradiction['text'], contradiction['source'])
+        contradictions.setdefault(label, []).append(contradiction['keyword'])
+
+    supporting = sorted({passage_refs.get(fact['text'], fact['source']) for fact in facts.get('supporting_facts', [])})
+
+    compact = {
+        'contradictions': contradictions,
+        'supporting': supporting,
+        'terms': [term for term, _ in Counter(facts.get('relevant_terms', {})).most_common(max_terms)],
+        'sources': sorted(facts.get('sources', [])),
+        'domains': sorted(facts.get('domains', []))
+    }
+    return {key: value for key, value in compact.items() if value}
+
+def _truncate_text(text, max_chars):
+    """
+    Shorten text to at most max_chars characters, cutting at a word boundary.
+
+    Args:
+        text (str): Text to shorten
+        max_chars (int): Maximum length, including the trailing '...'
+
+    Returns:
+        str: text itself if it fits, otherwise a prefix ending in '...'
+    """
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return ''
+    prefix = text[:max_chars - 3]
+    if ' ' in prefix:
+        prefix = prefix.rsplit(' ', 1)[0]
+    return prefix.rstrip() + '...'
+
+def _trim_contradictions(compact):
+    """
+    Remove the least important contradiction detail from compact facts.
+
+    Labels keep only their first keyword before whole labels are dropped,
+    last listed first.
+
+    Args:
+        compact (dict): Compact facts from _compact_facts, modified in place
+
+    Returns:
+        bool: False if there was nothing left to remove
+    """
+    contradictions = compact.get('contradictions')
+    if not contradictions:
+        compact.pop('contradictions', None)
+        return False
+    for keywords in reversed(list(contradictions.values())):
+        if len(keywords) > 1:
+            del keywords[1:]
+            return True
+    contradictions.popitem()
+    if not contradictions:
+        del compact['contradictions']
+    return True
+
+def build_explanation_prompt(claim, facts, evidence_passages, verdict, token_budget=512):
+    """
+    Build a compact explanation prompt that fits an input-token budget.
+
+    Evidence passages are deduplicated by text and referenced by label
+    from the facts, so contradiction and supporting passages are not
+    repeated. The sentences that overlap most with the claim are kept
+    until the budget is spent. A claim is cut to half of the room the
+    template leaves; if the claim and facts are still over budget,
+    optional facts are dropped, then contradictions are trimmed, and
+    finally the claim is cut further.
+
+    Args:
+        claim (str): The claim text
+        facts (dict): Facts from ClaimAnalyzer.extract_key_facts
+        evidence_passages (list): Retrieved evidence passages
+        verdict (str): The verdict
+        token_budget (int): Maximum estimated prompt tokens
+
+    Returns:
+        tuple: (prompt, prompt_tokens)
+
+    Raises:
+        ValueError: If the budget is too small for the prompt template itself
+    """
+    template_tokens = estimate_tokens(PROMPT_TEMPLATE.format(claim='', evidence='', facts='{}', verdict=verdict))
+    if template_tokens > token_budget:
+        raise ValueError(f"token_budget {token_budget} is below the {template_tokens} tokens of the prompt template")
+
+    # Deduplicate passages by text, best match first
+    unique_passages = []
+    passage_refs = {}
+    for passage in sorted(evidence_passages, key=lambda p: p.get('similarity', 0), reverse=True):
+        if passage['text'] in passage_refs:
+            continue
+        passage_refs[passage['text']] = f"E{len(unique_passages) + 1}"
+        unique_passages.append(passage)
+
+    compact = _compact_facts(facts, passage_refs)
+    original_claim = claim
+    # A very long claim may take at most half of what the template leaves, so facts still fit
+    claim = _truncate_text(claim, (token_budget - template_tokens) * 4 // 2)
+
+    def fixed_size():
+        facts_json = json.dumps(compact, separators=(',', ':'), sort_keys=True)
+        return facts_json, estimate_tokens(PROMPT_TEMPLATE.format(claim=claim, evidence='', facts=facts_json,
+                                                                  verdict=verdict))
+
+    # Drop the least important facts if the fixed part alone is over budget
+    facts_json, fixed_tokens = fixed_size()
+    for key in ('sources', 'terms', 'domains', 'supporting'):
+        if fixed_tokens <= token_budget:
+            break
+        compact.pop(key, None)
+        facts_json, fixed_tokens = fixed_size()
+
+    while fixed_tokens > token_budget and _trim_contradictions(compact):
+        facts_json, fixed_tokens = fixed_size()
+
+    if fixed_tokens > token_budget:
+        # Last resort: give the claim whatever room the rest of the prompt leaves
+        others = len(PROMPT_TEMPLATE.format(claim='', evidence='', facts=facts_json, verdict=verdict))
+        claim = _truncate_text(original_claim, token_budget * 4 - others)
+        facts_json, fixed_tokens = fixed_size()
+
+    evidence_budget = max(0, token_budget - fixed_tokens)
+
+    # Rank sentences from all passages by overlap with the claim
+    claim_keywords = extract_keywords(claim)
+    candidates = []
+    for rank, passage in enumerate(unique_passages):
+        for position, sentence in enumerate(split_sentences(passage['text'])):
+            score = _score_sentence(sentence, claim_keywords)
+            candidates.append((-score, rank, position, sentence))
+    candidates.sort()
+
+    selected = {}
+    for _, rank, position, sentence in candidates:
+        # Header and separator overhead for a passage's first sentence
+        cost = estimate_tokens(sentence) + 1
+        if rank not in selected:
+            cost += estimate_tokens(f"[E{rank + 1}] {unique_passages[rank]['source']}: ")
+        if cost > evidence_budget:
+            continue
+        selected.setdefault(rank, []).append((position, sentence))
+        evidence_budget -= cost
+
+    evidence_lines = []
+    for rank in sorted(selected):
+        passage = unique_passages[rank]
+        sentences = ' '.join(sentence for _, sentence in sorted(selected[rank]))
+        evidence_lines.append(f"[E{rank + 1}] {passage['source']}: {sentences}")
+
+    prompt = PROMPT_TEMPLATE.format(claim=claim, evidence='\n'.join(evidence_lines), facts=facts_json, verdict=verdict)
+    return prompt, estimate_tokens(prompt)
@@ -11,7 +11,7 @@ class RAGSystem:
         """
         self.embedding_engine = embedding_engine
     
-    def retrieve_evidence(self, claim_text, k=5, domain_filter=None):
+    def retrieve_evidence(self, claim_text, k=5, domain_filter=None, passage_filter=None):
         """
         Retrieve evidence passages for the given claim.
         
@@ -19,6 +19,7 @@ class RAGSystem:
             claim_text (str): The processed claim text
             k (int): Number of passages to retrieve
             domain_filter (str, optional): Domain to filter results by
+            passage_filter (PassageFilter, optional): Domains, date range and sources to restrict evidence to
             
         Returns:
             list: List of dictionaries with passage info and similarity scores
@@ -30,12 +31,13 @@ class RAGSystem:
         evidence_passages = self.embedding_engine.search(
             claim_embedding, 
             k=k,
-            domain_filter=domain_filter
+            domain_filter=domain_filter,
+            passage_filter=passage_filter
         )
         
         return evidence_passages
     
-    def bootstrap_retrieval(self, claim_text, k=5, num_runs=3, domain_filter=None):
+    def bootstrap_retrieval(self, claim_text, k=5, num_runs=3, domain_filter=None, passage_filter=None):
         """
         Run multiple retrievals with different parameters to assess stability.
         
@@ -44,6 +46,7 @@ class RAGSystem:
             k (int): Number of passages to retrieve per run
             num_runs (int): Number of retrieval runs
             domain_filter (str, optional): Domain to filter results by
+            passage_filter (PassageFilter, optional): Domains, date range and sources to restrict evidence to
             
         Returns:
             dict: Dictionary with multiple retrieval results
@@ -83,7 +86,8 @@ class RAGSystem:
             evidence_passages = self.embedding_engine.search(
                 claim_embedding, 
                 k=k,
-                domain_filter=domain_filter
+                domain_filter=domain_filter,
+                passage_filter=passage_filter
             )
             
             results.append({
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# Lower value is served first
+PRIORITIES = {'interactive': 0, 'batch': 1}
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Initialize a token bucket.
+
+        Not thread-safe on its own; PriorityScheduler guards it with its lock.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (float, optional): Bucket capacity, defaults to max(1, rate)
+
+        Raises:
+            ValueError: If rate is not positive or burst is below one token
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if burst is not None and burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+    def _refill(self, now):
+        """
+        Add the tokens accumulated since the last refill.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def time_until_available(self, now):
+        """
+        Seconds until a token can be taken.
+
+        Args:
+            now (float): Current monotonic time
+
+        Returns:
+            float: 0 if a token is available now
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Consume one token."""
+        self.tokens -= 1
+
+class _Waiter:
+    def __init__(self, priority, tenant):
+        """Describe a caller queued for a slot."""
+        self.priority = priority
+        self.tenant = tenant
+        self.enqueued = time.monotonic()
+
+class PriorityScheduler:
+    def __init__(self, requests_per_second=5.0, burst=None, max_concurrency=4, wait_samples=1000):
+        """
+        Initialize a rate-limited priority scheduler for outgoing requests.
+
+        Callers are admitted when a token is available and fewer than
+        max_concurrency requests are in flight. Interactive callers always go
+        before batch callers, and tenants within a priority class take turns.
+
+        Args:
+            requests_per_second (float): Sustained request rate
+            burst (float, optional): Maximum burst size in requests
+            max_concurrency (int): Maximum number of requests in flight
+            wait_samples (int): Number of recent wait times kept per priority for metrics
+        """
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._in_flight = 0
+
+        # priority -> OrderedDict(tenant -> deque of waiters), in round-robin order
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES.values()}
+
+        self._granted = {name: 0 for name in PRIORITIES}
+        self._timeouts = {name: 0 for name in PRIORITIES}
+        self._waits = {name: deque(maxlen=wait_samples) for name in PRIORITIES}
+
+    def _head(self):
+        """
+        Find the waiter that should be admitted next.
+
+        Returns:
+            _Waiter: Next waiter, or None if nobody is queued
+        """
+        for priority in sorted(self._queues):
+            tenants = self._queues[priority]
+            if tenants:
+                return next(iter(tenants.values()))[0]
+        return None
+
+    def _dequeue(self, waiter):
+        """
+        Remove a waiter and rotate its tenant to the back of the round robin.
+
+        Args:
+            waiter (_Waiter): The waiter to remove
+        """
+        tenants = self._queues[PRIORITIES[waiter.priority]]
+        queue = tenants[waiter.tenant]
+        queue.remove(waiter)
+        if queue:
+            tenants.move_to_end(waiter.tenant)
+        else:
+            del tenants[waiter.tenant]
+
+    def acquire(self, priority='interactive', tenant='default', timeout=None):
+        """
+        Block until the caller may send a request.
+
+        Args:
+            priority (str): 'interactive' or 'batch'
+            tenant (str): Tenant identifier used for fair sharing
+            timeout (float, optional): Maximum seconds to wait
+
+        Raises:
+            ValueError: If the priority is unknown
+            TimeoutError: If the timeout expires before a slot is granted
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        waiter = _Waiter(priority, tenant)
+        deadline = None if timeout is None else waiter.enqueued + timeout
+
+        with self._cond:
+            tenants = self._queues[PRIORITIES[priority]]
+            tenants.setdefault(tenant, deque()).append(waiter)
+
+            while True:
+                now = time.monotonic()
+                delay = None
+                if self._head() is waiter and self._in_flight < self.max_concurrency:
+                    delay = self.bucket.time_until_available(now)
+                    if delay <= 0:
+                        self.bucket.take()
+                        self._dequeue(waiter)
+                        self._in_flight += 1
+                        self._granted[priority] += 1
+                        self._waits[priority].append(now - waiter.enqueued)
+                        self._cond.notify_all()
+                        return
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._dequeue(waiter)
+                        self._timeouts[priority] += 1
+                        self._cond.notify_all()
+                        raise TimeoutError(f"Timed out waiting for a {priority} request slot")
+                    delay = remaining if delay is None else min(delay, remaining)
+
+                self._cond.wait(delay)
+
+    def release(self):
+        """Mark an admitted request as finished."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority='interactive', tenant='default', timeout=None):
+        """
+        Context manager that holds a request slot for the duration of the block.
+
+        Args:
+            priority (str): 'interactive' or 'batch'
+            tenant (str): Tenant identifier used for fair sharing
+            timeout (float, optional): Maximum seconds to wait for the slot
+        """
+        self.acquire(priority, tenant, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self):
+        """
+        Report queue depth, throughput and wait times.
+
+        Returns:
+            dict: Scheduler metrics, with per-priority queue depth, grants,
+                timeouts and wait-time statistics in seconds
+        """
+        with self._cond:
+            report = {'in_flight': self._in_flight, 'priorities': {}}
+            for name, priority in PRIORITIES.items():
+                waits = sorted(self._waits[name])
+                report['priorities'][name] = {
+                    'queue_depth': sum(len(queue) for queue in self._queues[priority].values()),
+                    'granted': self._granted[name],
+                    'timeouts': self._timeouts[name],
+                    'wait_avg': sum(waits) / len(waits) if waits else 0.0,
+                    'wait_p99': waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+                    'wait_max': waits[-1] if waits else 0.0
+                }
+            return report
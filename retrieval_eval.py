@@ -0,0 +1,239 @@
+import argparse
+import importlib
+import json
+import sys
+import time
+from benchmark import latency_summary
+from claim_analyzer import ClaimAnalyzer
+from claimcheck import read_claims
+from corpus_generator import CorpusGenerator
+from data_processor import DataProcessor
+from embedding_engine import EmbeddingEngine
+from index_store import DEFAULT_INDEX_PATH, build_index, load_or_build_index
+from rag_system import RAGSystem
+from sample_data_generator import generate_claims_data
+
+def rank_biased_overlap(reference_ids, candidate_ids, p=0.9):
+    """
+    Rank-biased overlap of two rankings, truncated at their length.
+
+    Agreement near the top counts more than agreement further down; 1.0
+    means the same passages in the same order.
+
+    Args:
+        reference_ids (list): Passage ids in reference order
+        candidate_ids (list): Passage ids in candidate order
+        p (float): Persistence; lower values weight the top ranks more
+
+    Returns:
+        float: Overlap between 0 and 1
+    """
+    depth = max(len(reference_ids), len(candidate_ids))
+    if depth == 0:
+        return 1.0
+    score = 0.0
+    for d in range(1, depth + 1):
+        agreement = len(set(reference_ids[:d]) & set(candidate_ids[:d])) / d
+        score += p ** (d - 1) * agreement
+    # Normalize so identical rankings of this depth score exactly 1
+    return score / sum(p ** (d - 1) for d in range(1, depth + 1))
+
+def load_backend(spec, engine):
+    """
+    Build an alternative search backend from a 'module:factory' spec.
+
+    The factory is called with the reference EmbeddingEngine and must return
+    an object with the EmbeddingEngine get_embedding and search methods.
+
+    Args:
+        spec (str): 'module:factory', e.g. 'fast_search:PrunedEngine'
+        engine (EmbeddingEngine): Reference engine
+
+    Returns:
+        object: Candidate engine
+    """
+    module_name, _, attribute = spec.partition(':')
+    if not attribute:
+        raise ValueError(f"Backend spec must look like module:factory, got {spec!r}")
+    factory = getattr(importlib.import_module(module_name), attribute)
+    return factory(engine)
+
+def evaluate(reference_engine, candidate_engine, claims, k=5, filter_by_domain=False, analyzer=None):
+    """
+    Run a query set against a reference and a candidate backend and compare them.
+
+    Each claim is retrieved with both backends through RAGSystem and
+    analyzed with the rule-based ClaimAnalyzer, so differences show up both
+    in the evidence and in the verdicts. Claims with a target_source_id
+    (see CorpusGenerator.generate_queries) also count whether the target
+    was retrieved.
+
+    Args:
+        reference_engine (EmbeddingEngine): Exact reference search
+        candidate_engine (object): Backend under test, with get_embedding and search
+        claims (list): Claims with claim_text, and optionally domain and target_source_id
+        k (int): Passages retrieved per claim
+        filter_by_domain (bool): Restrict evidence to each claim's domain
+        analyzer (ClaimAnalyzer, optional): Analyzer for verdicts, rule-based by default
+
+    Returns:
+        dict: Mean recall@k, rank overlap, verdict agreement, target hit rates,
+            latency summaries for both backends and the claims that disagree most
+    """
+    data_processor = DataProcessor()
+    analyzer = analyzer or ClaimAnalyzer(use_llm=False)
+    backends = {'reference': RAGSystem(reference_engine), 'candidate': RAGSystem(candidate_engine)}
+    latencies = {'reference': [], 'candidate': []}
+
+    recalls = []
+    overlaps = []
+    verdict_matches = 0
+    confidence_deltas = []
+    target_hits = {'reference': 0, 'candidate': 0}
+    targeted = 0
+    disagreements = []
+
+    for claim in claims:
+        processed_claim = data_processor.process_claim_text(claim['claim_text'])
+        domain_filter = (claim.get('domain') or None) if filter_by_domain else None
+
+        evidence = {}
+        verdicts = {}
+        for name, rag_system in backends.items():
+            start = time.perf_counter()
+            evidence[name] = rag_system.retrieve_evidence(processed_claim, k=k, domain_filter=domain_filter)
+            latencies[name].append(time.perf_counter() - start)
+            verdict, _, confidence = analyzer.analyze_claim(processed_claim, evidence[name])
+            verdicts[name] = (verdict, confidence)
+
+        reference_ids = [passage['passage_id'] for passage in evidence['reference']]
+        candidate_ids = [passage['passage_id'] for passage in evidence['candidate']]
+        recall = len(set(reference_ids) & set(candidate_ids)) / len(reference_ids) if reference_ids else 1.0
+        overlap = rank_biased_overlap(reference_ids, candidate_ids)
+        recalls.append(recall)
+        overlaps.append(overlap)
+        verdict_matches += verdicts['reference'][0] == verdicts['candidate'][0]
+        confidence_deltas.append(abs(verdicts['reference'][1] - verdicts['candidate'][1]))
+
+        if claim.get('target_source_id'):
+            targeted += 1
+            for name in backends:
+                target_hits[name] += any(passage['source_id'] == claim['target_source_id']
+                                         for passage in evidence[name])
+
+        if recall < 1.0 or verdicts['reference'][0] != verdicts['candidate'][0]:
+            disagreements.append({
+                'claim_id': claim.get('claim_id'),
+                'recall': round(recall, 4),
+                'rank_overlap': round(overlap, 4),
+                'reference_verdict': verdicts['reference'][0],
+                'candidate_verdict': verdicts['candidate'][0]
+            })
+
+    n = len(recalls)
+    disagreements.sort(key=lambda row: (row['reference_verdict'] == row['candidate_verdict'], row['recall']))
+    return {
+        'claims': n,
+        'k': k,
+        'recall_at_k': round(sum(recalls) / n, 4) if n else None,
+        'min_recall': round(min(recalls), 4) if n else None,
+        'rank_overlap': round(sum(overlaps) / n, 4) if n else None,
+        'verdict_agreement': round(verdict_matches / n, 4) if n else None,
+        'mean_confidence_delta': round(sum(confidence_deltas) / n, 4) if n else None,
+        'target_hit_rate': {name: round(hits / targeted, 4) for name, hits in target_hits.items()} if targeted else None,
+        'latency': {name: latency_summary(samples) for name, samples in latencies.items()},
+        'worst_claims': disagreements[:20]
+    }
+
+def check_floors(report, min_recall=None, min_verdict_agreement=None):
+    """
+    Compare a report against quality floors.
+
+    Args:
+        report (dict): Output of evaluate
+        min_recall (float, optional): Lowest acceptable mean recall@k
+        min_verdict_agreement (float, optional): Lowest acceptable verdict agreement
+
+    Returns:
+        list: Descriptions of every floor that was not met
+    """
+    failures = []
+    recall = report['recall_at_k']
+    if min_recall is not None and recall is not None and recall < min_recall:
+        failures.append(f"recall@{report['k']} {recall} is below the floor {min_recall}")
+    agreement = report['verdict_agreement']
+    if min_verdict_agreement is not None and agreement is not None and agreement < min_verdict_agreement:
+        failures.append(f"verdict agreement {agreement} is below the floor {min_verdict_agreement}")
+    return failures
+
+def _print_report(report):
+    """
+    Print an evaluation report side by side.
+
+    Args:
+        report (dict): Output of evaluate
+    """
+    k = report['k']
+    print(f"{report['claims']} claims, k={k}")
+    print(f"  recall@{k}:           {report['recall_at_k']} (min {report['min_recall']})")
+    print(f"  rank overlap (RBO):  {report['rank_overlap']}")
+    print(f"  verdict agreement:   {report['verdict_agreement']} "
+          f"(mean confidence delta {report['mean_confidence_delta']})")
+    if report['target_hit_rate']:
+        print(f"  target hit rate:     reference {report['target_hit_rate']['reference']}, "
+              f"candidate {report['target_hit_rate']['candidate']}")
+    for name, summary in report['latency'].items():
+        if summary['count']:
+            print(f"  {name:<10} latency  p50 {summary['p50_ms']:.3f} ms  p99 {summary['p99_ms']:.3f} ms  "
+                  f"{summary['qps']} qps")
+
+def main(argv=None):
+    """Compare a candidate retrieval backend with the exact reference search."""
+    parser = argparse.ArgumentParser(description="Retrieval quality versus latency regression check")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Reference index file")
+    parser.add_argument("--backend", default=None,
+                        help="Candidate as module:factory, called with the reference engine")
+    parser.add_argument("--candidate-index", default=None, help="Candidate index file searched with the exact search")
+    parser.add_argument("--claims", default=None, help="JSONL or CSV query set (default: the sample claims)")
+    parser.add_argument("--synthetic", type=int, default=None,
+                        help="Evaluate on a synthetic corpus of this many articles instead of --index")
+    parser.add_argument("--queries", type=int, default=500, help="Claims generated with --synthetic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-k", type=int, default=5, help="Passages retrieved per claim")
+    parser.add_argument("--filter-by-domain", action="store_true", help="Restrict evidence to each claim's domain")
+    parser.add_argument("--min-recall", type=float, default=None, help="Fail when mean recall@k is below this")
+    parser.add_argument("--min-verdict-agreement", type=float, default=None,
+                        help="Fail when verdict agreement is below this")
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the report")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        generator = CorpusGenerator(seed=args.seed)
+        documents = generator.generate_documents(args.synthetic)
+        claims = generator.generate_queries(documents, args.queries)
+        reference = build_index(documents)
+    else:
+        reference = load_or_build_index(args.index)
+        claims = list(read_claims(args.claims)) if args.claims else generate_claims_data()
+
+    if args.backend:
+        candidate = load_backend(args.backend, reference)
+    elif args.candidate_index:
+        candidate = EmbeddingEngine.load(args.candidate_index)
+    else:
+        # Reference against itself: checks the harness and measures the baseline latency
+        candidate = reference
+
+    report = evaluate(reference, candidate, claims, k=args.k, filter_by_domain=args.filter_by_domain)
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_floors(report, args.min_recall, args.min_verdict_agreement)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
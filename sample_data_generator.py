@@ -257,7 +257,7 @@ def generate_myths_data():
             """
         },
         {
-            'source_id': 'SP003',
+            'source_id': 'SP004',
             'source': 'Journal of Cultural Anthropology',
             'publication_date': '2023-08-12',
             'domain': 'Supernatural Powers',
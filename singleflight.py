@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+class _Call:
+    def __init__(self):
+        """Track one in-flight call and its outcome."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initialize a single-flight group.
+
+        Concurrent callers asking for the same key share one execution of the
+        underlying function instead of each running it.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, timeout=None, **kwargs):
+        """
+        Run fn for key, or wait for an identical call that is already in flight.
+
+        Thread-safe; the first caller executes fn and later callers block until
+        it finishes. Exceptions raised by fn are re-raised in every caller.
+
+        Args:
+            key (hashable): Identifies equivalent calls
+            fn (callable): Function to execute
+            *args: Positional arguments for fn
+            timeout (float, optional): Longest a waiting caller blocks on the in-flight call;
+                does not limit the caller that executes fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            object: The result of fn
+
+        Raises:
+            TimeoutError: If a waiting caller's timeout expires first
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(None if timeout is None else max(0.0, timeout)):
+                raise TimeoutError("Timed out waiting for an in-flight call")
+        else:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Asyncio-aware variant of do.
+
+        Coroutines on the same event loop share one future per key. The
+        leader runs fn through do in the loop's default executor, so async
+        callers also coalesce with threaded callers of the same key.
+
+        Args:
+            key (hashable): Identifies equivalent calls
+            fn (callable): Blocking function to execute
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            object: The result of fn
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+
+        future = self._async_calls.get(loop_key)
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._async_calls[loop_key] = future
+        try:
+            result = await loop.run_in_executor(None, lambda: self.do(key, fn, *args, **kwargs))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve the exception so an unawaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._async_calls[loop_key]
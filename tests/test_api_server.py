@@ -0,0 +1,94 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from api_server import MAX_BODY_BYTES, _make_server
+
+
+class EchoService:
+    def analyze(self, body):
+        return {'claim_text': body.get('claim_text')}
+
+    analyze_batch = retrieve = analyze
+
+    def health(self):
+        return {'status': 'ok'}
+
+
+@pytest.fixture
+def server():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    http_server = _make_server(sock, EchoService())
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield sock.getsockname()
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def post(address, headers, body=b""):
+    """Send a raw POST /analyze and return the status code and decoded body."""
+    request = "POST /analyze HTTP/1.1\r\nHost: test\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    with socket.create_connection(address, timeout=5) as conn:
+        conn.sendall(request.encode() + b"\r\n" + body)
+        data = b""
+        while chunk := conn.recv(65536):
+            data += chunk
+            head, _, rest = data.partition(b"\r\n\r\n")
+            length = [line for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:")]
+            if length and len(rest) >= int(length[0].split(b":")[1]):
+                break
+    status = int(head.split()[1])
+    return status, json.loads(rest)
+
+
+def test_valid_request(server):
+    body = json.dumps({'claim_text': 'ghost'}).encode()
+    assert post(server, {'Content-Length': len(body)}, body) == (200, {'claim_text': 'ghost'})
+
+
+def test_missing_content_length(server):
+    assert post(server, {})[0] == 411
+
+
+@pytest.mark.parametrize("value", ["abc", "-5", "1.5"])
+def test_invalid_content_length(server, value):
+    assert post(server, {'Content-Length': value})[0] == 400
+
+
+def test_body_too_large(server):
+    assert post(server, {'Content-Length': MAX_BODY_BYTES + 1})[0] == 413
+
+
+@pytest.fixture
+def dedup_service(tmp_path):
+    from api_server import ClaimCheckService
+    from index_store import load_or_build_index
+    myths = [{'source_id': 'ghosts', 'text': 'The ghost was debunked as a hoax. Creaking is a natural phenomenon.',
+              'source': 'Skeptic Weekly', 'domain': 'Ghost Myths', 'publication_date': '2023-01-15'}]
+    engine = load_or_build_index(str(tmp_path / 'index.json'), myths_data=myths)
+    return ClaimCheckService(engine, analyzer_options={'use_llm': False}, dedup_threshold=0.5)
+
+
+def test_reused_result_hides_earlier_claim_text(dedup_service):
+    first = dedup_service.analyze({'claim_text': 'The old house ghost is real'})
+    assert first['reused'] is False
+    second = dedup_service.analyze({'claim_text': 'The old house ghost is real!'})
+    assert second['reused'] is True
+    assert second['claim_text'] == 'The old house ghost is real!'
+    assert 'reused_from' not in second
+    assert second['verdict'] == first['verdict']
+
+
+def test_dedup_entries_do_not_store_claim_text(dedup_service):
+    dedup_service.analyze({'claim_text': 'The old house ghost is real'})
+    dedup_service.analyze_batch({'claims': [{'claim_text': 'Creaking floors mean a ghost'}]})
+    for claim_text in ('The old house ghost is real', 'Creaking floors mean a ghost'):
+        processed = dedup_service.data_processor.process_claim_text(claim_text)
+        scope = (dedup_service.embedding_engine.version, None, None, 5)
+        match = dedup_service.deduplicator.lookup(processed, scope)
+        assert match is not None and 'claim_text' not in match['result']
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+st = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+import claim_analyzer
+import index_store
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+MYTHS = [
+    {'source_id': 'ghosts', 'text': 'The ghost was debunked as a hoax. Creaking is a natural phenomenon.',
+     'source': 'Skeptic Weekly', 'domain': 'Ghost Myths', 'publication_date': '2023-01-15'},
+    {'source_id': 'ufos', 'text': 'The alien craft was a misidentification of Venus, an optical illusion.',
+     'source': 'Sky Review', 'domain': 'UFO Encounters', 'publication_date': '2022-06-01'}
+]
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    """Point the app at a small index and count index loads and analyzer constructions."""
+    counts = {'index_loads': 0, 'analyzers': 0}
+    load = index_store.load_or_build_index
+
+    def counting_load(path, myths_data=None):
+        counts['index_loads'] += 1
+        return load(str(tmp_path / 'index.json'), myths_data=MYTHS)
+
+    class CountingAnalyzer(claim_analyzer.ClaimAnalyzer):
+        def __init__(self, *args, **kwargs):
+            counts['analyzers'] += 1
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(index_store, 'load_or_build_index', counting_load)
+    monkeypatch.setattr(claim_analyzer, 'ClaimAnalyzer', CountingAnalyzer)
+    monkeypatch.setenv('HUGGINGFACE_API_KEY', '')
+    st.cache_resource.clear()
+    yield counts
+    st.cache_resource.clear()
+
+
+def start_session():
+    """Run the app as a new browser session with the LLM turned off."""
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    llm_toggle = next(box for box in at.checkbox if box.label == "Use LLM for Explanations")
+    llm_toggle.uncheck().run()
+    assert not at.exception
+    return at
+
+
+def test_sessions_share_one_index_and_analyzer(shared):
+    first = start_session()
+    second = start_session()
+
+    assert shared['index_loads'] == 1
+    # One analyzer per LLM setting, not per session
+    assert shared['analyzers'] == 2
+    for at in (first, second):
+        assert "Evidence index ready (2 passages)" in at.success[0].value
+
+
+def test_second_session_analyzes_against_shared_index(shared):
+    start_session()
+    at = start_session()
+    at.text_area[0].input("A ghost haunts the house and it is not a hoax").run()
+    next(button for button in at.button if button.label == "Analyze Claim").click().run()
+
+    assert not at.exception
+    assert any("Verdict: " in block.value for block in at.markdown)
+    assert shared['index_loads'] == 1
@@ -0,0 +1,57 @@
+import copy
+import json
+
+import pytest
+
+from benchmark import compare_results, main, run_benchmark
+
+ARGS = ['--sizes', '20', '--queries', '5', '--no-memory']
+
+
+def scaled(report, factor):
+    """Copy a report with every timing multiplied by factor."""
+    report = copy.deepcopy(report)
+    for result in report['results']:
+        for key in ('process_seconds', 'build_seconds', 'annotate_seconds'):
+            result[key] *= factor
+        for summary in result['stages'].values():
+            summary['p50_ms'] *= factor
+            summary['p99_ms'] *= factor
+    return report
+
+
+@pytest.fixture(scope='module')
+def report():
+    return run_benchmark([20], num_queries=5, measure_memory=False)
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance(report):
+    assert compare_results(report, report) == []
+    assert compare_results(scaled(report, 2), report) == []
+    regressions = compare_results(report, scaled(report, 2), tolerance=0.2)
+    assert any(regression.startswith('20 build_seconds') for regression in regressions)
+    assert compare_results(report, scaled(report, 1.1), tolerance=0.2) == []
+
+
+def test_compare_skips_sizes_missing_from_baseline(report):
+    other = copy.deepcopy(report)
+    other['results'][0]['documents'] = 999
+    assert compare_results(other, scaled(report, 10)) == []
+
+
+def test_main_exit_code_reflects_regressions(report, tmp_path):
+    slower = tmp_path / 'slower.json'
+    slower.write_text(json.dumps(scaled(report, 1000)), encoding='utf-8')
+    assert main(ARGS + ['--compare', str(slower)]) == 0
+
+    faster = tmp_path / 'faster.json'
+    faster.write_text(json.dumps(scaled(report, 1e-6)), encoding='utf-8')
+    assert main(ARGS + ['--compare', str(faster)]) == 1
+
+
+def test_main_writes_results(tmp_path):
+    output = tmp_path / 'results.json'
+    assert main(ARGS + ['-o', str(output)]) == 0
+    saved = json.loads(output.read_text(encoding='utf-8'))
+    assert [result['documents'] for result in saved['results']] == [20]
+    assert saved['meta']['queries'] == 5
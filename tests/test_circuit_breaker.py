@@ -0,0 +1,115 @@
+import time
+
+from circuit_breaker import CircuitBreaker
+from claim_analyzer import ClaimAnalyzer
+
+EVIDENCE = [{'id': 1, 'text': 'Sleep paralysis explains apparitions.', 'source': 'Sleep Review',
+             'domain': 'Ghost Myths', 'similarity': 0.8}]
+FACTS = {'sources': ['Sleep Review'], 'contradictions': [], 'scientific_explanations': [],
+         'debunking_evidence': [], 'supporting_evidence': []}
+# Complete facts, for paths that fall back to the rule-based explanation
+RULE_FACTS = ClaimAnalyzer(use_llm=False).extract_key_facts(EVIDENCE)
+
+
+def half_open_analyzer(stream):
+    """Analyzer whose breaker is half-open with one trial slot and whose LLM streams from stream."""
+    analyzer = ClaimAnalyzer(llm_config={'backend': 'template'}, breaker_threshold=1, breaker_recovery=0.01)
+    analyzer.llm_service.stream_explanation = lambda *args, **kwargs: stream()
+    analyzer.circuit_breaker.record_failure()
+    time.sleep(0.02)
+    assert analyzer.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    return analyzer
+
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    time.sleep(0.02)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_release_returns_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+
+def test_stream_closed_early_does_not_leak_slot():
+    def stream():
+        yield 'first'
+        time.sleep(10)
+        yield 'second'
+
+    analyzer = half_open_analyzer(stream)
+    chunks = analyzer.stream_explanation('I saw a ghost', 'Debunked', FACTS, [])
+    assert next(chunks) == 'first'
+    chunks.close()
+    assert analyzer.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stream_fallback_uses_single_trial():
+    def stream():
+        raise RuntimeError("backend down")
+        yield
+
+    analyzer = half_open_analyzer(stream)
+    explanation = ''.join(analyzer.stream_explanation('I saw a ghost', 'Debunked', FACTS, EVIDENCE))
+    assert explanation.startswith('The claim has been debunked')
+    assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
+
+
+def test_missed_deadline_does_not_open_breaker():
+    from llm_backends import DeadlineExceeded
+
+    analyzer = ClaimAnalyzer(llm_config={'backend': 'template'}, breaker_threshold=1)
+
+    def missed(*args, **kwargs):
+        raise DeadlineExceeded("Deadline passed before the request was sent")
+
+    def missed_stream():
+        raise DeadlineExceeded("Deadline passed during generation")
+        yield
+
+    analyzer.llm_service.generate_explanation = missed
+    analyzer.llm_service.stream_explanation = lambda *args, **kwargs: missed_stream()
+    for _ in range(3):
+        analyzer._generate_explanation("claim", "Likely False", RULE_FACTS, EVIDENCE)
+        assert list(analyzer.stream_explanation("claim", "Likely False", RULE_FACTS, EVIDENCE))
+    assert analyzer.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_missed_deadline_frees_half_open_trial():
+    from llm_backends import DeadlineExceeded
+
+    def missed_stream():
+        raise DeadlineExceeded("Deadline passed during generation")
+        yield
+
+    analyzer = half_open_analyzer(missed_stream)
+    list(analyzer.stream_explanation("claim", "Likely False", RULE_FACTS, EVIDENCE))
+    assert analyzer.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert analyzer.circuit_breaker.allow_request()
+
+
+def test_backend_errors_still_open_breaker():
+    from llm_backends import LLMServiceError
+
+    analyzer = ClaimAnalyzer(llm_config={'backend': 'template'}, breaker_threshold=1)
+
+    def failing(*args, **kwargs):
+        raise LLMServiceError("API returned status code 500")
+
+    analyzer.llm_service.generate_explanation = failing
+    analyzer._generate_explanation("claim", "Likely False", RULE_FACTS, EVIDENCE)
+    assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from claim_analyzer import ClaimAnalyzer
+
+EVIDENCE = [{'id': 1, 'text': 'Sleep paralysis explains apparitions seen at night.', 'source': 'Sleep Review',
+             'domain': 'Ghost Myths', 'similarity': 0.8}]
+
+
+def test_analyze_claims_keeps_order_and_bounds_queued_work():
+    analyzer = ClaimAnalyzer(use_llm=False)
+    lock = threading.Lock()
+    finished = [0]
+
+    def slow_explanation(claim_text, *args, **kwargs):
+        time.sleep(0.005)
+        with lock:
+            finished[0] += 1
+        return claim_text
+
+    analyzer._generate_explanation = slow_explanation
+    backlog = []
+
+    def claims():
+        explained = 0
+        for i in range(40):
+            with lock:
+                backlog.append(explained - finished[0])
+            if i % 5:
+                explained += 1
+            yield f"claim {i}", EVIDENCE if i % 5 else []
+
+    results = analyzer.analyze_claims(claims(), max_workers=3)
+    assert len(results) == 40
+    for i, result in enumerate(results):
+        if i % 5:
+            assert result['explanation'] == f"claim {i}"
+        else:
+            assert result['verdict'] == "Requires Further Research"
+    # Claims are only read while fewer than 2 * max_workers explanations are outstanding
+    assert max(backlog) <= 6
+
+
+def test_analyze_claims_records_errors_per_claim():
+    analyzer = ClaimAnalyzer(use_llm=False)
+
+    def failing_explanation(claim_text, *args, **kwargs):
+        if claim_text == "bad":
+            raise RuntimeError("boom")
+        return "ok"
+
+    analyzer._generate_explanation = failing_explanation
+    results = analyzer.analyze_claims([("good", EVIDENCE), ("bad", EVIDENCE)], max_workers=2)
+    assert [r['error'] for r in results] == [None, "boom"]
+    assert results[0]['explanation'] == "ok"
+
+
+FACTS = ClaimAnalyzer(use_llm=False).extract_key_facts(EVIDENCE)
+
+
+def tiered_analyzer(**options):
+    analyzer = ClaimAnalyzer(tiered=True, tier_threshold=0.85, llm_config={
+        'backend': 'template', 'backend_options': {'latency_ms': 0, 'per_token_ms': 0, 'jitter': 0},
+        'coalesce': False
+    }, **options)
+    llm_claims = []
+    generate = analyzer.llm_service.generate_explanation
+
+    def counting_generate(claim_text, *args, **kwargs):
+        llm_claims.append(claim_text)
+        return generate(claim_text, *args, **kwargs)
+
+    analyzer.llm_service.generate_explanation = counting_generate
+    return analyzer, llm_claims
+
+
+def test_tiered_mode_skips_llm_for_confident_verdicts():
+    analyzer, llm_claims = tiered_analyzer()
+    rule_based = analyzer._rule_based_explanation("Likely False", FACTS, EVIDENCE)
+    assert analyzer._generate_explanation("sure", "Likely False", FACTS, EVIDENCE, confidence=0.9) == rule_based
+    assert analyzer._generate_explanation("edge", "Likely False", FACTS, EVIDENCE, confidence=0.85) == rule_based
+    analyzer._generate_explanation("unsure", "Likely False", FACTS, EVIDENCE, confidence=0.6)
+
+    assert llm_claims == ["unsure"]
+    assert analyzer.explanation_stats == {'llm_calls': 1, 'llm_calls_avoided': 2}
+    assert analyzer.llm_avoidance_rate() == 2 / 3
+    assert analyzer._enrichment_executor is None
+
+
+def test_avoidance_rate_without_explanations_is_zero():
+    analyzer, _ = tiered_analyzer()
+    assert analyzer.llm_avoidance_rate() == 0.0
+
+
+def test_background_enrichment_is_available_later():
+    analyzer, llm_claims = tiered_analyzer(enrich_in_background=True)
+    analyzer._generate_explanation("sure", "Likely False", FACTS, EVIDENCE, confidence=0.95)
+    analyzer.close()
+
+    assert llm_claims == ["sure"]
+    enriched = analyzer.get_enriched_explanation("sure", "Likely False")
+    assert enriched and enriched != analyzer._rule_based_explanation("Likely False", FACTS, EVIDENCE)
+    assert analyzer.get_enriched_explanation("sure", "Likely True") is None
+    assert analyzer.explanation_stats['llm_calls_avoided'] == 1
+
+
+def test_close_shuts_down_enrichment_threads():
+    analyzer, _ = tiered_analyzer(enrich_in_background=True)
+    analyzer._generate_explanation("sure", "Likely False", FACTS, EVIDENCE, confidence=0.95)
+    executor = analyzer._enrichment_executor
+    analyzer.close()
+    assert analyzer._enrichment_executor is None
+    assert executor._shutdown
+    # Closing twice, or an analyzer that never enriched, is harmless
+    analyzer.close()
+    ClaimAnalyzer(use_llm=False).close()
@@ -0,0 +1,71 @@
+import pytest
+
+from claim_dedup import ClaimDeduplicator, choose_bands, jaccard
+
+
+def test_identical_claim_is_reused():
+    dedup = ClaimDeduplicator(threshold=0.8)
+    dedup.add("ghost walked through the mansion wall", "result")
+    match = dedup.lookup("The ghost walked through the mansion wall!")
+    assert match == {'result': "result", 'claim_text': "ghost walked through the mansion wall", 'similarity': 1.0}
+
+
+def test_dissimilar_claim_is_not_reused():
+    dedup = ClaimDeduplicator(threshold=0.8)
+    dedup.add("ghost walked through the mansion wall", "result")
+    assert dedup.lookup("ufo lights over the city") is None
+    # Four of five keywords shared: Jaccard 4/6 is below the threshold
+    assert dedup.lookup("ghost walked through the mansion door") is None
+    assert dedup.stats()['misses'] == 2
+
+
+def test_scopes_are_separate():
+    dedup = ClaimDeduplicator(threshold=0.8)
+    dedup.add("ghost walked through the mansion wall", "v1", scope=("v1", None))
+    assert dedup.lookup("ghost walked through the mansion wall", scope=("v2", None)) is None
+    assert dedup.lookup("ghost walked through the mansion wall", scope=("v1", None))['result'] == "v1"
+
+
+def test_readding_replaces_entry():
+    dedup = ClaimDeduplicator(threshold=0.8)
+    dedup.add("ghost walked through the mansion wall", "old")
+    dedup.add("ghost walked through the mansion wall", "new")
+    assert len(dedup) == 1
+    assert dedup.lookup("ghost walked through the mansion wall")['result'] == "new"
+
+
+def test_least_recently_used_entries_are_dropped():
+    dedup = ClaimDeduplicator(threshold=0.8, max_entries=2)
+    dedup.add("ghost mansion wall", "a")
+    dedup.add("ufo city lights", "b")
+    dedup.lookup("ghost mansion wall")
+    dedup.add("psychic spoon bending", "c")
+    assert len(dedup) == 2
+    assert dedup.lookup("ufo city lights") is None
+    assert dedup.lookup("ghost mansion wall")['result'] == "a"
+
+
+def test_claims_without_keywords_are_ignored():
+    dedup = ClaimDeduplicator()
+    assert dedup.add("it is", "result") is False
+    assert dedup.lookup("it is") is None
+
+
+def test_stats_report_hit_rate():
+    dedup = ClaimDeduplicator()
+    dedup.add("ghost mansion wall", "a")
+    dedup.lookup("ghost mansion wall")
+    dedup.lookup("ufo city lights")
+    assert dedup.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_band_layout_meets_recall():
+    bands, rows = choose_bands(64, 0.8)
+    assert bands * rows == 64
+    assert 1 - (1 - 0.8 ** rows) ** bands >= 0.99
+    assert jaccard({'a', 'b'}, {'b', 'c'}) == pytest.approx(1 / 3)
+
+
+def test_threshold_is_validated():
+    with pytest.raises(ValueError):
+        ClaimDeduplicator(threshold=0)
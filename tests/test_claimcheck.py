@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from claimcheck import load_checkpoint, read_claims, run_batch, save_checkpoint
+from embedding_engine import EmbeddingEngine
+from index_store import default_annotations, load_or_build_index
+
+MYTHS = [
+    {'source_id': 'ghosts', 'text': 'The ghost was debunked as a hoax. Creaking is a natural phenomenon.',
+     'source': 'Skeptic Weekly', 'domain': 'Ghost Myths', 'publication_date': '2023-01-15'},
+    {'source_id': 'ufos', 'text': 'The alien craft was a misidentification of Venus, an optical illusion.',
+     'source': 'Sky Review', 'domain': 'UFO Encounters', 'publication_date': '2022-06-01'}
+]
+
+CLAIMS = [
+    {'claim_id': 'c1', 'claim_text': 'The house is haunted by a ghost', 'domain': 'Ghost Myths'},
+    {'claim_id': 'c2', 'claim_text': 'An alien craft landed near the farm', 'domain': 'UFO Encounters'},
+    {'claim_id': 'c3', 'claim_text': 'Creaking floors prove a ghost is present', 'domain': 'Ghost Myths'},
+    {'claim_id': 'c4', 'claim_text': 'Venus is an alien spaceship', 'domain': 'UFO Encounters'},
+    {'claim_id': 'c5', 'claim_text': 'Ghosts cause cold spots', 'domain': 'Ghost Myths'}
+]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / 'index.json')
+    load_or_build_index(path, myths_data=MYTHS)
+    return path
+
+
+@pytest.fixture
+def claims_path(tmp_path):
+    path = tmp_path / 'claims.jsonl'
+    path.write_text(''.join(json.dumps(claim) + '\n' for claim in CLAIMS), encoding='utf-8')
+    return str(path)
+
+
+def _read_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_claims_reports_non_object_lines(tmp_path):
+    path = tmp_path / 'claims.jsonl'
+    path.write_text('{"claim_id": "a", "claim_text": "x"}\n123\n["b"]\nnot json\n', encoding='utf-8')
+    records = list(read_claims(str(path)))
+    assert records[0] == {'claim_id': 'a', 'claim_text': 'x'}
+    assert all(record['claim_id'] is None and record['error'].startswith('Line ') for record in records[1:])
+    assert 'got int' in records[1]['error']
+
+
+def test_batch_writes_one_result_per_claim(index_path, claims_path, tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    summary = run_batch(claims_path, output_path, processes=1, index_path=index_path, window_size=2)
+
+    results = _read_results(output_path)
+    assert [result['claim_id'] for result in results] == [claim['claim_id'] for claim in CLAIMS]
+    assert summary['claims'] == len(CLAIMS)
+    assert summary['errors'] == 0
+    assert sum(summary['verdicts'].values()) == len(CLAIMS)
+    assert load_checkpoint(f"{output_path}.checkpoint") is None
+
+
+def test_bad_records_do_not_abort_the_batch(index_path, tmp_path):
+    claims_path = tmp_path / 'claims.jsonl'
+    claims_path.write_text(json.dumps(CLAIMS[0]) + '\n123\n' + json.dumps(CLAIMS[1]) + '\n', encoding='utf-8')
+    output_path = str(tmp_path / 'results.jsonl')
+    summary = run_batch(str(claims_path), output_path, processes=1, index_path=index_path)
+
+    results = _read_results(output_path)
+    assert [result['claim_id'] for result in results] == ['c1', None, 'c2']
+    assert 'error' in results[1]
+    assert summary['errors'] == 1
+
+
+def test_missing_index_is_built_with_annotations(claims_path, tmp_path, monkeypatch):
+    import index_store
+    monkeypatch.setattr(index_store, 'build_index',
+                        lambda myths_data=None, _build=index_store.build_index: _build(MYTHS))
+    index_path = str(tmp_path / 'new_index.json')
+    run_batch(claims_path, str(tmp_path / 'results.jsonl'), processes=1, index_path=index_path)
+
+    engine = EmbeddingEngine.load(index_path)
+    assert engine.snapshot.annotations == default_annotations(engine.passages)
+
+
+def test_resume_skips_done_claims_and_truncates_partial_output(index_path, claims_path, tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    run_batch(claims_path, output_path, processes=1, index_path=index_path)
+    with open(output_path, 'rb') as f:
+        complete = f.read()
+
+    # Simulate a run interrupted after two claims, with a torn third line
+    done = b''.join(complete.splitlines(keepends=True)[:2])
+    with open(output_path, 'wb') as f:
+        f.write(done + b'{"claim_id": "c3", "verd')
+    checkpoint_path = f"{output_path}.checkpoint"
+    save_checkpoint(checkpoint_path, {'input': str(tmp_path / 'claims.jsonl'), 'claims_done': 2,
+                                      'output_bytes': len(done)})
+
+    summary = run_batch(claims_path, output_path, processes=1, index_path=index_path, resume=True)
+    assert summary['claims'] == len(CLAIMS) - 2
+    with open(output_path, 'rb') as f:
+        assert f.read() == complete
+    assert load_checkpoint(checkpoint_path) is None
+
+
+def test_resume_without_output_starts_over(index_path, claims_path, tmp_path):
+    output_path = str(tmp_path / 'results.jsonl')
+    save_checkpoint(f"{output_path}.checkpoint", {'input': str(tmp_path / 'claims.jsonl'), 'claims_done': 3,
+                                                 'output_bytes': 100})
+
+    summary = run_batch(claims_path, output_path, processes=1, index_path=index_path, resume=True)
+    assert summary['claims'] == len(CLAIMS)
+    assert len(_read_results(output_path)) == len(CLAIMS)
+
+
+def test_resume_rejects_checkpoint_for_other_input(index_path, claims_path, tmp_path):
+    output_path = tmp_path / 'results.jsonl'
+    output_path.write_bytes(b'')
+    save_checkpoint(f"{output_path}.checkpoint", {'input': '/elsewhere/claims.jsonl', 'claims_done': 1,
+                                                 'output_bytes': 0})
+    with pytest.raises(ValueError):
+        run_batch(claims_path, str(output_path), processes=1, index_path=index_path, resume=True)
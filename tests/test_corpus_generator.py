@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from corpus_generator import CorpusGenerator, main, read_jsonl
+
+CLAIM_FIELDS = {'claim_id', 'claim_text', 'claim_date', 'domain', 'target_source_id'}
+
+
+def test_documents_are_deterministic_per_seed():
+    assert CorpusGenerator(seed=3).generate_documents(20) == CorpusGenerator(seed=3).generate_documents(20)
+    assert CorpusGenerator(seed=3).generate_documents(20) != CorpusGenerator(seed=4).generate_documents(20)
+
+
+def test_queries_from_a_stream_match_queries_from_a_list():
+    generator = CorpusGenerator(seed=1)
+    documents = generator.generate_documents(50)
+    from_list = generator.generate_queries(documents, 10)
+    from_stream = generator.generate_queries(generator.iter_documents(50), 10)
+    assert from_list == from_stream
+
+
+@pytest.mark.parametrize("num_queries", [10, 80])
+def test_queries_target_articles_in_the_corpus(num_queries):
+    generator = CorpusGenerator(seed=2)
+    documents = generator.generate_documents(40)
+    claims = generator.generate_queries(documents, num_queries)
+
+    assert [claim['claim_id'] for claim in claims] == list(range(1, num_queries + 1))
+    by_id = {doc['source_id']: doc for doc in documents}
+    targets = [claim['target_source_id'] for claim in claims]
+    assert all(set(claim) == CLAIM_FIELDS for claim in claims)
+    assert all(by_id[claim['target_source_id']]['domain'] == claim['domain'] for claim in claims)
+    # Distinct targets while there are enough articles, every article once there are not
+    assert len(set(targets)) == min(num_queries, len(documents))
+
+
+def test_no_documents_gives_no_queries():
+    assert CorpusGenerator().generate_queries(iter([]), 5) == []
+
+
+def test_cli_streams_articles_and_writes_claims(tmp_path):
+    output = tmp_path / 'articles.jsonl'
+    queries_output = tmp_path / 'claims.jsonl'
+    assert main(['30', '-o', str(output), '--queries', '5', '--queries-output', str(queries_output),
+                 '--seed', '7', '--vocabulary', '2000']) == 0
+
+    documents = list(read_jsonl(str(output)))
+    claims = list(read_jsonl(str(queries_output)))
+    generator = CorpusGenerator(seed=7, vocabulary_size=2000)
+    assert documents == json.loads(json.dumps(generator.generate_documents(30)))
+    assert claims == generator.generate_queries(documents, 5)
+    assert {claim['target_source_id'] for claim in claims} <= {doc['source_id'] for doc in documents}
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from llm_cache import LLMResponseCache
+from llm_service import LLMService, _clean_explanation, _clean_explanation_stream
+
+PROMPT = 'Task: Explain the verdict.\nClaim: "ghost"\nExplanation:'
+RESPONSES = [
+    "  The creaking is thermal contraction.  \n",
+    "Explanation: The creaking is thermal contraction.",
+    "\n Explanation:\n The sighting was Venus. ",
+    PROMPT + " The sighting was Venus.\n",
+    "Task force reports found nothing.",
+    "Explanation",
+    "   ",
+    "",
+    "Text with Explanation: inside stays whole."
+]
+
+
+def random_chunks(text, rng):
+    chunks = []
+    while text:
+        size = rng.randint(1, 6)
+        chunks.append(text[:size])
+        text = text[size:]
+    return chunks
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_streamed_cleanup_matches_whole_response_cleanup(response):
+    rng = random.Random(response)
+    expected = _clean_explanation(response, PROMPT)
+    for _ in range(50):
+        chunks = list(_clean_explanation_stream(random_chunks(response, rng), PROMPT))
+        assert "".join(chunks) == expected
+        assert all(chunks)
+
+
+def test_cleanup_removes_echoed_prompt_and_label():
+    assert _clean_explanation(PROMPT + "\n  Because.", PROMPT) == "Because."
+    assert _clean_explanation("Explanation: Because.", PROMPT) == "Because."
+    assert _clean_explanation("Because. Explanation: more.", PROMPT) == "Because. Explanation: more."
+
+
+def test_plain_stream_is_not_held_back():
+    chunks = iter(["The ", "sighting ", "was ", "Venus."])
+    cleaned = _clean_explanation_stream(chunks, PROMPT)
+    assert next(cleaned) == "The"
+    assert next(cleaned) == " sighting"
+
+
+class ScriptedBackend:
+    def __init__(self, text):
+        self.text = text
+        self.requests = 0
+
+    def generate(self, prompt, parameters, priority, tenant, deadline):
+        self.requests += 1
+        return self.text
+
+    def stream(self, prompt, parameters, priority, tenant, deadline):
+        self.requests += 1
+        yield from random_chunks(self.text, random.Random(0))
+
+
+@pytest.mark.parametrize("first", ["generate", "stream"])
+def test_streamed_and_fetched_explanations_share_cache_entries(tmp_path, first):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    service = LLMService(backend='template', cache=cache, coalesce=False)
+    backend = service.backend = ScriptedBackend("  Explanation: Sleep paralysis explains it.  ")
+    args = ("I saw a ghost", {'sources': ['Sleep Review']}, [{'text': 'Sleep paralysis.', 'source': 'Sleep Review'}],
+            "Debunked")
+
+    def generate():
+        return service.generate_explanation(*args, temperature=0)
+
+    def stream():
+        return "".join(service.stream_explanation(*args, temperature=0))
+
+    calls = [generate, stream] if first == "generate" else [stream, generate]
+    assert [call() for call in calls] == ["Sleep paralysis explains it."] * 2
+    assert backend.requests == 1
+    [value] = [row[0] for row in cache._conn.execute("SELECT value FROM responses")]
+    assert value == backend.text
+    cache.close()
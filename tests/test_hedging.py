@@ -0,0 +1,91 @@
+import threading
+
+from llm_service import LLMService
+
+
+def hedged_service(samples=3, latency=0.01):
+    service = LLMService(backend='template', backend_options={'latency_ms': 0, 'per_token_ms': 0, 'jitter': 0},
+                         coalesce=False, hedge=True, hedge_min_samples=samples)
+    service._latencies.extend([latency] * samples)
+    return service
+
+
+def scripted_backend(service, *responses):
+    """Replace the backend with one that answers the nth request with responses[n]."""
+    calls = []
+    lock = threading.Lock()
+
+    def generate(prompt, parameters, priority, tenant, deadline):
+        with lock:
+            respond = responses[len(calls)]
+            calls.append(threading.get_ident())
+        return respond()
+
+    service.backend.generate = generate
+    return calls
+
+
+def test_slow_request_is_hedged_and_faster_answer_wins():
+    service = hedged_service()
+    release_primary = threading.Event()
+    primary_done = threading.Event()
+
+    def slow():
+        release_primary.wait(5)
+        primary_done.set()
+        return "primary"
+
+    calls = scripted_backend(service, slow, lambda: "hedge")
+    assert service._send_hedged("prompt", {}, "interactive", "default", None) == "hedge"
+    assert len(calls) == 2
+    assert service.hedge_stats == {'hedged': 1, 'hedge_wins': 1}
+
+    # The loser finishes in the background and its answer is discarded
+    release_primary.set()
+    assert primary_done.wait(5)
+    service._hedge_executor.shutdown(wait=True)
+    assert service.hedge_stats == {'hedged': 1, 'hedge_wins': 1}
+
+
+def test_hedge_waits_for_the_delay():
+    service = hedged_service(latency=0.2)
+    finished = threading.Event()
+
+    def quick():
+        finished.wait(0.05)
+        return "primary"
+
+    calls = scripted_backend(service, quick, lambda: "hedge")
+    assert service._hedge_delay() == 0.2
+    assert service._send_hedged("prompt", {}, "interactive", "default", None) == "primary"
+    assert len(calls) == 1
+    assert service.hedge_stats == {'hedged': 0, 'hedge_wins': 0}
+
+
+def test_no_hedging_until_enough_samples():
+    service = hedged_service(samples=3)
+    service._latencies.clear()
+    service._latencies.extend([0.01, 0.01])
+    assert service._hedge_delay() is None
+
+    release = threading.Event()
+    threading.Timer(0.1, release.set).start()
+    calls = scripted_backend(service, lambda: release.wait(5) and "primary", lambda: "hedge")
+    assert service._send_hedged("prompt", {}, "interactive", "default", None) == "primary"
+    assert len(calls) == 1
+
+
+def test_primary_error_falls_through_to_hedge():
+    service = hedged_service()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("backend down")
+
+    def hedge():
+        release.set()
+        return "hedge"
+
+    scripted_backend(service, failing, hedge)
+    assert service._send_hedged("prompt", {}, "interactive", "default", None) == "hedge"
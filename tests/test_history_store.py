@@ -0,0 +1,76 @@
+import gc
+import sqlite3
+import time
+
+from history_store import ClaimHistoryStore
+
+EVIDENCE = [{'passage_id': 'p1', 'similarity': 0.5}]
+
+
+def fill(store, count):
+    for i in range(count):
+        store.add(f"claim {i}", "Debunked", 0.9, "explanation", EVIDENCE)
+
+
+def spilled_rows(path, session_id=None):
+    with sqlite3.connect(path) as conn:
+        if session_id is None:
+            return conn.execute("SELECT COUNT(*) FROM claim_history").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM claim_history WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+
+def test_pages_span_memory_and_spill(tmp_path):
+    store = ClaimHistoryStore(max_entries=3, spill_path=str(tmp_path / "history.db"))
+    fill(store, 8)
+    assert len(store) == 8
+    claims = [entry['claim'] for page in range(store.page_count(3)) for entry in store.page(page, 3)]
+    assert claims == [f"claim {i}" for i in reversed(range(8))]
+    assert store.get(0)['claim'] == "claim 0"
+    store.close()
+
+
+def test_close_deletes_session_rows(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = ClaimHistoryStore(max_entries=2, spill_path=path)
+    fill(store, 5)
+    assert spilled_rows(path, store.session_id) == 3
+    store.close()
+    assert spilled_rows(path) == 0
+    assert len(store) == 0
+
+
+def test_garbage_collected_store_releases_rows(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = ClaimHistoryStore(max_entries=2, spill_path=path)
+    fill(store, 5)
+    del store
+    gc.collect()
+    assert spilled_rows(path) == 0
+
+
+def test_sweep_expires_idle_sessions(tmp_path):
+    path = str(tmp_path / "history.db")
+    idle = ClaimHistoryStore(max_entries=1, spill_path=path, session_ttl=0.05)
+    fill(idle, 4)
+    time.sleep(0.1)
+    active = ClaimHistoryStore(max_entries=1, spill_path=path, session_ttl=0.05)
+    assert spilled_rows(path, idle.session_id) == 0
+    # The idle session notices its entries are gone
+    assert len(idle.page(0, 10)) == 1
+    assert len(idle) == 1
+    active.close()
+    idle.close()
+
+
+def test_total_spill_is_bounded(tmp_path):
+    path = str(tmp_path / "history.db")
+    first = ClaimHistoryStore(max_entries=1, spill_path=path, max_spilled_entries=5)
+    fill(first, 6)
+    second = ClaimHistoryStore(max_entries=1, spill_path=path, max_spilled_entries=5)
+    fill(second, 4)
+    second._sweep()
+    assert spilled_rows(path) == 5
+    # The oldest spills, from the first session, went first
+    assert spilled_rows(path, second.session_id) == 3
+    first.close()
+    second.close()
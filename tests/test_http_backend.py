@@ -0,0 +1,148 @@
+import socket
+import time
+
+import pytest
+import requests
+
+from llm_backends import DeadlineExceeded, HuggingFaceBackend, LLMServiceError, get_shared_session
+from mock_llm_server import start_mock_server
+from rate_limiter import PriorityScheduler
+
+PARAMETERS = {"max_new_tokens": 50, "temperature": 0.0}
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**options):
+        server = start_mock_server(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_backend(server, **options):
+    options.setdefault("backoff_factor", 0.01)
+    return HuggingFaceBackend("mock", api_url=f"http://127.0.0.1:{server.server_port}/", **options)
+
+
+def test_stream_holds_scheduler_slot_until_read(mock_server):
+    server = mock_server(token_delay=0.01)
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    backend = make_backend(server, scheduler=scheduler)
+
+    chunks = backend.stream("I saw a ghost", PARAMETERS)
+    assert next(chunks)
+    assert scheduler.metrics()['in_flight'] == 1
+    rest = list(chunks)
+    assert rest
+    assert scheduler.metrics()['in_flight'] == 0
+
+
+def test_stream_closed_early_releases_scheduler_slot(mock_server):
+    server = mock_server(token_delay=0.01)
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    backend = make_backend(server, scheduler=scheduler)
+
+    chunks = backend.stream("I saw a ghost", PARAMETERS)
+    next(chunks)
+    chunks.close()
+    assert scheduler.metrics()['in_flight'] == 0
+    assert backend.generate("I saw a ghost", PARAMETERS)
+    assert scheduler.metrics()['in_flight'] == 0
+
+
+class FakeResponse:
+    def __init__(self, headers=None, body=None):
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("no JSON body")
+        return self._body
+
+
+def test_generate_returns_text(mock_server):
+    server = mock_server()
+    assert make_backend(server).generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 1
+
+
+def test_transient_failures_are_retried(mock_server):
+    server = mock_server(fail_first=2)
+    assert make_backend(server, max_retries=3).generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 3
+
+
+def test_rate_limit_is_retried(mock_server):
+    server = mock_server(fail_first=1, error_status=429)
+    assert make_backend(server, max_retries=1).generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 2
+
+
+def test_retries_are_bounded(mock_server):
+    server = mock_server(error_rate=1.0)
+    with pytest.raises(LLMServiceError, match="503"):
+        make_backend(server, max_retries=2).generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 3
+
+
+def test_server_errors_are_not_retried(mock_server):
+    server = mock_server(error_rate=1.0, error_status=500)
+    with pytest.raises(LLMServiceError, match="500"):
+        make_backend(server, max_retries=3).generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 1
+
+
+def test_retry_after_is_honoured(mock_server):
+    server = mock_server(fail_first=1, retry_after=0.2)
+    start = time.monotonic()
+    make_backend(server, max_retries=1, backoff_factor=0.0).generate("I saw a ghost", PARAMETERS)
+    assert time.monotonic() - start >= 0.2
+
+
+def test_backoff_delay_is_capped():
+    backend = HuggingFaceBackend("mock", api_url="http://127.0.0.1:1/", backoff_factor=0.5, backoff_max=2.0)
+    assert all(0 <= backend._backoff_delay(attempt) <= 2.0 for attempt in range(10))
+    assert backend._backoff_delay(0, FakeResponse({"Retry-After": "1.5"})) >= 1.5
+    assert backend._backoff_delay(0, FakeResponse({"Retry-After": "60"})) == 2.0
+    assert backend._backoff_delay(0, FakeResponse(body={"estimated_time": 1.0})) >= 1.0
+    assert backend._backoff_delay(0, FakeResponse({"Retry-After": "soon"})) <= 0.5
+
+
+def test_read_timeout_is_retried_then_raised(mock_server):
+    server = mock_server(latency=0.5)
+    backend = make_backend(server, read_timeout=0.1, max_retries=1)
+    with pytest.raises(requests.Timeout):
+        backend.generate("I saw a ghost", PARAMETERS)
+    assert server.stats_snapshot()['requests'] == 2
+
+
+def test_deadline_stops_a_slow_request(mock_server):
+    server = mock_server(latency=1.0)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        make_backend(server).generate("I saw a ghost", PARAMETERS, deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - start < 0.8
+
+
+def test_connection_errors_are_retried_then_raised():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    backend = HuggingFaceBackend("mock", api_url=f"http://127.0.0.1:{port}/", max_retries=2, backoff_factor=0.01)
+    with pytest.raises(requests.ConnectionError):
+        backend.generate("I saw a ghost", PARAMETERS)
+
+
+def test_backends_share_one_session():
+    assert get_shared_session() is get_shared_session()
+    first = HuggingFaceBackend("a", api_url="http://127.0.0.1:1/")
+    second = HuggingFaceBackend("b", api_url="http://127.0.0.1:1/")
+    assert first.session is second.session
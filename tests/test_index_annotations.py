@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from claim_analyzer import ClaimAnalyzer
+from embedding_engine import EmbeddingEngine
+from index_store import build_index, default_annotations, load_or_build_index
+
+MYTHS = [
+    {'source_id': 'ghosts', 'text': 'The ghost was debunked as a hoax. Creaking is a natural phenomenon.',
+     'source': 'Skeptic Weekly', 'domain': 'Ghost Myths', 'publication_date': '2023-01-15'},
+    {'source_id': 'ufos', 'text': 'The alien craft was a misidentification of Venus, an optical illusion.',
+     'source': 'Sky Review', 'domain': 'UFO Encounters', 'publication_date': '2022-06-01'}
+]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / 'index.json')
+    load_or_build_index(path, myths_data=MYTHS)
+    return path
+
+
+def test_saved_annotations_match_computed(index_path):
+    engine = EmbeddingEngine.load(index_path)
+    assert engine.snapshot.annotations == default_annotations(engine.passages)
+
+
+def test_loaded_annotations_skip_scanning(index_path, monkeypatch):
+    engine = EmbeddingEngine.load(index_path)
+    analyzer = ClaimAnalyzer(use_llm=False)
+    monkeypatch.setattr(analyzer, '_annotate_text', lambda text: pytest.fail("passage text was rescanned"))
+    assert analyzer.index_passages(engine.passages, engine.snapshot.annotations) == len(engine.passages)
+    expected = ClaimAnalyzer(use_llm=False)
+    expected.index_passages(engine.passages)
+    assert analyzer.passage_annotations == expected.passage_annotations
+
+
+def test_annotations_for_other_keywords_are_recomputed(index_path):
+    engine = EmbeddingEngine.load(index_path)
+    analyzer = ClaimAnalyzer(use_llm=False, word_boundary=True)
+    analyzer.debunking_keywords = ['hoax']
+    analyzer.index_passages(engine.passages, engine.snapshot.annotations)
+    hoax = [passage['passage_id'] for passage in engine.passages if 'hoax' in passage['text']]
+    assert hoax
+    assert all(analyzer.passage_annotations[passage_id][0] == 1 for passage_id in hoax)
+
+
+def test_index_without_annotations_still_loads(tmp_path):
+    path = str(tmp_path / 'plain.json')
+    build_index(MYTHS).save(path)
+    engine = EmbeddingEngine.load(path)
+    assert engine.snapshot.annotations is None
+    assert ClaimAnalyzer(use_llm=False).index_passages(engine.passages, None) == len(engine.passages)
+
+
+def test_legacy_int_masks_are_still_read(index_path):
+    engine = EmbeddingEngine.load(index_path)
+    expected = ClaimAnalyzer(use_llm=False)
+    expected.index_passages(engine.passages)
+    legacy = {'signature': expected.annotation_signature(),
+              'masks': [list(expected.passage_annotations[passage['passage_id']]) for passage in engine.passages]}
+
+    analyzer = ClaimAnalyzer(use_llm=False)
+    analyzer.index_passages(engine.passages, json.loads(json.dumps(legacy)))
+    assert analyzer.passage_annotations == expected.passage_annotations
+
+
+def test_annotations_with_many_keywords_survive_json(index_path):
+    engine = EmbeddingEngine.load(index_path)
+    analyzer = ClaimAnalyzer(use_llm=False)
+    # A hit on the last of 20000 keywords needs a mask far past the 4300-digit int/str limit
+    analyzer.debunking_keywords = [f'filler{i}' for i in range(19999)] + ['hoax']
+    stored = json.loads(json.dumps(analyzer.export_annotations(engine.passages)))
+    assert [ids[0] for ids in stored['keyword_ids']] == [[19999] if 'hoax' in passage['text'] else []
+                                                         for passage in engine.passages]
+
+    loaded = ClaimAnalyzer(use_llm=False)
+    loaded.debunking_keywords = analyzer.debunking_keywords
+    loaded.index_passages(engine.passages, stored)
+    analyzer.index_passages(engine.passages)
+    assert loaded.passage_annotations == analyzer.passage_annotations
@@ -0,0 +1,117 @@
+import gc
+from collections import Counter
+
+from claim_analyzer import ClaimAnalyzer
+from embedding_engine import EmbeddingEngine, build_snapshot
+from index_store import BackgroundIndexBuilder, default_annotations
+
+
+def make_passages(prefix, count=4):
+    return [{'passage_id': f'{prefix}_{i}', 'text': f'ghost sighting {prefix} report number {i} debunked hoax',
+             'source': f'{prefix} source', 'domain': 'Ghost Myths', 'publication_date': '2023-01-15'}
+            for i in range(count)]
+
+
+def make_engine(prefix='old'):
+    engine = EmbeddingEngine()
+    engine.swap(build_snapshot(make_passages(prefix), version=prefix))
+    return engine
+
+
+class SwappingQuery(Counter):
+    """Query keywords that swap a new snapshot into the engine the first time the search reads them."""
+
+    def __init__(self, engine, snapshot, keywords):
+        super().__init__(keywords)
+        self.engine = engine
+        self.snapshot = snapshot
+
+    def items(self):
+        if self.snapshot is not None:
+            snapshot, self.snapshot = self.snapshot, None
+            self.engine.swap(snapshot)
+        return super().items()
+
+
+def test_search_in_flight_keeps_its_snapshot():
+    engine = make_engine('old')
+    query = SwappingQuery(engine, build_snapshot(make_passages('new'), version='new'), {'ghost': 1, 'hoax': 1})
+
+    results = engine.search(query, k=10)
+    assert engine.version == 'new'
+    assert len(results) == 4
+    assert all(result['passage_id'].startswith('old_') for result in results)
+    assert all(result['passage_id'].startswith('new_') for result in engine.search(Counter(ghost=1), k=10))
+
+
+def test_swap_returns_previous_snapshot_unchanged():
+    engine = make_engine('old')
+    before = engine.snapshot
+    previous = engine.swap(build_snapshot(make_passages('new', count=2), version='new'))
+    assert previous is before
+    assert len(previous.passages) == 4 and previous.version == 'old'
+    assert len(engine.passages) == 2
+
+
+def test_listeners_run_before_publication():
+    engine = make_engine('old')
+    seen = []
+
+    def listener(passages, annotations):
+        seen.append((engine.version, [passage['passage_id'] for passage in passages], annotations))
+
+    engine.add_swap_listener(listener)
+    snapshot = build_snapshot(make_passages('new', count=2), version='new')
+    snapshot = snapshot.with_version('new', {'signature': [], 'keyword_ids': []})
+    engine.swap(snapshot)
+    assert seen == [('old', ['new_0', 'new_1'], {'signature': [], 'keyword_ids': []})]
+
+
+def test_dead_bound_method_listeners_are_dropped():
+    engine = make_engine('old')
+    analyzer = ClaimAnalyzer(use_llm=False)
+    engine.add_swap_listener(analyzer.index_passages)
+    del analyzer
+    gc.collect()
+    engine.swap(build_snapshot(make_passages('new'), version='new'))
+    assert engine._swap_listeners == []
+
+
+def test_background_builder_annotates_before_swap_and_saves(tmp_path):
+    engine = make_engine('old')
+    analyzer = ClaimAnalyzer(use_llm=False)
+    analyzer.index_passages(engine.passages)
+    versions_at_annotation = []
+    index_passages = analyzer.index_passages
+
+    def recording_index_passages(passages, stored_annotations=None):
+        versions_at_annotation.append(engine.version)
+        return index_passages(passages, stored_annotations)
+
+    analyzer.index_passages = recording_index_passages
+    engine.add_swap_listener(analyzer.index_passages)
+
+    save_path = str(tmp_path / 'index.json')
+    builder = BackgroundIndexBuilder(engine, save_path=save_path)
+    assert builder.start(passages=make_passages('new', count=3))
+    assert builder.wait(10)
+
+    progress = builder.progress
+    assert progress['state'] == 'done' and progress['error'] is None
+    assert engine.version == progress['version']
+    assert versions_at_annotation == ['old']
+    assert set(analyzer.passage_annotations) == {'new_0', 'new_1', 'new_2'}
+
+    saved = EmbeddingEngine.load(save_path)
+    assert saved.version == engine.version
+    assert saved.snapshot.annotations == default_annotations(saved.passages)
+
+
+def test_failed_build_keeps_serving_old_snapshot():
+    engine = make_engine('old')
+    builder = BackgroundIndexBuilder(engine)
+    builder.start(passages=[{'passage_id': 'broken'}])
+    assert builder.wait(10)
+    assert builder.progress['state'] == 'failed'
+    assert engine.version == 'old'
+    assert len(engine.passages) == 4
@@ -0,0 +1,59 @@
+import random
+import re
+
+from keyword_matcher import KeywordMatcher
+
+KEYWORDS = ['ghost', 'host', 'ghosts', 'star sign', 'esp', 'no evidence', 'myth']
+
+
+def brute_force(keywords, text, word_boundary=False):
+    found = set()
+    for index, keyword in enumerate(keywords):
+        pattern = re.escape(keyword)
+        if word_boundary:
+            pattern = rf'(?<![^\W_]){pattern}(?![^\W_])'
+        if re.search(pattern, text):
+            found.add(index)
+    return found
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher(KEYWORDS)
+    hits = matcher.find_all('ghosts')
+    assert sorted(KEYWORDS[index] for _, index in hits) == ['ghost', 'ghosts', 'host']
+    assert (0, KEYWORDS.index('ghost')) in hits
+    assert (1, KEYWORDS.index('host')) in hits
+
+
+def test_word_boundary_rejects_partial_words():
+    matcher = KeywordMatcher(KEYWORDS, word_boundary=True)
+    assert matcher.matched_keywords('the ghosts of despair') == ['ghosts']
+    assert matcher.matched_keywords('no evidence, just a myth.') == ['no evidence', 'myth']
+    assert KeywordMatcher(KEYWORDS).matched_keywords('despair') == ['esp']
+
+
+def test_mask_round_trip():
+    matcher = KeywordMatcher(KEYWORDS)
+    mask = matcher.match_mask('my star sign says a ghost is a myth')
+    assert matcher.keywords_in_mask(mask) == ['ghost', 'host', 'star sign', 'myth']
+    assert matcher.match_mask('') == 0
+
+
+def test_matches_brute_force_on_random_text():
+    rng = random.Random(7)
+    words = ['ghost', 'hosts', 'star', 'sign', 'espresso', 'no', 'evidence', 'myths', 'a', 'despite']
+    for word_boundary in (False, True):
+        matcher = KeywordMatcher(KEYWORDS, word_boundary=word_boundary)
+        for _ in range(200):
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+            expected = brute_force(KEYWORDS, text, word_boundary)
+            assert {index for _, index in matcher.find_all(text)} == expected, text
+
+
+def test_sparse_mask_over_many_keywords():
+    keywords = [f'kw{i}' for i in range(20000)]
+    matcher = KeywordMatcher(keywords)
+    mask = (1 << 19999) | (1 << 7) | 1
+    assert KeywordMatcher.indices_in_mask(mask) == [0, 7, 19999]
+    assert matcher.keywords_in_mask(mask) == ['kw0', 'kw7', 'kw19999']
+    assert KeywordMatcher.indices_in_mask(0) == []
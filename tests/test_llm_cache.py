@@ -0,0 +1,139 @@
+from llm_cache import LLMResponseCache, open_cache
+from llm_service import LLMService
+
+EVIDENCE = [{'text': 'Sleep paralysis explains many night-time apparitions.', 'source': 'Sleep Review',
+             'domain': 'Ghost Myths', 'relevance_score': 0.8}]
+FACTS = {'scientific_explanations': ['Sleep paralysis'], 'debunking_evidence': [], 'supporting_evidence': []}
+
+
+def make_service(cache):
+    return LLMService(backend='template', backend_options={'latency_ms': 0, 'per_token_ms': 0, 'jitter': 0},
+                      cache=cache, coalesce=False)
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    assert cache.get('key') is None
+    cache.put('key', 'value')
+    assert cache.get('key') == 'value'
+    cache.close()
+
+
+def test_open_cache_reads_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv('LLM_CACHE_PATH', raising=False)
+    assert open_cache() is None
+    monkeypatch.setenv('LLM_CACHE_PATH', str(tmp_path / 'env.sqlite3'))
+    cache = open_cache()
+    assert isinstance(cache, LLMResponseCache)
+    cache.close()
+
+
+def test_temperature_zero_explanations_are_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    service = make_service(cache)
+    first = service.generate_explanation('I saw a ghost', FACTS, EVIDENCE, 'Debunked', temperature=0)
+    assert (cache.hits, cache.misses) == (0, 1)
+    second = service.generate_explanation('I saw a ghost', FACTS, EVIDENCE, 'Debunked', temperature=0)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first == second
+    cache.close()
+
+
+def test_sampled_explanations_are_not_cached(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    service = make_service(cache)
+    service.generate_explanation('I saw a ghost', FACTS, EVIDENCE, 'Debunked', temperature=0.7)
+    assert (cache.hits, cache.misses) == (0, 0)
+    cache.close()
+
+
+def stored_access_time(cache, key):
+    return cache._conn.execute("SELECT accessed FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_flush_access_times_after_threshold(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), flush_entries=3, flush_interval=3600)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key)
+    written = {key: stored_access_time(cache, key) for key in ('a', 'b', 'c')}
+    cache.get('a')
+    cache.get('b')
+    assert stored_access_time(cache, 'a') == written['a']
+    cache.get('c')
+    assert all(stored_access_time(cache, key) > written[key] for key in ('a', 'b', 'c'))
+    cache.close()
+
+
+def test_hits_flush_access_times_after_interval(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), flush_entries=1000, flush_interval=0)
+    cache.put('a', 'a')
+    written = stored_access_time(cache, 'a')
+    cache.get('a')
+    assert stored_access_time(cache, 'a') > written
+    cache.close()
+
+
+def test_close_flushes_access_times(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = LLMResponseCache(path, flush_entries=1000, flush_interval=3600)
+    cache.put('a', 'a')
+    written = stored_access_time(cache, 'a')
+    cache.get('a')
+    cache.close()
+    reopened = LLMResponseCache(path)
+    assert stored_access_time(reopened, 'a') > written
+    reopened.close()
+
+
+def _summed_size(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def test_size_total_follows_insert_replace_and_clear(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'y' * 20)
+    cache.put('a', 'z' * 5)
+    assert cache.total_bytes() == 25 == _summed_size(cache)
+    cache.clear()
+    assert cache.total_bytes() == 0
+    cache.close()
+
+
+def test_eviction_uses_size_total(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), max_bytes=100)
+    for i in range(10):
+        cache.put(f'key{i}', 'v' * 30)
+    assert cache.total_bytes() == _summed_size(cache) <= 100
+    assert cache.get('key9') is not None and cache.get('key0') is None
+    cache.close()
+
+
+def test_expired_entries_leave_the_size_total(tmp_path, monkeypatch):
+    import llm_cache
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'), ttl_seconds=10)
+    cache.put('old', 'v' * 40)
+    later = llm_cache.time.time() + 60
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: later)
+    cache.put('new', 'v' * 7)
+    assert cache.total_bytes() == 7 == _summed_size(cache)
+    cache.close()
+
+
+def test_size_total_is_shared_and_initialized_for_old_files(tmp_path):
+    import sqlite3
+    path = str(tmp_path / 'cache.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                 "created REAL NOT NULL, accessed REAL NOT NULL)")
+    conn.execute("INSERT INTO responses VALUES ('k', 'abc', 3, strftime('%s', 'now'), strftime('%s', 'now'))")
+    conn.commit()
+    conn.close()
+
+    first = LLMResponseCache(path)
+    second = LLMResponseCache(path)
+    assert first.total_bytes() == 3
+    second.put('other', 'v' * 9)
+    assert first.total_bytes() == 12
+    first.close()
+    second.close()
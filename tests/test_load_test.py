@@ -0,0 +1,43 @@
+from load_test import find_saturation
+
+
+def closed(users, throughput, error_rate=0.0):
+    return {'users': users, 'arrival_rate': None, 'throughput': throughput, 'error_rate': error_rate}
+
+
+def open_loop(rate, throughput, unstarted=0, error_rate=0.0, duration=10.0):
+    return {'users': 8, 'arrival_rate': rate, 'throughput': throughput, 'offered': rate * duration,
+            'duration_seconds': duration, 'unstarted': unstarted, 'error_rate': error_rate}
+
+
+def test_no_levels():
+    assert find_saturation([]) == {'saturated': False, 'level': None, 'throughput': None}
+
+
+def test_closed_loop_saturates_when_throughput_flattens():
+    levels = [closed(1, 10.0), closed(2, 19.0), closed(4, 30.0), closed(8, 31.0), closed(16, 29.0)]
+    assert find_saturation(levels) == {'saturated': True, 'level': 4, 'throughput': 30.0}
+    # A smaller required gain accepts the step from 4 to 8 users
+    assert find_saturation(levels, min_gain=0.01) == {'saturated': True, 'level': 8, 'throughput': 31.0}
+
+
+def test_closed_loop_still_scaling():
+    levels = [closed(1, 10.0), closed(2, 19.0), closed(4, 36.0)]
+    assert find_saturation(levels) == {'saturated': False, 'level': 4, 'throughput': 36.0}
+
+
+def test_errors_end_scaling_even_when_throughput_grows():
+    levels = [closed(1, 10.0), closed(2, 19.0, error_rate=0.05), closed(4, 36.0)]
+    assert find_saturation(levels) == {'saturated': True, 'level': 1, 'throughput': 10.0}
+    assert find_saturation(levels, max_error_rate=0.1)['saturated'] is False
+
+
+def test_open_loop_saturates_on_backlog_or_shortfall():
+    served = [open_loop(5, 5.0), open_loop(10, 9.9)]
+    assert find_saturation(served) == {'saturated': False, 'level': 10, 'throughput': 9.9}
+
+    backlog = served + [open_loop(20, 19.5, unstarted=12)]
+    assert find_saturation(backlog) == {'saturated': True, 'level': 10, 'throughput': 9.9}
+
+    shortfall = served + [open_loop(20, 15.0)]
+    assert find_saturation(shortfall) == {'saturated': True, 'level': 10, 'throughput': 9.9}
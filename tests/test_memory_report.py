@@ -0,0 +1,82 @@
+import sys
+
+import pytest
+
+from claimcheck import memory_report
+from corpus_generator import CorpusGenerator
+from data_processor import DataProcessor
+from embedding_engine import EmbeddingEngine, _deep_sizeof
+from index_store import load_or_build_index
+
+COMPONENTS = {'passage_texts', 'passage_metadata', 'keyword_strings', 'keyword_counters', 'passage_id_index',
+              'metadata_columns', 'stored_annotations'}
+
+
+@pytest.fixture(scope='module')
+def engine():
+    documents = CorpusGenerator(seed=5, vocabulary_size=3000).generate_documents(60)
+    engine = EmbeddingEngine()
+    engine.create_embeddings(DataProcessor().process_texts(documents))
+    return engine
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    shared = ['x' * 1000]
+    seen = set()
+    first = _deep_sizeof({'a': shared}, seen)
+    second = _deep_sizeof({'b': shared}, seen)
+    assert first > 1000
+    assert second < 1000
+    assert _deep_sizeof(shared, set()) == sys.getsizeof(shared) + sys.getsizeof(shared[0])
+
+
+def test_components_add_up_to_total(engine):
+    report = engine.memory_report()
+    n = len(engine.passages)
+    assert report['passages'] == n
+    assert set(report['components']) == COMPONENTS
+    assert report['total_bytes'] == sum(report['components'].values())
+    assert report['bytes_per_passage'] == round(report['total_bytes'] / n, 1)
+    assert report['components']['passage_texts'] >= sum(len(passage['text']) for passage in engine.passages)
+    vocabulary = set().union(*(engine.snapshot.keywords[i] for i in range(n)))
+    assert report['vocabulary']['distinct_keywords'] == len(vocabulary)
+    assert 0 < report['vocabulary']['heaps_exponent'] <= 1
+    assert report['projections'] == []
+
+
+def test_caches_count_only_what_the_index_does_not_hold(engine):
+    texts = [passage['text'] for passage in engine.passages]
+    report = engine.memory_report(caches={'texts_again': texts})
+    # The strings are already counted under passage_texts; only the list is new
+    assert report['components']['texts_again'] == sys.getsizeof(texts)
+
+
+def test_projections_scale_per_passage_components_linearly(engine):
+    report = engine.memory_report([len(engine.passages), 10 * len(engine.passages)])
+    same, larger = report['projections']
+    assert same['passages'] == len(engine.passages)
+    assert abs(same['total_bytes'] - report['total_bytes']) <= len(COMPONENTS)
+    assert same['distinct_keywords'] == report['vocabulary']['distinct_keywords']
+
+    for name in COMPONENTS - {'keyword_strings'}:
+        assert abs(larger['components'][name] - 10 * report['components'][name]) <= 10
+    # Distinct words grow sublinearly, so the strings grow by at most the passage scale
+    assert report['components']['keyword_strings'] < larger['components']['keyword_strings']
+    assert larger['components']['keyword_strings'] <= 10 * report['components']['keyword_strings'] + 1
+    assert same['distinct_keywords'] < larger['distinct_keywords'] <= 10 * same['distinct_keywords']
+
+
+def test_single_target_and_empty_index(engine):
+    assert [projection['passages'] for projection in engine.memory_report(1000)['projections']] == [1000]
+    empty = EmbeddingEngine().memory_report(1000)
+    assert empty['projections'] == [] and empty['bytes_per_passage'] == 0.0
+
+
+def test_claimcheck_report_includes_analyzer_annotations(tmp_path):
+    path = str(tmp_path / 'index.json')
+    load_or_build_index(path)
+    report = memory_report(path, target_passages=[1000], trace=True)
+    assert report['components']['claim_annotations'] > 0
+    assert report['components']['stored_annotations'] > 0
+    assert report['traced_index_bytes'] > 0
+    assert report['projections'][0]['passages'] == 1000
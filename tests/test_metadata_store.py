@@ -0,0 +1,122 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from metadata_store import MetadataStore, PassageFilter, epoch_day
+
+
+def make_passages(count, domains=4, sources=6, seed=1):
+    rng = random.Random(seed)
+    passages = []
+    for _ in range(count):
+        published = date(2020, 1, 1) + timedelta(days=rng.randrange(2000))
+        passages.append({
+            'domain': f"domain {rng.randrange(domains)}",
+            'source': f"source {rng.randrange(sources)}",
+            'publication_date': '' if rng.random() < 0.1 else published.isoformat()
+        })
+    return passages
+
+
+def brute_force(passages, passage_filter):
+    selected = []
+    for i, passage in enumerate(passages):
+        day = epoch_day(passage['publication_date'])
+        if passage_filter.domains is not None and passage['domain'] not in passage_filter.domains:
+            continue
+        if passage_filter.sources is not None and passage['source'] not in passage_filter.sources:
+            continue
+        if passage['source'] in passage_filter.exclude_sources:
+            continue
+        if passage_filter.date_from is not None and (day is None or day < passage_filter.date_from):
+            continue
+        if passage_filter.date_to is not None and (day is None or day > passage_filter.date_to):
+            continue
+        selected.append(i)
+    return selected
+
+
+FILTERS = [
+    PassageFilter(domains=['domain 1']),
+    PassageFilter(domains=['domain 0', 'domain 3', 'unknown']),
+    PassageFilter(sources=['source 2'], exclude_sources=['source 2']),
+    PassageFilter(exclude_sources=['source 1', 'source 5']),
+    PassageFilter(date_from='2021-03-01'),
+    PassageFilter(date_to='2020-06-30'),
+    PassageFilter(date_from='2021-01-01', date_to='2021-12-31', domains=['domain 2']),
+    PassageFilter(date_from='2030-01-01'),
+    PassageFilter(domains=[]),
+]
+
+
+@pytest.mark.parametrize("passage_filter", FILTERS, ids=repr)
+def test_select_matches_brute_force(passage_filter):
+    passages = make_passages(500)
+    store = MetadataStore(passages)
+    mask = store.select(passage_filter)
+    assert store.positions(mask) == brute_force(passages, passage_filter)
+
+
+def test_select_with_multi_byte_codes():
+    # More than 256 domains and a date span over 256 days need several byte planes
+    passages = make_passages(2000, domains=700, sources=300, seed=2)
+    store = MetadataStore(passages)
+    for passage_filter in (PassageFilter(domains=['domain 5', 'domain 300', 'domain 699']),
+                           PassageFilter(sources=['source 257'], date_from='2022-02-02'),
+                           PassageFilter(date_from='2020-09-13', date_to='2023-05-01')):
+        assert store.positions(store.select(passage_filter)) == brute_force(passages, passage_filter)
+
+
+def test_empty_filter_selects_everything():
+    store = MetadataStore(make_passages(10))
+    assert store.select(None) is None
+    assert store.select(PassageFilter()) is None
+
+
+def test_columns_decode_values():
+    passages = make_passages(50)
+    store = MetadataStore(passages)
+    assert [store.domain(i) for i in range(50)] == [p['domain'] for p in passages]
+    assert [store.source(i) for i in range(50)] == [p['source'] for p in passages]
+
+
+def test_invalid_date_is_rejected():
+    with pytest.raises(ValueError):
+        PassageFilter(date_from='last week')
+
+
+def test_store_without_dates():
+    store = MetadataStore([{'domain': 'a', 'source': 's', 'publication_date': ''}])
+    assert store.positions(store.select(PassageFilter(date_to='2024-01-01'))) == []
+
+
+def test_fields_return_values_as_given():
+    passages = make_passages(300, domains=300, sources=2)
+    passages[0]['publication_date'] = '2023-01-15T10:00:00'
+    store = MetadataStore(passages)
+    for i, passage in enumerate(passages):
+        assert store.fields(i) == passage
+
+
+def test_snapshot_keeps_metadata_fields_only_in_the_store(tmp_path):
+    from collections import Counter
+
+    from embedding_engine import EmbeddingEngine, build_snapshot
+
+    passages = [{'passage_id': f'p{i}', 'text': f'ghost report {i} debunked', 'source_id': f's{i}', **fields}
+                for i, fields in enumerate(make_passages(20))]
+    snapshot = build_snapshot(passages, version='v1')
+    assert all(set(record) == {'passage_id', 'text', 'source_id'} for record in snapshot.passage_records)
+    assert list(snapshot.passages) == passages
+    assert snapshot.passages[-1] == passages[-1] and snapshot.passages[2:4] == passages[2:4]
+
+    engine = EmbeddingEngine()
+    engine.swap(snapshot)
+    assert engine.get_passage('p3') == passages[3]
+    for result in engine.search(Counter(ghost=1), k=5):
+        assert {key: value for key, value in result.items() if key != 'similarity'} in passages
+
+    path = str(tmp_path / 'index.json')
+    engine.save(path)
+    assert list(EmbeddingEngine.load(path).passages) == passages
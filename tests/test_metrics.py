@@ -0,0 +1,96 @@
+import json
+
+import metrics
+from metrics import MetricsRegistry, export_prometheus, load_snapshots, merge_snapshots, worker_dump_path
+
+
+def test_counters_export_with_help_type_and_escaped_labels():
+    registry = MetricsRegistry()
+    registry.inc('claimcheck_http_requests_total', endpoint='/analyze', status='200')
+    registry.inc('claimcheck_http_requests_total', 2, endpoint='/analyze', status='200')
+    registry.inc('claimcheck_llm_errors_total', error='Say "hi"\\now')
+
+    lines = export_prometheus(registry.snapshot()).splitlines()
+    assert "# HELP claimcheck_http_requests_total API requests by endpoint and status" in lines
+    assert "# TYPE claimcheck_http_requests_total counter" in lines
+    assert 'claimcheck_http_requests_total{endpoint="/analyze",status="200"} 3' in lines
+    assert 'claimcheck_llm_errors_total{error="Say \\"hi\\"\\\\now"} 1' in lines
+
+
+def test_histogram_export_is_cumulative_with_inf_bucket():
+    registry = MetricsRegistry()
+    for value in (0.00005, 0.003, 0.003, 100.0):
+        registry.observe('claimcheck_stage_seconds', value, stage='search')
+
+    text = export_prometheus(registry.snapshot())
+    buckets = [line for line in text.splitlines() if line.startswith('claimcheck_stage_seconds_bucket')]
+    assert buckets[0] == 'claimcheck_stage_seconds_bucket{stage="search",le="0.0001"} 1'
+    assert 'claimcheck_stage_seconds_bucket{stage="search",le="0.005"} 3' in buckets
+    assert buckets[-1] == 'claimcheck_stage_seconds_bucket{stage="search",le="+Inf"} 4'
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert 'claimcheck_stage_seconds_count{stage="search"} 4' in text
+    assert "# TYPE claimcheck_stage_seconds histogram" in text
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.inc('claimcheck_http_requests_total')
+    with registry.span('search'):
+        pass
+    assert registry.snapshot() == {'counters': [], 'histograms': []}
+
+
+def test_merge_adds_counters_and_histograms():
+    first, second = MetricsRegistry(), MetricsRegistry()
+    first.inc('claimcheck_search_candidates_total', 5)
+    second.inc('claimcheck_search_candidates_total', 7)
+    second.inc('claimcheck_http_requests_total', endpoint='/health', status='200')
+    first.observe('claimcheck_stage_seconds', 0.002, stage='search')
+    second.observe('claimcheck_stage_seconds', 0.2, stage='search')
+
+    merged = merge_snapshots([first.snapshot(), second.snapshot()])
+    counters = {(name, tuple(map(tuple, labels))): value for name, labels, value in merged['counters']}
+    assert counters[('claimcheck_search_candidates_total', ())] == 12
+    assert counters[('claimcheck_http_requests_total', (('endpoint', '/health'), ('status', '200')))] == 1
+    [(name, labels, buckets, counts, total, count)] = merged['histograms']
+    assert count == 2 and sum(counts) == 2
+    assert abs(total - 0.202) < 1e-9
+
+
+def test_load_snapshots_reads_dumps_and_skips_broken_files(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc('claimcheck_search_candidates_total', 3)
+    registry.dump(str(tmp_path / 'worker-1-1.json'))
+    registry.dump(str(tmp_path / 'worker-2-1.json'))
+    (tmp_path / 'worker-3-1.json').write_text('{"counters": [', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('not a dump', encoding='utf-8')
+
+    snapshots = load_snapshots(str(tmp_path))
+    assert len(snapshots) == 2
+    merged = merge_snapshots(snapshots)
+    assert merged['counters'] == [['claimcheck_search_candidates_total', [], 6]]
+
+
+def test_worker_dump_path_is_stable_within_a_process(tmp_path):
+    assert worker_dump_path(str(tmp_path)) == worker_dump_path(str(tmp_path))
+
+
+def test_reused_pid_does_not_overwrite_earlier_dump(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics.os, 'getpid', lambda: 4242)
+    monkeypatch.setattr(metrics, '_process_starts', {})
+    first = MetricsRegistry()
+    first.inc('claimcheck_http_requests_total', 10)
+    first.dump(worker_dump_path(str(tmp_path)))
+
+    # A later worker given the same pid starts with fresh counts
+    monkeypatch.setattr(metrics, '_process_starts', {})
+    monkeypatch.setattr(metrics.time, 'time_ns', lambda: 1)
+    second = MetricsRegistry()
+    second.inc('claimcheck_http_requests_total', 1)
+    second.dump(worker_dump_path(str(tmp_path)))
+
+    assert len(list(tmp_path.iterdir())) == 2
+    merged = merge_snapshots(load_snapshots(str(tmp_path)))
+    assert merged['counters'] == [['claimcheck_http_requests_total', [], 11]]
+    assert json.loads((tmp_path / 'worker-4242-1.json').read_text())['counters'][0][2] == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_backends import LLMServiceError
+from micro_batcher import MicroBatcher
+
+PARAMETERS = {"max_new_tokens": 20}
+
+
+def submit_all(batcher, prompts, parameters=PARAMETERS):
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        futures = [pool.submit(batcher.submit, prompt, parameters, deadline=time.monotonic() + 5)
+                   for prompt in prompts]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_prompts_share_a_batch():
+    batches = []
+
+    def send_batch(prompts, parameters, priority, tenant, deadline):
+        batches.append(list(prompts))
+        return [prompt.upper() for prompt in prompts]
+
+    batcher = MicroBatcher(send_batch, max_batch_size=8, max_wait_ms=50)
+    results = submit_all(batcher, ['a', 'b', 'c', 'd'])
+    assert results == ['A', 'B', 'C', 'D']
+    assert sum(len(batch) for batch in batches) == 4
+    assert len(batches) < 4
+
+
+def test_short_batch_result_fails_every_caller():
+    batcher = MicroBatcher(lambda prompts, *args: prompts[1:], max_batch_size=8, max_wait_ms=50)
+    results = submit_all(batcher, ['a', 'b', 'c'])
+    assert all(isinstance(result, LLMServiceError) for result in results)
+
+
+def test_send_failure_fails_every_caller():
+    def send_batch(prompts, *args):
+        raise RuntimeError("backend down")
+
+    batcher = MicroBatcher(send_batch, max_wait_ms=20)
+    results = submit_all(batcher, ['a', 'b'])
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_unserializable_parameters_fail_the_caller():
+    batcher = MicroBatcher(lambda prompts, *args: prompts, max_wait_ms=1)
+    with pytest.raises(TypeError):
+        batcher.submit('a', {"stop": object()}, deadline=time.monotonic() + 5)
+    # The gathering thread survives
+    assert batcher.submit('b', PARAMETERS, deadline=time.monotonic() + 5) == 'b'
+
+
+def test_expired_request_is_resolved():
+    release = threading.Event()
+
+    def send_batch(prompts, *args):
+        release.wait(5)
+        return list(prompts)
+
+    batcher = MicroBatcher(send_batch, max_wait_ms=1, max_in_flight=1)
+    blocker = threading.Thread(target=batcher.submit, args=('slow', PARAMETERS))
+    blocker.start()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        batcher.submit('late', PARAMETERS, deadline=time.monotonic() + 0.05)
+    release.set()
+    blocker.join(5)
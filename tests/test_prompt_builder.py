@@ -0,0 +1,72 @@
+import pytest
+
+from prompt_builder import PROMPT_TEMPLATE, build_explanation_prompt, estimate_tokens
+
+EVIDENCE = [
+    {'text': 'Sleep paralysis causes vivid apparitions at night. Old houses creak as they cool.',
+     'source': 'Sleep Review', 'similarity': 0.9},
+    {'text': 'Infrasound near 19 Hz can cause unease and blurred vision.', 'source': 'Acoustics Journal',
+     'similarity': 0.7}
+]
+
+
+def make_facts(contradictions=0):
+    return {
+        'contradictions': [{'text': f'passage {i}', 'source': f'Source {i}', 'keyword': f'keyword{i}'}
+                           for i in range(contradictions)],
+        'supporting_facts': [],
+        'relevant_terms': {'ghost': 3, 'night': 2},
+        'sources': ['Sleep Review', 'Acoustics Journal'],
+        'domains': ['Ghost Myths']
+    }
+
+
+def test_prompt_keeps_claim_and_best_evidence():
+    prompt, tokens = build_explanation_prompt('I saw a ghost at night', make_facts(), EVIDENCE, 'Debunked',
+                                              token_budget=512)
+    assert 'Claim: "I saw a ghost at night"' in prompt
+    assert '[E1] Sleep Review:' in prompt
+    assert tokens == estimate_tokens(prompt) <= 512
+
+
+@pytest.mark.parametrize("budget", [160, 200, 300])
+def test_long_claim_and_contradictions_fit_budget(budget):
+    claim = 'I saw a ghost walk through the wall of the old mansion ' * 200
+    prompt, tokens = build_explanation_prompt(claim, make_facts(contradictions=100), EVIDENCE, 'Debunked',
+                                              token_budget=budget)
+    assert tokens == estimate_tokens(prompt) <= budget
+    assert 'Claim: "I saw a ghost' in prompt
+    assert '..."' in prompt
+
+
+def test_budget_below_template_is_rejected():
+    template_tokens = estimate_tokens(PROMPT_TEMPLATE)
+    with pytest.raises(ValueError):
+        build_explanation_prompt('claim', make_facts(), EVIDENCE, 'Debunked', token_budget=template_tokens // 2)
+
+
+def test_full_prompt_tokens_are_counted_without_building_it(monkeypatch):
+    from claim_analyzer import ClaimAnalyzer
+    from llm_service import LLMService
+
+    evidence = [dict(passage, domain='Ghost Myths') for passage in EVIDENCE]
+    facts = ClaimAnalyzer(use_llm=False).extract_key_facts(evidence)
+    service = LLMService(backend='template', prompt_token_budget=200)
+    expected = estimate_tokens(service._build_full_prompt('I saw a ghost', facts, evidence, 'Debunked'))
+
+    monkeypatch.setattr(service, '_build_full_prompt', lambda *args: pytest.fail("full prompt was built"))
+    prompt, _, _ = service._build_explanation_prompt('I saw a ghost', facts, evidence, 'Debunked', 0, 100)
+    stats = service.last_prompt_stats
+    assert stats['full_prompt_tokens'] == expected
+    assert stats['prompt_tokens'] == estimate_tokens(prompt)
+    assert stats['tokens_saved'] == max(0, expected - stats['prompt_tokens'])
+
+
+@pytest.mark.parametrize("value", [{}, [], "text", 1.5, [[]], {'a': []},
+                                   {'contradictions': [{'text': 'x', 'similarity': 0.5}] * 3, 'terms': {'g': 2}},
+                                   [1, [2, [3, {'deep': [None, True]}]]]])
+def test_indented_json_length_matches_encoder(value):
+    import json
+
+    from llm_service import _indented_json_length
+    assert _indented_json_length(value) == len(json.dumps(value, indent=2))
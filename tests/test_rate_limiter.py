@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import PriorityScheduler, TokenBucket
+
+
+@pytest.mark.parametrize("rate", [0, -1.5])
+def test_token_bucket_rejects_non_positive_rate(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+
+
+def test_token_bucket_rejects_burst_below_one_token():
+    with pytest.raises(ValueError):
+        TokenBucket(5, burst=0.5)
+
+
+def test_scheduler_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        PriorityScheduler(requests_per_second=0)
+
+
+def queue_depth(scheduler, priority):
+    return scheduler.metrics()['priorities'][priority]['queue_depth']
+
+
+def enqueue(scheduler, grants, priority, tenant, label):
+    """Start a thread that records label when admitted, and wait until it is queued."""
+    before = queue_depth(scheduler, priority)
+
+    def run():
+        with scheduler.slot(priority, tenant, timeout=5):
+            grants.append(label)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while queue_depth(scheduler, priority) == before and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return thread
+
+
+def run_queued(scheduler, waiters):
+    """Hold the only slot while waiters queue up, then let them through one at a time."""
+    grants = []
+    scheduler.acquire()
+    threads = [enqueue(scheduler, grants, priority, tenant, label) for priority, tenant, label in waiters]
+    scheduler.release()
+    for thread in threads:
+        thread.join(5)
+    return grants
+
+
+def test_interactive_requests_go_before_queued_batch_requests():
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    grants = run_queued(scheduler, [
+        ('batch', 'default', 'batch-1'),
+        ('batch', 'default', 'batch-2'),
+        ('interactive', 'default', 'interactive-1'),
+        ('interactive', 'default', 'interactive-2')
+    ])
+    assert grants == ['interactive-1', 'interactive-2', 'batch-1', 'batch-2']
+
+
+def test_tenants_take_turns_within_a_priority():
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    waiters = [('batch', 'noisy', f'noisy-{i}') for i in range(5)] + [('batch', 'quiet', 'quiet-0')]
+    grants = run_queued(scheduler, waiters)
+    # The quiet tenant's single request is not stuck behind the noisy tenant's backlog
+    assert grants.index('quiet-0') <= 1
+    assert [label for label in grants if label.startswith('noisy')] == [f'noisy-{i}' for i in range(5)]
+
+
+def test_waiter_times_out_while_slots_are_held():
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    scheduler.acquire()
+    with pytest.raises(TimeoutError):
+        scheduler.acquire('batch', timeout=0.01)
+    scheduler.release()
+    metrics = scheduler.metrics()
+    assert metrics['priorities']['batch']['timeouts'] == 1
+    assert metrics['priorities']['batch']['queue_depth'] == 0
+    assert metrics['in_flight'] == 0
@@ -0,0 +1,98 @@
+import pytest
+
+from corpus_generator import CorpusGenerator
+from index_store import build_index
+from retrieval_eval import check_floors, evaluate, load_backend, main, rank_biased_overlap
+
+
+class DropTopResult:
+    """Candidate backend that loses the best passage of every search."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_embedding(self, text):
+        return self.engine.get_embedding(text)
+
+    def search(self, query_keywords, k=5, **filters):
+        return self.engine.search(query_keywords, k=k + 1, **filters)[1:]
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    generator = CorpusGenerator(seed=11, vocabulary_size=3000)
+    documents = generator.generate_documents(80)
+    return build_index(documents), generator.generate_queries(documents, 25)
+
+
+def test_rbo_bounds():
+    assert rank_biased_overlap(['a', 'b', 'c'], ['a', 'b', 'c']) == pytest.approx(1.0)
+    assert rank_biased_overlap(['a', 'b'], ['c', 'd']) == 0.0
+    assert rank_biased_overlap([], []) == 1.0
+    assert 0.0 < rank_biased_overlap(['a', 'b', 'c'], ['c', 'b', 'a']) < 1.0
+
+
+def test_rbo_weights_the_top_ranks_more():
+    reference = ['a', 'b', 'c', 'd', 'e']
+    swapped_top = ['b', 'a', 'c', 'd', 'e']
+    swapped_bottom = ['a', 'b', 'c', 'e', 'd']
+    assert rank_biased_overlap(reference, swapped_top) < rank_biased_overlap(reference, swapped_bottom)
+    # Lower persistence puts even more weight on the top
+    assert rank_biased_overlap(reference, swapped_top, p=0.5) < rank_biased_overlap(reference, swapped_top, p=0.9)
+
+
+def test_rbo_of_a_shorter_candidate():
+    assert rank_biased_overlap(['a', 'b', 'c', 'd'], ['a', 'b']) < 1.0
+    assert rank_biased_overlap(['a', 'b'], ['a', 'b', 'c', 'd']) == rank_biased_overlap(['a', 'b', 'c', 'd'], ['a', 'b'])
+
+
+def test_reference_against_itself_agrees_fully(corpus):
+    engine, claims = corpus
+    report = evaluate(engine, engine, claims, k=5)
+    assert report['claims'] == len(claims)
+    assert report['recall_at_k'] == report['min_recall'] == report['rank_overlap'] == 1.0
+    assert report['verdict_agreement'] == 1.0 and report['mean_confidence_delta'] == 0.0
+    assert report['target_hit_rate']['reference'] == report['target_hit_rate']['candidate'] > 0
+    assert report['worst_claims'] == []
+    assert report['latency']['candidate']['count'] == len(claims)
+
+
+def test_degraded_candidate_is_reported(corpus):
+    engine, claims = corpus
+    report = evaluate(engine, DropTopResult(engine), claims, k=5)
+    assert report['recall_at_k'] == pytest.approx(0.8)
+    assert report['rank_overlap'] < report['recall_at_k']
+    assert report['target_hit_rate']['candidate'] <= report['target_hit_rate']['reference']
+    worst = report['worst_claims']
+    assert worst and all(row['recall'] < 1.0 or row['reference_verdict'] != row['candidate_verdict'] for row in worst)
+    # Verdict changes sort first, then the lowest recall
+    keys = [(row['reference_verdict'] == row['candidate_verdict'], row['recall']) for row in worst]
+    assert keys == sorted(keys)
+
+
+def test_no_claims_gives_empty_report(corpus):
+    engine, _ = corpus
+    report = evaluate(engine, engine, [])
+    assert report['claims'] == 0
+    assert report['recall_at_k'] is None and report['target_hit_rate'] is None
+    assert check_floors(report, min_recall=0.9, min_verdict_agreement=0.9) == []
+
+
+def test_check_floors():
+    report = {'k': 5, 'recall_at_k': 0.85, 'verdict_agreement': 0.97}
+    assert check_floors(report) == []
+    assert check_floors(report, min_recall=0.8, min_verdict_agreement=0.95) == []
+    failures = check_floors(report, min_recall=0.9, min_verdict_agreement=0.99)
+    assert failures == ["recall@5 0.85 is below the floor 0.9", "verdict agreement 0.97 is below the floor 0.99"]
+
+
+def test_load_backend_requires_a_factory():
+    with pytest.raises(ValueError):
+        load_backend('fast_search', None)
+
+
+def test_main_exit_code_follows_floors(tmp_path):
+    args = ['--synthetic', '40', '--queries', '10', '--seed', '3']
+    assert main(args + ['--min-recall', '1.0', '-o', str(tmp_path / 'report.json')]) == 0
+    assert (tmp_path / 'report.json').exists()
+    assert main(args + ['--backend', 'test_retrieval_eval:DropTopResult', '--min-recall', '0.9']) == 1
@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def run_threads(target, count=CALLERS):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def blocking(release, calls, outcome=None):
+    """Build a function that counts its calls and returns or raises once released."""
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return fn
+
+
+def wait_for_waiters(group, count):
+    deadline = time.monotonic() + 5
+    while group.coalesced < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_run_function_once():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    fn = blocking(release, calls, 'answer')
+    threading.Timer(0.05, lambda: (wait_for_waiters(group, CALLERS - 1), release.set())).start()
+
+    results, errors = run_threads(lambda: group.do('key', fn))
+    assert results == ['answer'] * CALLERS
+    assert errors == [None] * CALLERS
+    assert len(calls) == 1
+    assert (group.executions, group.coalesced) == (1, CALLERS - 1)
+
+
+def test_exception_reaches_every_waiter():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    failure = ValueError("backend down")
+    fn = blocking(release, calls, failure)
+    threading.Timer(0.05, lambda: (wait_for_waiters(group, CALLERS - 1), release.set())).start()
+
+    _, errors = run_threads(lambda: group.do('key', fn))
+    assert all(error is failure for error in errors)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("outcome", ['answer', ValueError("backend down")])
+def test_key_is_released_after_the_call(outcome):
+    group = SingleFlight()
+
+    def fn():
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    for _ in range(2):
+        try:
+            group.do('key', fn)
+        except ValueError:
+            pass
+    assert group._calls == {}
+    assert (group.executions, group.coalesced) == (2, 0)
+
+
+def test_waiter_timeout_does_not_affect_leader():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    fn = blocking(release, calls, 'answer')
+    leader = threading.Thread(target=lambda: group.do('key', fn))
+    leader.start()
+    while not calls:
+        time.sleep(0.001)
+
+    with pytest.raises(TimeoutError):
+        group.do('key', fn, timeout=0.01)
+    release.set()
+    leader.join(5)
+    assert group._calls == {}
+    assert len(calls) == 1
+
+
+def test_async_callers_coalesce():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    fn = blocking(release, calls, 'answer')
+
+    async def main():
+        tasks = [asyncio.create_task(group.do_async('key', fn)) for _ in range(CALLERS)]
+        while group.coalesced < CALLERS - 1:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == ['answer'] * CALLERS
+    assert len(calls) == 1
+    assert group._async_calls == {} and group._calls == {}
+
+
+def test_async_exception_reaches_every_waiter():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    failure = ValueError("backend down")
+    fn = blocking(release, calls, failure)
+
+    async def main():
+        tasks = [asyncio.create_task(group.do_async('key', fn)) for _ in range(CALLERS)]
+        while group.coalesced < CALLERS - 1:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(error is failure for error in asyncio.run(main()))
+    assert len(calls) == 1
+    assert group._async_calls == {} and group._calls == {}
+
+
+def test_async_and_threaded_callers_share_one_call():
+    group, release, calls = SingleFlight(), threading.Event(), []
+    fn = blocking(release, calls, 'answer')
+    thread_result = []
+    thread = threading.Thread(target=lambda: thread_result.append(group.do('key', fn)))
+    thread.start()
+    while not calls:
+        time.sleep(0.001)
+
+    async def main():
+        task = asyncio.create_task(group.do_async('key', fn))
+        while group.coalesced < 1:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await task
+
+    assert asyncio.run(main()) == 'answer'
+    thread.join(5)
+    assert thread_result == ['answer']
+    assert len(calls) == 1
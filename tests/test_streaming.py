@@ -0,0 +1,117 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from circuit_breaker import CircuitBreaker
+from claim_analyzer import ClaimAnalyzer
+from llm_backends import HuggingFaceBackend, LLMServiceError, render_template_response
+from llm_cache import LLMResponseCache
+from llm_service import LLMService
+from mock_llm_server import start_mock_server
+
+PARAMETERS = {"max_new_tokens": 200, "temperature": 0.0}
+EVIDENCE = [{'id': 1, 'text': 'Sleep paralysis explains apparitions.', 'source': 'Sleep Review',
+             'domain': 'Ghost Myths', 'similarity': 0.8}]
+FACTS = {'sources': ['Sleep Review'], 'contradictions': [], 'scientific_explanations': [],
+         'debunking_evidence': [], 'supporting_evidence': [], 'supporting_facts': [], 'relevant_terms': {},
+         'domains': ['Ghost Myths']}
+
+
+class FakeEventResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=True):
+        return iter(self.lines)
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**options):
+        server = start_mock_server(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_port}/"
+
+
+def make_service(server, **options):
+    return LLMService(model_id="mock", backend="huggingface", api_url=url(server), backoff_factor=0.01, **options)
+
+
+def test_sse_stream_yields_tokens(mock_server):
+    server = mock_server()
+    backend = HuggingFaceBackend("mock", api_url=url(server))
+    chunks = list(backend.stream("I saw a ghost", PARAMETERS))
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == render_template_response("I saw a ghost")
+
+
+def test_event_parsing():
+    backend = HuggingFaceBackend("mock", api_url="http://127.0.0.1:1/")
+    lines = [': keep-alive', '', 'data: {"token": {"text": "a"}}', 'event: ping', 'data:{"token": {"text": "b"}}',
+             'data: [DONE]', 'data: {"token": {"text": "never"}}']
+    assert [event['token']['text'] for event in backend._iter_events(FakeEventResponse(lines))] == ['a', 'b']
+
+
+def test_error_event_raises():
+    backend = HuggingFaceBackend("mock", api_url="http://127.0.0.1:1/")
+    events = backend._iter_events(FakeEventResponse(['data: {"error": "model overloaded"}']))
+    with pytest.raises(LLMServiceError, match="overloaded"):
+        list(events)
+
+
+def test_streamed_response_is_cached(mock_server, tmp_path):
+    server = mock_server()
+    cache = LLMResponseCache(str(tmp_path / 'cache.sqlite3'))
+    service = make_service(server, cache=cache)
+    first = "".join(service.stream_response("I saw a ghost", temperature=0))
+    second = "".join(service.stream_response("I saw a ghost", temperature=0))
+    assert first == second
+    assert server.stats_snapshot()['requests'] == 1
+    assert cache.hits == 1
+    cache.close()
+
+
+def test_micro_batching_over_http(mock_server):
+    server = mock_server(latency=0.05)
+    service = make_service(server, micro_batch=True, max_batch_wait_ms=50, coalesce=False)
+    prompts = [f"claim number {i}" for i in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        texts = list(pool.map(lambda prompt: service.generate_response(prompt, temperature=0), prompts))
+    assert texts == [render_template_response(prompt) for prompt in prompts]
+    assert server.stats_snapshot()['requests'] < len(prompts)
+
+
+def test_breaker_opens_on_failing_stream_and_falls_back(mock_server):
+    server = mock_server(error_rate=1.0, error_status=500)
+    analyzer = ClaimAnalyzer(llm_config={'model_id': 'mock', 'backend': 'huggingface', 'api_url': url(server)},
+                             breaker_threshold=2, breaker_recovery=60)
+    for _ in range(4):
+        explanation = "".join(analyzer.stream_explanation("I saw a ghost", "Debunked", FACTS, EVIDENCE))
+        assert explanation.startswith("The claim has been debunked")
+    assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
+    # Once open, claims fall back without calling the endpoint
+    assert server.stats_snapshot()['requests'] == 2
+
+
+def test_breaker_closes_after_recovery(mock_server):
+    server = mock_server(fail_first=1, error_status=500)
+    analyzer = ClaimAnalyzer(llm_config={'model_id': 'mock', 'backend': 'huggingface', 'api_url': url(server)},
+                             breaker_threshold=1, breaker_recovery=0.05)
+    "".join(analyzer.stream_explanation("I saw a ghost", "Debunked", FACTS, EVIDENCE))
+    assert analyzer.circuit_breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.1)
+    explanation = "".join(analyzer.stream_explanation("I saw a ghost", "Debunked", FACTS, EVIDENCE))
+    assert not explanation.startswith("The claim has been debunked")
+    assert analyzer.circuit_breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from llm_backends import DeadlineExceeded, TemplateBackend, create_backend, render_template_response
+from rate_limiter import PriorityScheduler
+
+PARAMETERS = {"max_new_tokens": 200, "temperature": 0.0}
+PROMPT = 'Claim: "The lake monster was photographed"\nVerdict: Debunked\n'
+
+
+def make_backend(**options):
+    options.setdefault("latency_ms", 0.0)
+    options.setdefault("per_token_ms", 0.0)
+    options.setdefault("jitter", 0.0)
+    return TemplateBackend(**options)
+
+
+def test_output_depends_only_on_the_prompt():
+    text = make_backend().generate(PROMPT, PARAMETERS)
+    assert text == render_template_response(PROMPT)
+    assert text.startswith('The claim "The lake monster was photographed" was assessed as Debunked.')
+    assert make_backend(seed=1, jitter=0.5).generate(PROMPT, PARAMETERS) == text
+
+
+def test_max_new_tokens_truncates_every_method():
+    backend = make_backend()
+    parameters = {"max_new_tokens": 4}
+    text = backend.generate(PROMPT, parameters)
+    assert len(text.split()) == 4
+    assert backend.generate_batch([PROMPT, "Claim: \"x\""], parameters)[0] == text
+    assert "".join(backend.stream(PROMPT, parameters)).strip() == text
+
+
+def test_stream_and_batch_match_generate():
+    backend = make_backend()
+    other = 'Claim: "Bigfoot left footprints"\nVerdict: Unsupported\n'
+    assert "".join(backend.stream(PROMPT, PARAMETERS)).strip() == backend.generate(PROMPT, PARAMETERS)
+    assert backend.generate_batch([PROMPT, other], PARAMETERS) == [backend.generate(PROMPT, PARAMETERS),
+                                                                  backend.generate(other, PARAMETERS)]
+    assert backend.generate_batch([], PARAMETERS) == []
+
+
+def test_latency_scales_with_tokens():
+    backend = make_backend(latency_ms=20.0, per_token_ms=2.0)
+    start = time.perf_counter()
+    text = backend.generate(PROMPT, PARAMETERS)
+    expected = (20.0 + 2.0 * len(text.split())) / 1000.0
+    assert time.perf_counter() - start >= expected * 0.9
+
+
+def test_jitter_is_reproducible_with_a_seed():
+    first, second = make_backend(jitter=0.5, seed=3), make_backend(jitter=0.5, seed=3)
+    assert [first._scale() for _ in range(5)] == [second._scale() for _ in range(5)]
+    assert make_backend()._scale() == 1.0
+
+
+@pytest.mark.parametrize("method", ["generate", "stream"])
+def test_deadline_raises_and_releases_scheduler_slot(method):
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    backend = make_backend(latency_ms=500.0, scheduler=scheduler)
+    deadline = time.monotonic() + 0.02
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        if method == "stream":
+            list(backend.stream(PROMPT, PARAMETERS, deadline=deadline))
+        else:
+            backend.generate(PROMPT, PARAMETERS, deadline=deadline)
+    assert time.perf_counter() - start < 0.4
+    assert scheduler.metrics()['in_flight'] == 0
+
+
+def test_stream_holds_scheduler_slot_until_closed():
+    scheduler = PriorityScheduler(requests_per_second=1000, max_concurrency=1)
+    backend = make_backend(scheduler=scheduler)
+    chunks = backend.stream(PROMPT, PARAMETERS)
+    assert next(chunks)
+    assert scheduler.metrics()['in_flight'] == 1
+    chunks.close()
+    assert scheduler.metrics()['in_flight'] == 0
+
+
+def test_created_by_name_with_options():
+    backend = create_backend("template", "simulated", latency_ms=5.0, jitter=0.0)
+    assert isinstance(backend, TemplateBackend)
+    assert backend.model_id == "simulated" and backend.latency_ms == 5.0